@@ -0,0 +1,119 @@
+from graph import Graph
+from graph.mst import DisjointSet
+import math, random
+
+#Seeded generators of synthetic inputs, the same seed always gives the same graph or table
+
+def grid_graph(rows, cols, weighted=True, seed=0):
+    """
+    rows x cols grid, node r * cols + c is joined to its right and lower neighbours
+    Weights are random ints from 1 to 10
+    """
+    rng = random.Random(seed)
+    edges = []
+    for r in range(rows):
+        for c in range(cols):
+            node = r * cols + c
+            if c + 1 < cols:
+                edges.append([node, node + 1])
+            if r + 1 < rows:
+                edges.append([node, node + cols])
+    if weighted:
+        for edge in edges:
+            edge.append(rng.randint(1, 10))
+    return Graph(list(range(rows * cols)), edges, weighted=weighted)
+
+def erdos_renyi(n, m, directed=False, weighted=True, seed=0):
+    """
+    G(n, m) random graph: m distinct edges drawn uniformly, without loops
+    Weights are random ints from 1 to 100
+    """
+    rng = random.Random(seed)
+    pairs = n * (n - 1) if directed else n * (n - 1) // 2
+    if m > pairs:
+        raise ValueError(f"A graph with {n} nodes has at most {pairs} edges")
+    seen = set()
+    edges = []
+    while len(edges) < m:
+        u, v = rng.randrange(n), rng.randrange(n)
+        key = (u, v) if directed else (min(u, v), max(u, v))
+        if u == v or key in seen:
+            continue
+        seen.add(key)
+        edges.append([u, v, rng.randint(1, 100)] if weighted else [u, v])
+    return Graph(list(range(n)), edges, directed=directed, weighted=weighted)
+
+def scale_free(n, attach=2, weighted=True, seed=0):
+    """
+    Barabási-Albert graph: every new node is joined to attach distinct existing nodes,
+    picked with a probability proportional to their degree
+    Weights are random ints from 1 to 100
+    """
+    rng = random.Random(seed)
+    #Every node appears once per edge end, so a uniform pick from it follows the degrees
+    ends = list(range(attach))
+    edges = []
+    for node in range(attach, n):
+        targets = set()
+        while len(targets) < attach:
+            targets.add(rng.choice(ends))
+        for target in targets:
+            edges.append([node, target, rng.randint(1, 100)] if weighted else [node, target])
+            ends.extend((node, target))
+    return Graph(list(range(n)), edges, weighted=weighted)
+
+def road_network(n, keep=0.6, seed=0):
+    """
+    Road like planar graph over about n nodes: a grid with jittered node positions, where a random
+    spanning tree of the grid is always kept and every other grid edge with probability keep
+    Weights are the distances between the nodes, in hundredths, as ints
+    """
+    rng = random.Random(seed)
+    side = max(2, math.isqrt(n))
+    points = [(c + rng.uniform(-0.3, 0.3), r + rng.uniform(-0.3, 0.3)) for r in range(side) for c in range(side)]
+    grid = grid_graph(side, side, weighted=False, seed=seed)
+    candidates = list(grid.edges)
+    rng.shuffle(candidates)
+    sets = DisjointSet(side * side)
+    edges = []
+    for u, v in candidates:
+        if sets.union(u, v) or rng.random() < keep:
+            edges.append([u, v, max(1, round(100 * math.dist(points[u], points[v])))])
+    return Graph(list(range(side * side)), edges, weighted=True)
+
+def eulerian_graph(n, cycles=None, weighted=True, seed=0):
+    """
+    Connected graph where every node has an even degree, so it has a Eulerian cycle:
+    a cycle through all the nodes in random order, plus random cycles of 3 to 10 nodes
+    (n // 4 of them if cycles is None)
+    Weights are random ints from 1 to 100
+    """
+    rng = random.Random(seed)
+    if cycles is None:
+        cycles = n // 4
+    order = list(range(n))
+    rng.shuffle(order)
+    walks = [order]
+    for i in range(cycles):
+        walks.append(rng.sample(range(n), min(n, rng.randint(3, 10))))
+    edges = []
+    for walk in walks:
+        for i in range(len(walk)):
+            u, v = walk[i], walk[(i + 1) % len(walk)]
+            edges.append([u, v, rng.randint(1, 100)] if weighted else [u, v])
+    return Graph(list(range(n)), edges, weighted=weighted)
+
+def dependence_table(n, max_precursors=3, window=50, seed=0):
+    """
+    Random dependence table of n activities "A0", "A1", ... in the format of ActivityNetwork
+    Every activity has up to max_precursors precursors among the window activities before it,
+    so the precedences form a DAG, and a random duration from 1 to 20
+    """
+    rng = random.Random(seed)
+    table = dict()
+    for i in range(n):
+        earlier = range(max(0, i - window), i)
+        count = min(len(earlier), rng.randint(0, max_precursors))
+        precursors = [f"A{j}" for j in rng.sample(earlier, count)]
+        table[f"A{i}"] = [precursors, rng.randint(1, 20)]
+    return table
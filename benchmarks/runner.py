@@ -0,0 +1,148 @@
+from benchmarks.generators import grid_graph, erdos_renyi, scale_free, road_network, eulerian_graph, dependence_table
+from graph import ActivityNetwork
+import argparse, gc, json, math, os, platform, sys, time, tracemalloc
+
+#Reference report committed with the benchmarks, compared with by default
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+class Case:
+    """
+    A benchmarked algorithm: setup(size, seed) builds a fresh input (not timed), run(input) is timed
+    and returns a value summarising the result, compared with the baseline to catch wrong results
+    """
+    def __init__(self, name, sizes, setup, run):
+        self.name = name
+        self.sizes = sizes
+        self.setup = setup
+        self.run = run
+
+def _finite_sum(rows):
+    return sum(d for row in rows for d in row if d != math.inf)
+
+def _path_lengths(tree):
+    return sum(tree.distance(node) for node in tree.reachable())
+
+CASES = [
+    Case("shortest_path", (10000, 40000, 160000),
+         lambda n, seed: road_network(n, seed=seed),
+         lambda g: _path_lengths(g.shortestPath(0))),
+    Case("shortest_distances_all_pairs", (100, 200, 400),
+         lambda n, seed: erdos_renyi(n, 4 * n, seed=seed),
+         lambda g: _finite_sum(g.shortest_distances_all_pairs())),
+    Case("chinese_postman", (100, 225, 400),
+         lambda n, seed: road_network(n, seed=seed),
+         lambda g: g.chinese_postman()[0].total_graph_weight()),
+    Case("find_eulerian_cycle", (10000, 40000, 160000),
+         lambda n, seed: eulerian_graph(n, seed=seed),
+         lambda g: len(g.find_eulerian_cycle())),
+    Case("kruskal", (10000, 40000, 160000),
+         lambda n, seed: scale_free(n, seed=seed),
+         lambda g: g.kruskal().total_graph_weight()),
+    Case("kruskal_grid", (10000, 40000, 160000),
+         lambda n, seed: grid_graph(math.isqrt(n), math.isqrt(n), seed=seed),
+         lambda g: g.kruskal().total_graph_weight()),
+    Case("activity_network", (1000, 4000, 16000),
+         lambda n, seed: dependence_table(n, seed=seed),
+         lambda table: len(ActivityNetwork(table).edges)),
+    Case("critical_path", (1000, 4000, 16000),
+         lambda n, seed: ActivityNetwork(dependence_table(n, seed=seed)),
+         lambda net: net.total_project_duration() + len(net.critical_path())),
+]
+
+def measure(case, size, seed=0, repeat=3):
+    """
+    Returns {"case", "size", "time", "peak_memory", "value"} for one case and size
+    time -> best wall time in seconds over repeat runs, each on a fresh input
+    peak_memory -> peak of the memory allocated during one more run, in bytes, traced with tracemalloc
+    (run apart from the timed runs, as tracing slows allocations down)
+    """
+    times = []
+    for i in range(repeat):
+        data = case.setup(size, seed)
+        gc.collect()
+        start = time.perf_counter()
+        value = case.run(data)
+        times.append(time.perf_counter() - start)
+        del data
+    data = case.setup(size, seed)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run(data)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"case" : case.name, "size" : size, "time" : min(times), "peak_memory" : peak, "value" : value}
+
+def run(cases=None, max_size=None, seed=0, repeat=3, log=None):
+    """
+    Measures every case (all of CASES if None) over its sizes up to max_size
+    Returns the report {"environment" : {...}, "results" : [measure results]}
+    """
+    results = []
+    for case in cases or CASES:
+        for size in case.sizes:
+            if max_size is not None and size > max_size:
+                continue
+            result = measure(case, size, seed, repeat)
+            if log is not None:
+                log(f"{case.name:30} {size:>8} {result['time']:10.4f}s {result['peak_memory'] / 2**20:10.1f}MB")
+            results.append(result)
+    environment = {"python" : platform.python_version(), "platform" : platform.platform(), "seed" : seed}
+    return {"environment" : environment, "results" : results}
+
+def compare(report, baseline, tolerance=0.25, noise=0.01):
+    """
+    Compares a report with a baseline report, results are matched by case and size
+    Returns a list of regression messages:
+    a run slower than the baseline by more than tolerance (as a fraction) and noise seconds,
+    a peak memory above the baseline by more than tolerance, or a different result value
+    Result values are only compared if both reports were run with the same seed
+    """
+    reference = {(result["case"], result["size"]) : result for result in baseline["results"]}
+    same_inputs = report["environment"]["seed"] == baseline["environment"]["seed"]
+    regressions = []
+    for result in report["results"]:
+        base = reference.get((result["case"], result["size"]))
+        if base is None:
+            continue
+        name = f"{result['case']} size {result['size']}"
+        if result["time"] > base["time"] * (1 + tolerance) and result["time"] - base["time"] > noise:
+            regressions.append(f"{name}: {result['time']:.4f}s, baseline {base['time']:.4f}s")
+        if result["peak_memory"] > base["peak_memory"] * (1 + tolerance):
+            regressions.append(f"{name}: peak memory {result['peak_memory']} bytes, baseline {base['peak_memory']} bytes")
+        if same_inputs and not math.isclose(result["value"], base["value"], rel_tol=1e-9):
+            regressions.append(f"{name}: result {result['value']}, baseline {base['value']}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Times the graph algorithms on synthetic inputs")
+    parser.add_argument("--cases", nargs="*", help="names of the cases to run, all by default")
+    parser.add_argument("--max-size", type=int, help="skip the sizes above this one")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per size, the best one is kept")
+    parser.add_argument("--output", help="JSON file the report is written to")
+    parser.add_argument("--baseline", default=BASELINE,
+                        help="JSON report to compare with, exits with status 1 on regressions (benchmarks/baseline.json by default)")
+    parser.add_argument("--no-baseline", action="store_true", help="only print the report, without comparing it")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown as a fraction of the baseline")
+    args = parser.parse_args(argv)
+    cases = CASES
+    if args.cases:
+        names = {case.name for case in CASES}
+        unknown = set(args.cases) - names
+        if unknown:
+            parser.error(f"unknown cases {sorted(unknown)}, expected some of {sorted(names)}")
+        cases = [case for case in CASES if case.name in args.cases]
+    report = run(cases, args.max_size, args.seed, args.repeat, log=print)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=1)
+    if not args.no_baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.tolerance)
+        for message in regressions:
+            print("REGRESSION", message)
+        if regressions:
+            sys.exit(1)
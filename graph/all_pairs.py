@@ -0,0 +1,595 @@
+from graph.csr import CSRGraph, typecode
+from graph.shortest_paths import dijkstra
+from graph.matrix import as_coo
+from graph.instrument import count, timed
+from concurrent.futures import ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from multiprocessing import shared_memory
+from itertools import islice
+from collections import deque
+from array import array
+import numpy as np
+import math, os
+
+#Number of cells of the tiles of rows relaxed together in phase 3 of the blocked
+#Floyd-Warshall, small enough for a tile and its temporaries to stay in cache
+TILE_CELLS = 1 << 15
+
+#Below about this many edge scans (sources times nodes and edges), Johnson's rows are computed in
+#process: starting a pool and sharing the graph would take longer than the searches themselves
+POOL_MIN_WORK = 1 << 18
+
+def distance_matrix(space, dtype=np.float64):
+    '''
+    Returns the initial distance matrix of a search graph (AdjacencyIndex or CSRGraph), or of an
+    adjacency matrix: sparse (COOMatrix, CSRMatrix or scipy.sparse) or dense (2d list or array, 0 meaning no edge)
+    m[i][j] is the weight of the lightest edge from the i-th to the j-th node key,
+    inf if there is no such edge and 0 on the diagonal
+    Also returns the predecessor matrix matching it: i where there is an edge, -1 otherwise
+    '''
+    if hasattr(space, "tocoo") or isinstance(space, (list, np.ndarray)):
+        rows, cols, weights, n = as_coo(space)
+        dist = np.full((n, n), np.inf, dtype=dtype)
+        np.minimum.at(dist, (rows, cols), weights.astype(dtype))
+        return _with_predecessors(dist)
+    keys = list(space.keys())
+    n = len(keys)
+    dist = np.full((n, n), np.inf, dtype=dtype)
+    if isinstance(space, CSRGraph):
+        #Keys are node ids, so the CSR arrays are the coordinates of the edges
+        indptr = np.frombuffer(space.indptr, dtype=np.int64)
+        rows = np.repeat(np.arange(n), np.diff(indptr))
+        cols = np.frombuffer(space.indices, dtype=np.int64)
+        if space.weights is None:
+            weights = np.ones(len(cols), dtype=dtype)
+        else:
+            weights = np.asarray(space.weights, dtype=dtype)
+        np.minimum.at(dist, (rows, cols), weights)
+    else:
+        position = {key : i for i, key in enumerate(keys)}
+        for i, key in enumerate(keys):
+            row = dist[i]
+            for v, w in space.neighbours(key):
+                j = position[v]
+                if w < row[j]:
+                    row[j] = w
+    return _with_predecessors(dist)
+
+def _with_predecessors(dist):
+    '''
+    Returns the initial distance matrix with a 0 diagonal and the predecessor matrix matching it
+    '''
+    n = len(dist)
+    pred = np.where(np.isinf(dist), -1, np.arange(n)[:, None]).astype(np.int32)
+    #Negative self loops are kept, they make the graph contain a negative cycle
+    diagonal = np.arange(n)
+    dist[diagonal, diagonal] = np.minimum(dist[diagonal, diagonal], 0)
+    pred[diagonal, diagonal] = -1
+    return dist, pred
+
+def _relax(dist, pred, hops, cells, via, via_pred, via_hops):
+    '''
+    Replaces dist[cells] by via where via is shorter (or as short with fewer edges, if hops
+    is tracked) and copies the matching predecessors and hop counts
+    '''
+    better = via < dist[cells]
+    if hops is not None:
+        better |= (via == dist[cells]) & (via_hops < hops[cells]) & np.isfinite(via)
+        np.copyto(hops[cells], via_hops, where=better)
+    np.copyto(dist[cells], via, where=better)
+    np.copyto(pred[cells], via_pred, where=better)
+
+def _exact_keys(dist, block_size):
+    '''
+    True if every path length the Floyd-Warshall can reach is an integer small enough that
+    length * block_size + (node of the block) is exact in the dtype of dist
+    '''
+    finite = dist[np.isfinite(dist)]
+    if not len(finite):
+        return True
+    if (finite != np.round(finite)).any():
+        return False
+    longest = float(np.abs(finite).max()) * len(dist)
+    return (2 * longest + 1) * block_size < 2 ** np.finfo(dist.dtype).nmant
+
+def _min_plus(dist, pred, rows, cols, block, to_block, from_block):
+    '''
+    Relaxes dist[rows, cols] through all the nodes of block, by the min-plus product of the rows
+    of the tile and the columns of the block (which must be final)
+    to_block and from_block are dist[:, block] and dist[block] as keys (see floyd_warshall): the
+    smallest key of a cell gives both the shortest path and, on ties, the first node of the block
+    it goes through, as if the nodes were tried one after the other. Only the keys are updated
+    node by node, the distances and predecessors of the changed cells are set once at the end
+    '''
+    size = block.stop - block.start
+    #Keys of the current lengths, above the keys of the paths as long and below those of shorter paths
+    current = dist[rows, cols] * size - 0.5
+    keys = current.copy()
+    via = np.empty_like(keys)
+    to_block = to_block[rows]
+    for k in range(size):
+        np.add(to_block[:, k, None], from_block[k, cols], out=via)
+        np.minimum(keys, via, out=keys)
+    i, j = np.nonzero(keys < current)
+    keys = keys[i, j]
+    k = np.remainder(keys, size)
+    i += rows.start
+    j += cols.start
+    dist[i, j] = (keys - k) / size
+    pred[i, j] = pred[block.start + k.astype(np.intp), j]
+
+def floyd_warshall(dist, pred, block_size=64):
+    """
+    Blocked Floyd-Warshall on a distance matrix and its predecessor matrix, both updated in place
+    The k loop is split into blocks of block_size nodes. For each block, the rows and columns
+    of the block are relaxed first (they depend on each other), then the cells outside them are
+    relaxed through the nodes of the block one tile of rows at a time, so that each tile stays
+    in cache for the whole block instead of streaming the matrix once per node
+    If every path length is an integer (small enough to stay exact times block_size), a tile is
+    relaxed by a min-plus product over the keys length * block_size + position in the block,
+    which carry the node each path goes through, see _min_plus
+    pred[i][j] ends up as the node before j on the shortest path from i to j
+    If the graph has edges of weight 0 or less, equally short paths are told apart by their
+    number of edges, otherwise the predecessors could loop around zero weight cycles
+    Raises ValueError if the graph contains a negative cycle
+    """
+    n = len(dist)
+    hops = None
+    off_diagonal = ~np.eye(n, dtype=bool)
+    if (dist[off_diagonal] <= 0).any():
+        hops = np.where(np.isfinite(dist) & off_diagonal, 1, 0).astype(np.int32)
+    exact = hops is None and _exact_keys(dist, block_size)
+    for start in range(0, n, block_size):
+        block = slice(start, min(start + block_size, n))
+        size = block.stop - block.start
+        #Phases 1 and 2: Floyd-Warshall iterations restricted to the rows and columns of the block
+        for k in range(block.start, block.stop):
+            _relax(dist, pred, hops, (block,),
+                   dist[block, k, None] + dist[k],
+                   pred[k],
+                   None if hops is None else hops[block, k, None] + hops[k])
+            _relax(dist, pred, hops, (slice(None), block),
+                   dist[:, k, None] + dist[k, block],
+                   pred[k, block],
+                   None if hops is None else hops[:, k, None] + hops[k, block])
+        #Phase 3: the cells outside the rows and columns of the block, whose rows and columns are final
+        if exact:
+            to_block = dist[:, block] * size
+            from_block = dist[block] * size + np.arange(size, dtype=dist.dtype)[:, None]
+        outside = [part for part in (slice(0, block.start), slice(block.stop, n)) if part.start < part.stop]
+        for cols in outside:
+            width = cols.stop - cols.start
+            rows = max(1, TILE_CELLS // width)
+            for part in outside:
+                for i in range(part.start, part.stop, rows):
+                    tile = slice(i, min(i + rows, part.stop))
+                    if exact:
+                        _min_plus(dist, pred, tile, cols, block, to_block, from_block)
+                        continue
+                    for k in range(block.start, block.stop):
+                        _relax(dist, pred, hops, (tile, cols),
+                               dist[tile, k, None] + dist[k, cols],
+                               pred[k, cols],
+                               None if hops is None else hops[tile, k, None] + hops[k, cols])
+    if n and (np.diagonal(dist) < 0).any():
+        raise ValueError("Graph contains a negative cycle")
+    return dist, pred
+
+class AllPairsShortestPaths:
+    """
+    Result of an all pairs shortest path computation
+    dist[i][j] -> shortest distance from nodes[i] to nodes[j], inf if unreachable
+    pred[i][j] -> position of the node before nodes[j] on that path, -1 if there is none
+    index -> {node : position} to look up arbitrary node labels
+    """
+    def __init__(self, nodes, dist, pred):
+        self.nodes = nodes
+        self.index = {node : i for i, node in enumerate(nodes)}
+        self.dist = dist
+        self.pred = pred
+
+    def distance(self, node1, node2):
+        """
+        Returns the shortest distance from node1 to node2, math.inf if unreachable
+        """
+        d = self.dist[self.index[node1], self.index[node2]]
+        return math.inf if np.isinf(d) else d.item()
+
+    def path(self, node1, node2):
+        """
+        Returns the shortest path from node1 to node2 as a list of nodes, None if unreachable
+        """
+        i, j = self.index[node1], self.index[node2]
+        if np.isinf(self.dist[i, j]):
+            return None
+        path = [j]
+        row = self.pred[i]
+        while j != i:
+            j = int(row[j])
+            path.append(j)
+        path.reverse()
+        return [self.nodes[k] for k in path]
+
+    def to_list(self, integral=False):
+        """
+        Returns the distance matrix as a 2d list, with math.inf for unreachable pairs
+        If integral is True, finite distances are converted to ints
+        """
+        if not integral:
+            return self.dist.tolist()
+        unreachable = np.isinf(self.dist)
+        matrix = np.where(unreachable, 0, self.dist).astype(np.int64).astype(object)
+        matrix[unreachable] = math.inf
+        return matrix.tolist()
+
+    def __repr__(self):
+        return f"AllPairsShortestPaths({len(self.nodes)} nodes, dtype={self.dist.dtype})"
+
+def johnson_potentials(csr):
+    """
+    Bellman-Ford (queue based) from a virtual source joined to every node by a 0 weight arc
+    Returns the potentials h used by Johnson's algorithm to make every weight non negative:
+    w(u, v) + h[u] - h[v] >= 0. Returns None if no weight is negative, as no reweighting is needed
+    Raises ValueError if the graph contains a negative cycle
+    """
+    n = len(csr)
+    if csr.weights is None or len(csr.weights) == 0 or min(csr.weights) >= 0:
+        return None
+    h = [0] * n
+    queue = deque(range(n))
+    in_queue = [True] * n
+    #A node can only improve n times without a negative cycle
+    count = [0] * n
+    while queue:
+        u = queue.popleft()
+        in_queue[u] = False
+        for v, w in csr.neighbours(u):
+            if h[u] + w < h[v]:
+                h[v] = h[u] + w
+                if not in_queue[v]:
+                    count[v] += 1
+                    if count[v] > n:
+                        raise ValueError("Graph contains a negative cycle")
+                    queue.append(v)
+                    in_queue[v] = True
+    return h
+
+class ReweightedCSR(CSRGraph):
+    '''
+    CSR graph whose weights are shifted by Johnson potentials: w(u, v) + h[u] - h[v]
+    '''
+    def __init__(self, csr, potentials):
+        super().__init__(csr.labels, csr.indptr, csr.indices, csr.weights, csr.edge_ids, csr.directed, csr._ids)
+        self.potentials = potentials
+
+    def neighbours(self, u):
+        h = self.potentials
+        h_u = h[u]
+        #Rounding can leave tiny negative weights, which Dijkstra cannot handle
+        return ((v, max(0, w + h_u - h[v])) for v, w in super().neighbours(u))
+
+def _single_source_row(csr, potentials, source, predecessors):
+    '''
+    Runs Dijkstra from source and returns its distance row (and predecessor row) as arrays
+    '''
+    space = csr if potentials is None else ReweightedCSR(csr, potentials)
+    dist, pred, settled, complete = dijkstra(space, source)
+    if potentials is not None:
+        h_source = potentials[source]
+        dist = [d - h_source + h_v for d, h_v in zip(dist, potentials)]
+    row = array('d', dist)
+    if not predecessors:
+        return source, row, None
+    return source, row, array('q', [-1 if p is None else p for p in pred])
+
+#Graph shared by the worker processes, set by _attach_shared_graph
+_shared = None
+
+def _share_graph(csr, potentials):
+    '''
+    Copies the CSR arrays (and the potentials) into one shared memory block
+    Returns the block and the layout the workers need to map the arrays back
+    '''
+    parts = [("indptr", 'q', csr.indptr), ("indices", 'q', csr.indices)]
+    if csr.weights is not None:
+        parts.append(("weights", typecode(csr.weights), csr.weights))
+    if potentials is not None:
+        parts.append(("potentials", 'd', array('d', potentials)))
+    size = sum(len(values) * 8 for name, code, values in parts)
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    layout = []
+    offset = 0
+    for name, code, values in parts:
+        end = offset + len(values) * 8
+        block.buf[offset:end] = memoryview(array(code, values)).cast('B')
+        layout.append((name, code, offset, end))
+        offset = end
+    return block, layout
+
+def _map_shared_graph(buf, layout, n, directed):
+    arrays = {name : buf[start:end].cast(code) for name, code, start, end in layout}
+    csr = CSRGraph(range(n), arrays["indptr"], arrays["indices"], arrays.get("weights"), None, directed, ids={})
+    return csr, arrays.get("potentials")
+
+def _attach_shared_graph(name, layout, n, directed):
+    '''
+    Worker initializer: maps the shared CSR arrays without copying them
+    '''
+    global _shared
+    #The parent owns the block and unlinks it once the pool is done
+    block = shared_memory.SharedMemory(name=name)
+    csr, potentials = _map_shared_graph(block.buf, layout, n, directed)
+    _shared = (block, csr, potentials)
+
+def _rows_task(sources, predecessors):
+    block, csr, potentials = _shared
+    return [_single_source_row(csr, potentials, source, predecessors) for source in sources]
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+def _as_numpy(result):
+    source, row, pred = result
+    if pred is not None:
+        pred = np.frombuffer(pred, dtype=np.int64)
+    return source, np.frombuffer(row, dtype=np.float64), pred
+
+def johnson_rows(csr, sources=None, processes=None, chunk_size=16, predecessors=False):
+    """
+    All pairs shortest paths by running a heap Dijkstra from every source (Johnson's algorithm)
+    Negative weights are handled by reweighting with Bellman-Ford potentials first
+    The sources are split in chunks of chunk_size and spread across a pool of processes
+    (os.cpu_count() if processes is None, no pool if processes is 1), at most one per chunk.
+    Small jobs (see POOL_MIN_WORK) run in process. The CSR arrays are put in shared memory
+    once, so tasks only carry the source ids
+    Yields (source id, distance row, predecessor row or None) as rows complete, the rows are
+    NumPy arrays in node id order and at most two chunks per process are in flight at a time
+    """
+    n = len(csr)
+    sources = range(n) if sources is None else list(sources)
+    potentials = johnson_potentials(csr)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, -(-len(sources) // chunk_size))
+    if len(sources) * (n + csr.num_slots) < POOL_MIN_WORK:
+        processes = 1
+    chunks = _chunks(sources, chunk_size)
+    if processes <= 1:
+        for chunk in chunks:
+            for source in chunk:
+                yield _as_numpy(_single_source_row(csr, potentials, source, predecessors))
+        return
+    block, layout = _share_graph(csr, potentials)
+    pool = ProcessPoolExecutor(processes, initializer=_attach_shared_graph,
+                               initargs=(block.name, layout, n, csr.directed))
+    try:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_rows_task, chunk, predecessors))
+            if len(pending) < 2 * processes:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for result in future.result():
+                    yield _as_numpy(result)
+        for future in as_completed(pending):
+            for result in future.result():
+                yield _as_numpy(result)
+    finally:
+        pool.shutdown(cancel_futures=True)
+        block.close()
+        block.unlink()
+
+def lower_edge(dist, pred, u, v, weight):
+    """
+    Updates complete distance and predecessor matrices in place after the arc u -> v (node
+    positions) is inserted or made lighter, in O(V^2)
+    A shortest path can only improve by taking the arc once: dist[i][j] becomes
+    dist[i][u] + weight + dist[v][j] where that is shorter, and the node before j is then the
+    one on the path from v (u if j is v)
+    Returns the number of improved cells
+    """
+    rows = np.flatnonzero(np.isfinite(dist[:, u]))
+    cols = np.flatnonzero(np.isfinite(dist[v]))
+    cells = np.ix_(rows, cols)
+    via = dist[rows, u, None] + weight + dist[v, cols]
+    current = dist[cells]
+    better = via < current
+    improved = int(np.count_nonzero(better))
+    if improved:
+        via_pred = pred[v].copy()
+        via_pred[v] = u
+        dist[cells] = np.where(better, via, current)
+        pred[cells] = np.where(better, via_pred[cols], pred[cells])
+    return improved
+
+def affected_sources(dist, u, v, weight):
+    """
+    Positions of the sources whose shortest paths may take the arc u -> v of the given weight,
+    i.e. for which the arc is tight: dist[s][u] + weight == dist[s][v]
+    Only their rows can change if the arc is removed or made heavier. Equality is tested with
+    a relative tolerance, as extra sources only cost an extra search
+    """
+    via = dist[:, u] + weight
+    return np.flatnonzero(np.isfinite(via) & np.isclose(via, dist[:, v], rtol=1e-6, atol=0))
+
+class DynamicAllPairs(AllPairsShortestPaths):
+    """
+    All pairs shortest paths of a graph kept up to date as its edges change, instead of being
+    recomputed in O(V^3) after every change
+    Changes are made through this object, which applies them to the graph and then to its own
+    (writable) copies of the distance and predecessor matrices:
+    - a new or lighter edge updates the matrices in O(V^2), see lower_edge
+    - a removed or heavier edge reruns Dijkstra from the sources whose shortest paths may take it
+      only (see affected_sources), with Johnson reweighting if some weights are negative
+    A batch that would cost more than a rebuild (about n arcs to lower, or half the sources to
+    rerun) rebuilds the matrices with Floyd-Warshall instead
+    Changes made to the graph directly are detected, the matrices are then rebuilt on next use
+    """
+    def __init__(self, graph, dtype="float64", block_size=64, processes=1):
+        self.graph = graph
+        self.dtype = np.dtype(dtype)
+        self.block_size = block_size
+        #Worker processes of the Dijkstra reruns, see johnson_rows
+        self.processes = processes
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Recomputes the matrices from scratch
+        """
+        graph = self.graph
+        result = graph.all_pairs_shortest_paths(self.dtype.name, self.block_size)
+        super().__init__(list(result.nodes), result.dist.copy(), result.pred.copy())
+        self.version = graph.version
+
+    def refresh(self):
+        """
+        Rebuilds the matrices if the graph was changed without going through this object
+        """
+        if self.version != self.graph.version:
+            self.rebuild()
+
+    def add_edge(self, node1, node2, weight=None):
+        """
+        Adds an edge to the graph (see Graph.add_edge) and updates the distances
+        """
+        self.apply([("add", node1, node2) + (() if weight is None else (weight,))])
+
+    def remove_edge(self, node1, node2, weight=None):
+        """
+        Removes an edge from the graph (see Graph.remove_edge) and updates the distances
+        """
+        self.apply([("remove", node1, node2) + (() if weight is None else (weight,))])
+
+    def set_weight(self, node1, node2, weight):
+        """
+        Changes the weight of an edge of the graph (see Graph.set_weight) and updates the distances
+        """
+        self.apply([("set", node1, node2, weight)])
+
+    def _lightest(self, space, node1, node2):
+        '''
+        Weight of the lightest edge from node1 to node2 in a search graph, inf if there is none
+        '''
+        if not (self.graph._has_node(node1) and self.graph._has_node(node2)):
+            return math.inf
+        key = space.key(node2)
+        return min((w for v, w in space.neighbours(space.key(node1)) if v == key), default=math.inf)
+
+    @timed
+    def apply(self, changes):
+        """
+        Applies a batch of changes to the graph, then updates the distances once for all of them
+        changes -> iterable of ("add", node1, node2, weight), ("remove", node1, node2) or
+                   ("remove", node1, node2, weight), and ("set", node1, node2, weight)
+                   (no weight when adding to an unweighted graph)
+        The changes are summed up as the lightest weight between each pair of nodes they touch, before
+        and after the batch, so an edge added and removed again in the same batch costs nothing
+        Raises ValueError if the graph ends up with a negative cycle, the matrices are then
+        rebuilt (and the error raised again) on next use
+        """
+        graph = self.graph
+        changes = list(changes)
+        self.refresh()
+        cells = {}
+        space = graph._search_graph()
+        for op, node1, node2, *weight in changes:
+            if op not in ("add", "remove", "set"):
+                raise ValueError(f"Unknown change {op}, expected add, remove or set")
+            if (node1, node2) not in cells and (graph.directed or (node2, node1) not in cells):
+                cells[(node1, node2)] = self._lightest(space, node1, node2)
+        for op, node1, node2, *weight in changes:
+            if op == "add":
+                graph.add_edge(node1, node2, *weight)
+            elif op == "remove":
+                graph.remove_edge(node1, node2, *weight)
+            else:
+                graph.set_weight(node1, node2, *weight)
+        self._grow()
+        space = graph._search_graph()
+        lowered, raised = [], []
+        for (node1, node2), old in cells.items():
+            new = self._lightest(space, node1, node2)
+            cell = (self.index[node1], self.index[node2])
+            if new < old:
+                lowered.append(cell + (new,))
+            elif new > old:
+                raised.append(cell + (old,))
+        self.version = None
+        if lowered or raised:
+            self._update(lowered, raised)
+        self.version = graph.version
+
+    def _grow(self):
+        '''
+        Adds the rows and columns of the nodes added to the graph, which cannot reach any other node yet
+        '''
+        n, size = len(self.nodes), len(self.graph.nodes)
+        if size == n:
+            return
+        dist = np.full((size, size), np.inf, dtype=self.dist.dtype)
+        pred = np.full((size, size), -1, dtype=self.pred.dtype)
+        dist[:n, :n] = self.dist
+        pred[:n, :n] = self.pred
+        diagonal = np.arange(n, size)
+        dist[diagonal, diagonal] = 0
+        for node in self.graph.nodes[n:]:
+            self.index[node] = len(self.nodes)
+            self.nodes.append(node)
+        self.dist, self.pred = dist, pred
+
+    def _update(self, lowered, raised):
+        '''
+        Updates the matrices for the pairs of node positions (i, j, weight) whose lightest edge got
+        lighter (new weight) or heavier (old weight)
+        '''
+        graph, dist, pred = self.graph, self.dist, self.pred
+        directed = graph.directed
+        arcs = 1 if directed else 2
+        #Past about n arcs to lower, the O(V^2) updates add up to more than a rebuild
+        if arcs * len(lowered) >= len(self.nodes):
+            self.rebuild()
+            return
+        #The rows to rerun are found before any update, from the distances the old edges gave
+        sources = set()
+        for i, j, weight in raised:
+            sources.update(affected_sources(dist, i, j, weight).tolist())
+            if not directed:
+                sources.update(affected_sources(dist, j, i, weight).tolist())
+        #Dijkstra from most sources is slower than the vectorized Floyd-Warshall
+        if 2 * len(sources) > len(self.nodes):
+            self.rebuild()
+            return
+        if sources:
+            #Rerun on the final graph, so these rows are already exact for the lowered edges as well
+            for source, row, pred_row in johnson_rows(graph.csr(), sorted(sources), self.processes, predecessors=True):
+                dist[source] = row
+                pred[source] = pred_row
+            count("all_pairs.sources_recomputed", len(sources))
+        improved = 0
+        for i, j, weight in lowered:
+            improved += lower_edge(dist, pred, i, j, weight)
+            if not directed and i != j:
+                improved += lower_edge(dist, pred, j, i, weight)
+        count("all_pairs.cells_lowered", improved)
+        if len(dist) and (np.diagonal(dist) < 0).any():
+            raise ValueError("Graph contains a negative cycle")
+
+    def distance(self, node1, node2):
+        self.refresh()
+        return super().distance(node1, node2)
+
+    def path(self, node1, node2):
+        self.refresh()
+        return super().path(node1, node2)
+
+    def to_list(self, integral=False):
+        self.refresh()
+        return super().to_list(integral)
+
+    def __repr__(self):
+        return f"DynamicAllPairs({len(self.nodes)} nodes, dtype={self.dist.dtype})"
@@ -0,0 +1,105 @@
+def connected_components(csr, rev=None):
+    """
+    Connected components of a CSRGraph by iterative depth first search, in O(V + E)
+    Edges are followed both ways if the graph is directed (weakly connected components),
+    rev being its transpose, built if not given
+    Returns a tuple (count, component) where component[u] is the component number of key u,
+    components being numbered in order of their smallest key
+    """
+    n = len(csr)
+    sides = (csr,)
+    if csr.directed:
+        sides = (csr, rev if rev is not None else csr.transpose())
+    component = [-1] * n
+    count = 0
+    for root in range(n):
+        if component[root] != -1:
+            continue
+        component[root] = count
+        stack = [root]
+        while stack:
+            u = stack.pop()
+            for side in sides:
+                for v in side.indices[side.indptr[u]:side.indptr[u + 1]]:
+                    if component[v] == -1:
+                        component[v] = count
+                        stack.append(v)
+        count += 1
+    return count, component
+
+def strongly_connected_components(csr):
+    """
+    Strongly connected components of a directed CSRGraph with Tarjan's algorithm, in O(V + E)
+    The depth first search keeps its own stack of (key, next edge slot), so deep graphs cannot
+    overflow the recursion limit. Undirected graphs get their connected components
+    Returns a tuple (count, component) as connected_components, components being numbered
+    in order of their smallest key
+    """
+    if not csr.directed:
+        return connected_components(csr)
+    n = len(csr)
+    indptr, indices = csr.indptr, csr.indices
+    index = [-1] * n
+    low = [0] * n
+    on_stack = bytearray(n)
+    #Tarjan's numbers, in reverse topological order of the components
+    found = [-1] * n
+    found_count = 0
+    stack = []
+    counter = 0
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, indptr[root])]
+        while work:
+            u, pos = work[-1]
+            if pos < indptr[u + 1]:
+                work[-1] = (u, pos + 1)
+                v = indices[pos]
+                if index[v] == -1:
+                    index[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    on_stack[v] = 1
+                    work.append((v, indptr[v]))
+                elif on_stack[v] and index[v] < low[u]:
+                    low[u] = index[v]
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[u] < low[parent]:
+                    low[parent] = low[u]
+            if low[u] == index[u]:
+                #u is the root of a component, made of the keys above it on the stack
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = 0
+                    found[w] = found_count
+                    if w == u:
+                        break
+                found_count += 1
+    #Renumbers the components in order of their smallest key
+    renumber = [-1] * found_count
+    count = 0
+    component = [0] * n
+    for u in range(n):
+        c = found[u]
+        if renumber[c] == -1:
+            renumber[c] = count
+            count += 1
+        component[u] = renumber[c]
+    return count, component
+
+def component_lists(count, component, labels):
+    '''
+    Groups node labels by component: returns a list of count lists of labels
+    '''
+    groups = [[] for _ in range(count)]
+    for key, c in enumerate(component):
+        groups[c].append(labels[key])
+    return groups
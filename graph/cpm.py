@@ -0,0 +1,188 @@
+from concurrent.futures import ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from graph.all_pairs import _chunks
+from itertools import chain
+from graph import instrument
+import heapq, math, os
+
+def topological_order(adj, rev):
+    """
+    Kahn's algorithm over the adjacency indexes of an activity network
+    adj / rev -> {node : [(node2, weight, activity), ...]} for the outgoing / incoming arcs
+    Returns the nodes in topological order, raises ValueError if the network has a cycle
+    """
+    indegree = {node : len(rev[node]) for node in adj}
+    order = [node for node in adj if indegree[node] == 0]
+    #order grows while it is walked, every node is appended once all its predecessors are in
+    for node in order:
+        for node2, weight, activity in adj[node]:
+            indegree[node2] -= 1
+            if indegree[node2] == 0:
+                order.append(node2)
+    if len(order) != len(adj):
+        raise ValueError("Activity network has a cycle, the dependence table has circular precedences")
+    return order
+
+class Schedule:
+    """
+    Critical path method over an activity network, one forward and one backward pass in topological order
+    Events without predecessors occur at 0, events without successors at the latest at the project duration
+    early -> {node : early event time}, the longest path from the start of the project to the event
+    remaining -> {node : longest path from the event to the end of the project}
+    Late event times are duration - remaining, so they follow changes of the duration without being updated
+    adj / rev are the cached indexes of the network, which keeps them in sync with its edges
+    """
+    def __init__(self, adj, rev, edges):
+        self.adj = adj
+        self.rev = rev
+        self.edges = edges
+        self.order = topological_order(adj, rev)
+        self.position = {node : i for i, node in enumerate(self.order)}
+        self.sinks = [node for node in self.order if not adj[node]]
+        self.early = dict.fromkeys(self.order, 0)
+        for node in self.order:
+            time = self.early[node]
+            for node2, weight, activity in adj[node]:
+                if time + weight > self.early[node2]:
+                    self.early[node2] = time + weight
+        self.remaining = dict.fromkeys(self.order, 0)
+        for node in reversed(self.order):
+            time = self.remaining[node]
+            for node1, weight, activity in rev[node]:
+                if time + weight > self.remaining[node1]:
+                    self.remaining[node1] = time + weight
+        #activity -> position of its arc in the edges of the network
+        self.arcs = {edge[3] : i for i, edge in enumerate(edges) if edge[3] != ""}
+
+    @property
+    def duration(self):
+        return max((self.early[node] for node in self.sinks), default=0)
+
+    def times(self):
+        '''
+        Returns {node : [early_event_time, late_event_time]}
+        '''
+        duration = self.duration
+        return {node : [self.early[node], duration - self.remaining[node]] for node in self.adj}
+
+    def total_float(self, activity):
+        '''
+        Returns the total float of an activity, None if it is not in the network
+        '''
+        i = self.arcs.get(activity)
+        if i is None:
+            return None
+        node1, node2, weight = self.edges[i][0], self.edges[i][1], self.edges[i][2]
+        return self.duration - self.remaining[node2] - self.early[node1] - weight
+
+    def floats(self):
+        '''
+        Returns {activity : [total_float, free_float]} for every activity (dummies excluded)
+        Free float is measured up to the earliest start of the following activities, reached through dummies if needed
+        '''
+        duration, early, remaining = self.duration, self.early, self.remaining
+        #Earliest start of the activities following each event, directly or through dummies
+        next_start = dict.fromkeys(self.order, duration)
+        for node in reversed(self.order):
+            for node2, weight, activity in self.adj[node]:
+                if activity != "":
+                    next_start[node] = early[node]
+                    break
+                next_start[node] = min(next_start[node], next_start[node2])
+        floats = dict()
+        for activity, i in self.arcs.items():
+            node1, node2, weight = self.edges[i][0], self.edges[i][1], self.edges[i][2]
+            floats[activity] = [duration - remaining[node2] - early[node1] - weight, next_start[node2] - early[node1] - weight]
+        return floats
+
+    def critical(self):
+        '''
+        Returns the activities with no total float, by early start
+        '''
+        critical = [activity for activity in self.arcs if math.isclose(self.total_float(activity), 0, abs_tol=1e-9)]
+        position, early = self.position, self.early
+        def start(activity):
+            edge = self.edges[self.arcs[activity]]
+            return (early[edge[0]], position[edge[0]], position[edge[1]])
+        return sorted(critical, key=start)
+
+    def update(self, edges):
+        '''
+        Brings the event times up to date after the weights of the given arcs changed in adj and rev
+        Only the events after the heads of the arcs (early times) and before their tails (remaining times)
+        are visited, in topological order, and the propagation stops at events whose time did not change
+        '''
+        position, order = self.position, self.order
+        self._propagate([position[edge[1]] for edge in edges], self.early, self.rev, self.adj, lambda key: order[key], 1)
+        self._propagate([-position[edge[0]] for edge in edges], self.remaining, self.adj, self.rev, lambda key: order[-key], -1)
+
+    def _propagate(self, heap, times, sources, targets, node_at, sign):
+        '''
+        Recomputes times[node] as the longest arc from its sources for the nodes popped from a heap
+        of signed topological positions, queueing the targets of every node whose time changed
+        Keys are popped in increasing order, so every node is recomputed once, after its sources
+        '''
+        position = self.position
+        heap = list(set(heap))
+        heapq.heapify(heap)
+        queued = set(heap)
+        while heap:
+            node = node_at(heapq.heappop(heap))
+            time = max((times[node2] + weight for node2, weight, activity in sources[node]), default=0)
+            if time == times[node]:
+                continue
+            times[node] = time
+            for node2, weight, activity in targets[node]:
+                key = sign * position[node2]
+                if key not in queued:
+                    queued.add(key)
+                    heapq.heappush(heap, key)
+        instrument.count("cpm.events_recomputed", len(queued))
+
+def _schedule_chunk(network_class, chunk, floats):
+    '''
+    Builds and schedules the networks of a chunk of (index, dependence table) pairs
+    '''
+    results = []
+    for index, dependence_table in chunk:
+        net = network_class(dependence_table)
+        results.append((index, net.total_project_duration(), net.calculate_early_late_event_times(),
+                        net.floats() if floats else None))
+    return results
+
+def schedule_many(network_class, dependence_tables, processes=None, chunk_size=16, floats=True):
+    """
+    Builds network_class(dependence_table) for every table of an iterable and schedules it
+    The tables are read lazily and sent in chunks of chunk_size to a pool of processes
+    (os.cpu_count() if processes is None, no pool if processes is 1), with at most two chunks
+    per process in flight, so the tables and results are never all held in memory
+    If all the tables fit in one chunk, they are scheduled in process without starting a pool
+    Yields (index, duration, event times, floats or None) as networks complete, not in order,
+    index being the position of the table in dependence_tables
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    chunks = _chunks(enumerate(dependence_tables), chunk_size)
+    if processes > 1:
+        #Reads ahead one chunk to know whether there is more than one
+        first, second = next(chunks, None), next(chunks, None)
+        if second is None:
+            processes = 1
+        chunks = chain([chunk for chunk in (first, second) if chunk is not None], chunks)
+    if processes <= 1:
+        for chunk in chunks:
+            yield from _schedule_chunk(network_class, chunk, floats)
+        return
+    pool = ProcessPoolExecutor(processes)
+    try:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_schedule_chunk, network_class, chunk, floats))
+            if len(pending) < 2 * processes:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+        for future in as_completed(pending):
+            yield from future.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
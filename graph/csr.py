@@ -0,0 +1,310 @@
+from array import array
+from itertools import repeat
+import numpy as np
+
+def typecode(values):
+    '''
+    Returns the item type of an array, or of a memoryview mapped from a saved graph
+    '''
+    return values.typecode if isinstance(values, array) else values.format
+
+def label_ids(labels):
+    '''
+    Returns the label -> id mapping of a label table
+    '''
+    return {label : i for i, label in enumerate(labels)}
+
+def owned_array(values):
+    '''
+    Returns an array as is, and a copy of a memoryview mapped from a saved graph (None stays None)
+    '''
+    if values is None or isinstance(values, array):
+        return values
+    owned = array(typecode(values))
+    owned.frombytes(values.cast("B"))
+    return owned
+
+def as_numpy(values):
+    '''
+    Returns a NumPy view of an array, or of a memoryview mapped from a saved graph, without copying it
+    '''
+    return np.frombuffer(values, dtype=typecode(values))
+
+def from_numpy(values, code):
+    '''
+    Returns a NumPy array as an array of the given item type
+    '''
+    return array(code, np.ascontiguousarray(values, dtype=code).tobytes())
+
+def _owned_state(state, names):
+    '''
+    Instance dict of a structure being copied or pickled, with arrays of its own instead of the
+    memoryviews mapped from a saved graph, which cannot be pickled
+    '''
+    state = dict(state)
+    for name in names:
+        state[name] = owned_array(state[name])
+    if not isinstance(state["labels"], list):
+        state["labels"] = list(state["labels"])
+        state["_ids"] = None
+    return state
+
+class EdgeArrays:
+    """
+    Compact edge storage used by the csr backend of Graph
+    Node labels are interned to int ids (in order of appearance) and every edge is
+    one entry in three typed arrays: source ids, target ids and weights
+    Behaves like a list of [node1, node2, weight] edges ([node1, node2] if unweighted),
+    the edge lists are only created when an edge is accessed
+    """
+    def __init__(self, nodes=(), weighted=False):
+        self.labels = [] #id -> label
+        self._ids = dict() #label -> id
+        self.src = array('q')
+        self.dst = array('q')
+        self.weighted = weighted
+        #weights are stored as ints until the first non integer weight is added
+        self.weights = array('q') if weighted else None
+        #Graph told about edits through add, __setitem__ and pop (see Graph._edited), None if there is none
+        self.owner = None
+        for node in nodes:
+            self.intern(node)
+
+    @classmethod
+    def from_edges(cls, nodes, edges, weighted=False):
+        store = cls(nodes, weighted)
+        for edge in edges:
+            store.append(edge)
+        return store
+
+    @classmethod
+    def from_arrays(cls, labels, src, dst, weights=None, ids=None):
+        """
+        Wraps existing arrays (or read only memoryviews, see graph/storage.py) without copying them
+        Read only arrays are copied on the first edit, the label -> id mapping is built when first needed
+        """
+        store = cls(weighted=weights is not None)
+        store.labels = labels
+        store._ids = ids
+        store.src = src
+        store.dst = dst
+        store.weights = weights
+        return store
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = label_ids(self.labels)
+        return self._ids
+
+    def _make_writable(self):
+        #Arrays mapped from a saved graph are read only, they are copied before the first edit
+        if not isinstance(self.labels, list):
+            self.labels = list(self.labels)
+            self._ids = label_ids(self.labels)
+        if not isinstance(self.src, array):
+            self.src = array('q', self.src)
+            self.dst = array('q', self.dst)
+            if self.weighted:
+                self.weights = array(typecode(self.weights), self.weights)
+
+    def intern(self, label):
+        """
+        Returns the id of a node label, assigning the next free id if the label is new
+        """
+        node_id = self.ids.get(label)
+        if node_id is None:
+            self._make_writable()
+            node_id = len(self.labels)
+            self.ids[label] = node_id
+            self.labels.append(label)
+        return node_id
+
+    def _store_weight(self, weight):
+        #Switch the weights to doubles the first time a weight does not fit an int
+        if self.weights.typecode == 'q' and not isinstance(weight, int):
+            self.weights = array('d', self.weights)
+        return self.weights
+
+    def _notify(self):
+        if self.owner is not None:
+            self.owner._edited()
+
+    def add(self, node1, node2, weight=None):
+        """
+        Appends an edge given by its endpoint labels, interning new labels
+        """
+        self._make_writable()
+        self.src.append(self.intern(node1))
+        self.dst.append(self.intern(node2))
+        if self.weighted:
+            self._store_weight(weight).append(weight)
+        self._notify()
+
+    def append(self, edge):
+        self.add(edge[0], edge[1], edge[2] if self.weighted else None)
+
+    def edge(self, i):
+        if self.weighted:
+            return [self.labels[self.src[i]], self.labels[self.dst[i]], self.weights[i]]
+        return [self.labels[self.src[i]], self.labels[self.dst[i]]]
+
+    def __len__(self):
+        return len(self.src)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.edge(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("edge index out of range")
+        return self.edge(i)
+
+    def __setitem__(self, i, edge):
+        self._make_writable()
+        self.src[i] = self.intern(edge[0])
+        self.dst[i] = self.intern(edge[1])
+        if self.weighted:
+            self._store_weight(edge[2])[i] = edge[2]
+        self._notify()
+
+    def __iter__(self):
+        labels = self.labels
+        if self.weighted:
+            for u, v, w in zip(self.src, self.dst, self.weights):
+                yield [labels[u], labels[v], w]
+        else:
+            for u, v in zip(self.src, self.dst):
+                yield [labels[u], labels[v]]
+
+    def pop(self, i=-1):
+        edge = self[i]
+        self._make_writable()
+        del self.src[i]
+        del self.dst[i]
+        if self.weighted:
+            del self.weights[i]
+        self._notify()
+        return edge
+
+    def extend(self, edges):
+        for edge in edges:
+            self.append(edge)
+
+    def __getstate__(self):
+        state = _owned_state(self.__dict__, ("src", "dst", "weights"))
+        #The graph of a copy attaches itself again
+        state["owner"] = None
+        return state
+
+    def __repr__(self):
+        return f"EdgeArrays({len(self.labels)} nodes, {len(self)} edges)"
+
+class CSRGraph:
+    """
+    Compressed sparse row adjacency of a graph, with nodes numbered 0..n-1
+    The neighbours of node u are indices[indptr[u]:indptr[u + 1]], with the matching
+    weights and the position of the originating edge in edge_ids
+    Undirected edges are stored once in each direction, both with the same edge id
+    """
+    def __init__(self, labels, indptr, indices, weights, edge_ids, directed, ids=None):
+        self.labels = labels
+        self._ids = ids #label -> id, built when first needed if not given
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights #None if the graph is unweighted
+        self.edge_ids = edge_ids
+        self.directed = directed
+
+    @classmethod
+    def from_edge_arrays(cls, store, directed):
+        """
+        Builds the CSR arrays from an EdgeArrays store with a stable sort of the edges by source, in NumPy
+        The neighbours of every node keep the order of the edges in the store
+        """
+        n = len(store.labels)
+        src, dst = as_numpy(store.src), as_numpy(store.dst)
+        edge_ids = np.arange(len(src))
+        weights = as_numpy(store.weights) if store.weighted else None
+        if not directed:
+            #Every edge is stored from its source, then from its target
+            tails = np.empty(2 * len(src), dtype=src.dtype)
+            tails[0::2], tails[1::2] = src, dst
+            heads = np.empty_like(tails)
+            heads[0::2], heads[1::2] = dst, src
+            src, dst = tails, heads
+            edge_ids = np.repeat(edge_ids, 2)
+            if weights is not None:
+                weights = np.repeat(weights, 2)
+        order = np.argsort(src, kind="stable")
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        if weights is not None:
+            weights = from_numpy(weights[order], typecode(store.weights))
+        return cls(store.labels, from_numpy(indptr, 'q'), from_numpy(dst[order], 'q'), weights,
+                   from_numpy(edge_ids[order], 'q'), directed, store._ids)
+
+    @classmethod
+    def from_edges(cls, nodes, edges, directed=False, weighted=False):
+        return cls.from_edge_arrays(EdgeArrays.from_edges(nodes, edges, weighted), directed)
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = label_ids(self.labels)
+        return self._ids
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getstate__(self):
+        return _owned_state(self.__dict__, ("indptr", "indices", "weights", "edge_ids"))
+
+    @property
+    def num_slots(self):
+        return len(self.indices)
+
+    def keys(self):
+        return range(len(self.labels))
+
+    def key(self, label):
+        return self.ids[label]
+
+    def label(self, key):
+        return self.labels[key]
+
+    def degree(self, u):
+        return self.indptr[u + 1] - self.indptr[u]
+
+    def transpose(self):
+        """
+        Returns the CSRGraph with every edge reversed, keeping the edge ids
+        An undirected graph is its own transpose
+        """
+        if not self.directed:
+            return self
+        n = len(self.labels)
+        indices = as_numpy(self.indices)
+        #Sources of the slots, in the order of the slots
+        sources = np.repeat(np.arange(n), np.diff(as_numpy(self.indptr)))
+        order = np.argsort(indices, kind="stable")
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices, minlength=n), out=indptr[1:])
+        weights = None
+        if self.weights is not None:
+            weights = from_numpy(as_numpy(self.weights)[order], typecode(self.weights))
+        return CSRGraph(self.labels, from_numpy(indptr, 'q'), from_numpy(sources[order], 'q'), weights,
+                        from_numpy(as_numpy(self.edge_ids)[order], 'q'), True, self._ids)
+
+    def neighbours(self, u):
+        """
+        Returns an iterable of (node id, weight) pairs, weight is 1 if graph is not weighted
+        """
+        start, end = self.indptr[u], self.indptr[u + 1]
+        if self.weights is None:
+            return zip(self.indices[start:end], repeat(1))
+        return zip(self.indices[start:end], self.weights[start:end])
+
+    def __repr__(self):
+        return f"CSRGraph({len(self)} nodes, {self.num_slots} slots, directed={self.directed})"
@@ -0,0 +1,96 @@
+from graph.components import connected_components
+from array import array
+
+def eulerian_endpoints(csr, start=None, rev=None, trail=False):
+    """
+    Finds where a Eulerian circuit or trail of a CSRGraph must start and end
+    rev -> the transpose of a directed csr, built if not given
+    start -> preferred start key; for a circuit any key with edges, for a trail one of its ends
+    trail -> if False, only circuits are accepted
+    Every node must be reached by the walk, so graphs with isolated nodes have none
+    Returns a tuple (start, end) of keys, equal for a circuit, or None if no Eulerian walk exists
+    """
+    n = len(csr)
+    if n == 0 or csr.num_slots == 0:
+        return None
+    if csr.directed:
+        if rev is None:
+            rev = csr.transpose()
+        #A trail leaves its start once more than it enters it, and enters its end once more
+        heads, tails = [], []
+        for u in range(n):
+            surplus = csr.degree(u) - rev.degree(u)
+            if surplus == 1:
+                heads.append(u)
+            elif surplus == -1:
+                tails.append(u)
+            elif surplus != 0:
+                return None
+        if len(heads) > 1 or len(heads) != len(tails):
+            return None
+        if heads:
+            if not trail or start is not None and start != heads[0]:
+                return None
+            ends = (heads[0], tails[0])
+    else:
+        #Odd nodes are the ends of a trail
+        odd = [u for u in range(n) if csr.degree(u) % 2 == 1]
+        if len(odd) not in (0, 2):
+            return None
+        heads = odd
+        if odd:
+            if not trail or start is not None and start not in odd:
+                return None
+            ends = (odd[0], odd[1]) if start in (None, odd[0]) else (odd[1], odd[0])
+    if not heads:
+        if start is None:
+            start = next(u for u in range(n) if csr.degree(u) > 0)
+        ends = (start, start)
+    #Degrees add up, so the walk exists iff every node is reached from the start, ignoring directions
+    count, component = connected_components(csr, rev)
+    if count != 1:
+        return None
+    return ends
+
+def hierholzer(csr, start):
+    """
+    Hierholzer's algorithm over the edge ids of a CSRGraph, in O(V + E)
+    Every node keeps a cursor to its next unvisited slot, so each slot is read once
+    Yields the keys of the walk as they are closed off, which is the walk in reverse order
+    Multiple edges and loops are separate edge ids, so they are each walked once
+    """
+    indptr, indices, edge_ids = csr.indptr, csr.indices, csr.edge_ids
+    cursor = array('q', indptr[:-1])
+    #Undirected edges have two slots sharing one edge id
+    used = bytearray(csr.num_slots)
+    stack = [start]
+    while stack:
+        u = stack[-1]
+        pos = cursor[u]
+        end = indptr[u + 1]
+        while pos < end and used[edge_ids[pos]]:
+            pos += 1
+        if pos < end:
+            used[edge_ids[pos]] = 1
+            cursor[u] = pos + 1
+            stack.append(indices[pos])
+        else:
+            cursor[u] = pos
+            stack.pop()
+            yield u
+
+def eulerian_walk(csr, start=None, trail=False, rev=None):
+    """
+    Returns a generator of the keys of a Eulerian circuit (or trail, if trail is True and no circuit exists)
+    in walking order, or None if the graph has neither
+    The walk is produced lazily: Hierholzer is run backwards from the end of the walk
+    (over the transposed edges of a directed graph, rev, built if not given), so the keys are yielded front to back
+    """
+    if csr.directed and rev is None:
+        rev = csr.transpose()
+    ends = eulerian_endpoints(csr, start, rev, trail)
+    if ends is None:
+        return None
+    if csr.directed:
+        return hierholzer(rev, ends[1])
+    return hierholzer(csr, ends[1])
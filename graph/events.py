@@ -0,0 +1,248 @@
+from collections import defaultdict
+from graph import instrument
+import heapq
+
+class DummyIndex:
+    """
+    Indexes of an event dictionary {node : [{precursor set}, {follower set}]} used to add dummies
+    with K. Neumann's heuristic without rescanning every pair of nodes after each dummy
+    pre_nodes / fol_nodes -> activity to the nodes having it in their precursor / follower set
+    overlap -> (node1, node2) with node1 < node2 to the size of the intersection of their precursor sets
+    cross -> (node1, node2) to the size of the intersection of the precursors of node1 and the followers of node2
+    The candidate pairs of each condition are kept in a heap ordered like the original pairwise scan,
+    entries are checked against the counts when popped, so stale entries are simply dropped
+    """
+    def __init__(self, node_dict):
+        self.node_dict = node_dict
+        self.pre_nodes = defaultdict(set)
+        self.fol_nodes = defaultdict(set)
+        self.overlap = defaultdict(int)
+        self.cross = defaultdict(int)
+        #(-size of precursor set of node1, node1, node2) for node1 precursors a subset of node2's
+        self.subsets = []
+        #(-size of intersection, node1, node2) for node1 < node2 with intersecting precursor sets
+        self.shared = []
+        #(-node1, -node2) for precursors of node1 sharing more than one activity with followers of node2
+        self.parallel = []
+        self.next_node = max(node_dict) + 1 if node_dict else 0
+        self.dummy_counter = 0
+        for node, (precursors, followers) in node_dict.items():
+            for activity in precursors:
+                self.pre_nodes[activity].add(node)
+            for activity in followers:
+                self.fol_nodes[activity].add(node)
+        for activity, nodes in self.pre_nodes.items():
+            nodes = sorted(nodes)
+            for i, node1 in enumerate(nodes):
+                for node2 in nodes[i + 1:]:
+                    self.overlap[(node1, node2)] += 1
+                for node2 in self.fol_nodes.get(activity, ()):
+                    self.cross[(node1, node2)] += 1
+        for pair, count in self.cross.items():
+            if count > 1:
+                heapq.heappush(self.parallel, (-pair[0], -pair[1]))
+        for (node1, node2), count in self.overlap.items():
+            heapq.heappush(self.shared, (-count, node1, node2))
+        for node in node_dict:
+            self._push_subsets(node)
+
+    def _shared_count(self, node1, node2):
+        return self.overlap.get((node1, node2) if node1 < node2 else (node2, node1), 0)
+
+    def _push_pair(self, node1, node2, count):
+        '''
+        Pushes the condition 1 and 2 candidates of a pair whose shared precursor count changed
+        '''
+        if count == 0:
+            return
+        heapq.heappush(self.shared, (-count, min(node1, node2), max(node1, node2)))
+        if count == len(self.node_dict[node1][0]):
+            heapq.heappush(self.subsets, (-count, node1, node2))
+        if count == len(self.node_dict[node2][0]):
+            heapq.heappush(self.subsets, (-count, node2, node1))
+
+    def _push_subsets(self, node):
+        '''
+        Pushes the condition 1 candidates of a node as the subset, only the nodes sharing
+        its rarest precursor can contain all of them
+        A precursor set holding a dummy is never a subset, as each dummy ends in one node only
+        '''
+        precursors = self.node_dict[node][0]
+        if not precursors:
+            return
+        size = len(precursors)
+        rarest = min(precursors, key=lambda activity: len(self.pre_nodes[activity]))
+        for other in self.pre_nodes[rarest]:
+            if other != node and self._shared_count(node, other) == size:
+                heapq.heappush(self.subsets, (-size, node, other))
+
+    def _remove_precursor(self, node, activity):
+        self.node_dict[node][0].discard(activity)
+        self.pre_nodes[activity].discard(node)
+        for other in self.pre_nodes[activity]:
+            pair = (node, other) if node < other else (other, node)
+            self.overlap[pair] -= 1
+            self._push_pair(node, other, self.overlap[pair])
+        for other in self.fol_nodes.get(activity, ()):
+            self.cross[(node, other)] -= 1
+
+    def _add_precursor(self, node, activity):
+        self.node_dict[node][0].add(activity)
+        for other in self.pre_nodes[activity]:
+            pair = (node, other) if node < other else (other, node)
+            self.overlap[pair] += 1
+            self._push_pair(node, other, self.overlap[pair])
+        for other in self.fol_nodes.get(activity, ()):
+            self._count_cross(node, other)
+        self.pre_nodes[activity].add(node)
+
+    def _add_follower(self, node, activity):
+        self.node_dict[node][1].add(activity)
+        self.fol_nodes[activity].add(node)
+        for other in self.pre_nodes.get(activity, ()):
+            self._count_cross(other, node)
+
+    def _count_cross(self, node1, node2):
+        self.cross[(node1, node2)] += 1
+        if self.cross[(node1, node2)] > 1:
+            heapq.heappush(self.parallel, (-node1, -node2))
+
+    def _new_node(self):
+        node = self.next_node
+        self.next_node += 1
+        self.node_dict[node] = [set(), set()]
+        return node
+
+    def _new_dummy(self):
+        dummy = str(self.dummy_counter)
+        self.dummy_counter += 1
+        return dummy
+
+    def subset_pair(self):
+        '''
+        Condition 1: the pair with the largest non empty precursor set contained in another one
+        '''
+        while self.subsets:
+            size, node1, node2 = self.subsets[0]
+            size = -size
+            if size and len(self.node_dict[node1][0]) == size and self._shared_count(node1, node2) == size:
+                return node1, node2
+            heapq.heappop(self.subsets)
+        return None
+
+    def shared_pair(self):
+        '''
+        Condition 2: the pair with the largest intersection of precursor sets
+        Only asked once no condition 1 pair is left, so the precursor sets are all different
+        '''
+        while self.shared:
+            count, node1, node2 = self.shared[0]
+            if count and self.overlap.get((node1, node2), 0) == -count:
+                return node1, node2
+            heapq.heappop(self.shared)
+        return None
+
+    def parallel_pair(self):
+        '''
+        Condition 3: the last pair (in node order) where more than one activity of node2 ends in node1
+        '''
+        while self.parallel:
+            node1, node2 = self.parallel[0]
+            node1, node2 = -node1, -node2
+            if node1 != node2 and self.cross.get((node1, node2), 0) > 1:
+                return node1, node2
+            heapq.heappop(self.parallel)
+        return None
+
+    def split_subset(self, node1, node2):
+        '''
+        Replaces the precursors node2 shares with node1 by one dummy leaving node1
+        '''
+        dummy = self._new_dummy()
+        for activity in list(self.node_dict[node1][0]):
+            self._remove_precursor(node2, activity)
+        self._add_precursor(node2, dummy)
+        self._add_follower(node1, dummy)
+
+    def split_shared(self, node1, node2):
+        '''
+        Moves the shared precursors of node1 and node2 to a new node, linked to both by a dummy
+        '''
+        shared = self.node_dict[node1][0] & self.node_dict[node2][0]
+        dummy1, dummy2 = self._new_dummy(), self._new_dummy()
+        new_node = self._new_node()
+        for activity in shared:
+            self._remove_precursor(node1, activity)
+            self._remove_precursor(node2, activity)
+            self._add_precursor(new_node, activity)
+        self._add_precursor(node1, dummy1)
+        self._add_precursor(node2, dummy2)
+        self._add_follower(new_node, dummy1)
+        self._add_follower(new_node, dummy2)
+        self._push_subsets(new_node)
+
+    def split_parallel(self, node1, node2):
+        '''
+        All but one of the activities from node2 to node1 end in a new node instead,
+        linked to node1 by a dummy
+        '''
+        parallel = sorted(self.node_dict[node1][0] & self.node_dict[node2][1], key=str)
+        for activity in parallel[:-1]:
+            dummy = self._new_dummy()
+            new_node = self._new_node()
+            self._remove_precursor(node1, activity)
+            self._add_precursor(node1, dummy)
+            self._add_precursor(new_node, activity)
+            self._add_follower(new_node, dummy)
+            self._push_subsets(new_node)
+
+def add_dummies(node_dict):
+    """
+    Adds dummies to an event dictionary {node : [{precursor set}, {follower set}]} in place
+    Using K. Neumann algorithm: keeps splitting nodes while one of 3 conditions holds
+    Neumann, K. (1999). A Heuristic Procedure for Constructing an Activity-on-Arc Project Network. In: Gaul, W., Schader, M. (eds) Mathematische Methoden der Wirtschaftswissenschaften. Physica, Heidelberg. https://doi.org/10.1007/978-3-662-12433-8_30
+    1 -> the precursor set of a node is a subset of another (largest such set first)
+    2 -> the precursor sets of two nodes intersect (largest intersection first)
+    3 -> more than one activity goes from one node to another
+    Dummies are named "0", "1", ... and new nodes are numbered after the existing ones
+    """
+    index = DummyIndex(node_dict)
+    first_node = index.next_node
+    while True:
+        pair = index.subset_pair()
+        if pair is not None:
+            index.split_subset(*pair)
+            continue
+        pair = index.shared_pair()
+        if pair is not None:
+            index.split_shared(*pair)
+            continue
+        pair = index.parallel_pair()
+        if pair is not None:
+            index.split_parallel(*pair)
+            continue
+        instrument.count("dummies.added", index.dummy_counter)
+        instrument.count("dummies.events_added", index.next_node - first_node)
+        return node_dict
+
+def activity_arcs(node_dict, dependence_table):
+    """
+    Returns the arcs [tail event, head event, duration, activity] of an event dictionary, in one pass
+    Every activity is a follower of its tail event and a precursor of its head event,
+    dummies (activities missing from dependence_table) get a duration of 0 and the name ""
+    """
+    tails = dict()
+    for node, (precursors, followers) in node_dict.items():
+        for activity in followers:
+            tails.setdefault(activity, node)
+    arcs = []
+    for head, (precursors, followers) in node_dict.items():
+        for activity in precursors:
+            tail = tails.get(activity)
+            if tail is None or tail == head:
+                continue
+            if activity in dependence_table:
+                arcs.append([tail, head, dependence_table[activity][1], activity])
+            else:
+                arcs.append([tail, head, 0, ""])
+    return arcs
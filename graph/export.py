@@ -0,0 +1,168 @@
+from collections import Counter
+from itertools import islice
+from graph.components import connected_components
+import heapq, json
+
+#Number of nodes or edges encoded at a time, only one chunk of dicts is held in memory
+CHUNK_ITEMS = 1 << 12
+
+def json_label(label):
+    '''
+    Node labels are written as they are if JSON can hold them, as strings otherwise
+    '''
+    if isinstance(label, (str, int, float)):
+        return label
+    return str(label)
+
+def _write_items(file, items):
+    '''
+    Writes the items of a JSON list, encoding CHUNK_ITEMS of them at a time
+    '''
+    items = iter(items)
+    chunk = list(islice(items, CHUNK_ITEMS))
+    separator = "\n"
+    while chunk:
+        #Encodes the chunk as a list and drops the brackets
+        file.write(separator + json.dumps(chunk)[1:-1])
+        separator = ",\n"
+        chunk = list(islice(items, CHUNK_ITEMS))
+
+def write_json(file, directed, weighted, nodes, edges):
+    """
+    Writes a graph as JSON to an open text file: {"directed", "weighted", "nodes" : [...], "edges" : [...]}
+    nodes and edges are iterables of dicts, written a chunk at a time as they are produced
+    """
+    file.write(f'{{"directed": {json.dumps(directed)}, "weighted": {json.dumps(weighted)}, "nodes": [')
+    _write_items(file, nodes)
+    file.write('\n], "edges": [')
+    _write_items(file, edges)
+    file.write("\n]}\n")
+
+def _pair(edge, directed):
+    if directed:
+        return (edge[0], edge[1])
+    return frozenset((edge[0], edge[1])) if edge[0] != edge[1] else (edge[0], edge[0])
+
+class GraphExport:
+    """
+    Streams the nodes and edges of a graph as JSON dicts, with level of detail options
+    The edges are read with one pass over graph.edges per stage and never copied,
+    only per node tables (degrees, groups) are kept in memory
+    max_nodes -> only the max_nodes nodes with the highest score are kept, with the edges between them
+    sample -> score used with max_nodes: "degree", or "weight" (sum of the weights of the incident edges)
+    collapse -> "components" to draw every connected component as one super node, or a dict / function
+    node -> group (e.g. communities) to draw every group as one super node, with one edge per pair
+    of connected groups carrying the number of edges and their total weight
+    highlight -> edges to mark with "highlight": true, e.g. the duplicated edges of chinese_postman,
+    parallel edges are marked as many times as they are listed. Their ends are always kept by max_nodes
+    highlight_only -> only the highlighted edges and their ends are exported
+    """
+    def __init__(self, graph, max_nodes=None, sample="degree", collapse=None, highlight=None, highlight_only=False):
+        if sample not in ("degree", "weight"):
+            raise ValueError(f"Unknown sampling {sample}, expected 'degree' or 'weight'")
+        if sample == "weight" and not graph.weighted:
+            raise ValueError("Weight based sampling needs a weighted graph")
+        if collapse is not None and (max_nodes is not None or highlight is not None):
+            raise ValueError("collapse cannot be combined with max_nodes or highlight")
+        if highlight_only and highlight is None:
+            raise ValueError("highlight_only needs edges to highlight")
+        self.graph = graph
+        self.max_nodes = max_nodes
+        self.sample = sample
+        self.collapse = collapse
+        self.highlight = None
+        if highlight is not None:
+            self.highlight = Counter(_pair(edge, graph.directed) for edge in highlight)
+        self.highlight_only = highlight_only
+
+    def _kept_nodes(self):
+        '''
+        Returns the set of nodes to export, None for all of them
+        '''
+        graph = self.graph
+        if self.highlight_only:
+            return {node for pair in self.highlight for node in pair}
+        if self.max_nodes is None or self.max_nodes >= len(graph.nodes):
+            return None
+        score = dict.fromkeys(graph.nodes, 0)
+        for edge in graph.edges:
+            value = edge[2] if self.sample == "weight" else 1
+            score[edge[0]] += value
+            score[edge[1]] += value
+        kept = set()
+        if self.highlight is not None:
+            kept = {node for pair in self.highlight for node in pair}
+        remaining = max(self.max_nodes - len(kept), 0)
+        kept.update(heapq.nlargest(remaining, (node for node in graph.nodes if node not in kept), key=score.__getitem__))
+        return kept
+
+    def _edge(self, edge):
+        graph = self.graph
+        item = {"source" : json_label(edge[0]), "target" : json_label(edge[1])}
+        if graph.weighted:
+            item["weight"] = edge[2]
+            item["label"] = graph._edge_label(edge)
+        return item
+
+    def _edges(self, kept):
+        highlight = None if self.highlight is None else Counter(self.highlight)
+        for edge in self.graph.edges:
+            if kept is not None and (edge[0] not in kept or edge[1] not in kept):
+                continue
+            marked = False
+            if highlight is not None:
+                pair = _pair(edge, self.graph.directed)
+                if highlight[pair] > 0:
+                    highlight[pair] -= 1
+                    marked = True
+            if self.highlight_only and not marked:
+                continue
+            item = self._edge(edge)
+            if marked:
+                item["highlight"] = True
+            yield item
+
+    def _groups(self):
+        '''
+        Returns {node : group} for the collapse option
+        '''
+        graph = self.graph
+        if self.collapse == "components":
+            csr = graph.csr()
+            count, component = connected_components(csr)
+            return {csr.label(key) : c for key, c in enumerate(component)}
+        if isinstance(self.collapse, dict):
+            return self.collapse
+        if callable(self.collapse):
+            return {node : self.collapse(node) for node in graph.nodes}
+        raise ValueError(f"Unknown collapse {self.collapse!r}, expected 'components', a dict or a function")
+
+    def _collapsed(self):
+        '''
+        Returns the super nodes and super edges of the collapse option
+        '''
+        graph = self.graph
+        groups = self._groups()
+        sizes = Counter(groups[node] for node in graph.nodes)
+        links = dict()
+        for edge in graph.edges:
+            group1, group2 = groups[edge[0]], groups[edge[1]]
+            if group1 == group2:
+                continue
+            link = links.setdefault((group1, group2) if graph.directed else frozenset((group1, group2)), [0, 0])
+            link[0] += 1
+            link[1] += edge[2] if graph.weighted else 1
+        nodes = ({"id" : json_label(group), "size" : size} for group, size in sizes.items())
+        edges = ({"source" : json_label(group1), "target" : json_label(group2), "count" : count, "weight" : weight}
+                 for (group1, group2), (count, weight) in ((tuple(pair), link) for pair, link in links.items()))
+        return nodes, edges
+
+    def write(self, file):
+        graph = self.graph
+        if self.collapse is not None:
+            nodes, edges = self._collapsed()
+            write_json(file, graph.directed, graph.weighted, nodes, edges)
+            return
+        kept = self._kept_nodes()
+        nodes = ({"id" : json_label(node)} for node in graph.nodes if kept is None or node in kept)
+        write_json(file, graph.directed, graph.weighted, nodes, self._edges(kept))
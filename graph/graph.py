@@ -1,167 +1,741 @@
 from pyvis.network import Network
-from itertools import permutations
-import copy, math
+from graph.csr import EdgeArrays, CSRGraph, typecode, label_ids
+from graph.matrix import adjacency_coo, as_coo
+from graph.shortest_paths import dijkstra, bidirectional_dijkstra, astar, trace_path, ShortestPathTree
+from graph.matching import min_weight_perfect_matching
+from graph.euler import eulerian_walk
+from graph.components import connected_components, strongly_connected_components, component_lists
+from graph.mst import kruskal_forest, prim_forest, boruvka_forest
+from graph.loaders import read_edgelist, read_dependence_table, CHUNK_ROWS
+from graph.storage import save_graph, load_graph, save_landmarks, load_landmarks
+from graph.landmarks import LandmarkIndex
+from graph.results import ResultCache
+from graph.export import GraphExport
+from graph.events import add_dummies, activity_arcs
+from graph.cpm import Schedule, schedule_many
+from graph.pert import simulate
+from graph.instrument import timed, timed_iter, timer
+from graph.all_pairs import distance_matrix, floyd_warshall, johnson_rows, AllPairsShortestPaths, DynamicAllPairs
+from graph.tracked import TrackedList, EdgeList
+from contextlib import contextmanager
+from bisect import insort
+import numpy as np
+from collections.abc import Mapping
+import math, os, webbrowser
 
 class UnweightedGraphError(Exception):
     def __init__(self, message="Attempting to find MST of unweighted graph"):
         self.message = message
         super().__init__(self.message)
 
+class AdjacencyIndex(dict):
+    """
+    Adjacency dict of a graph {node : [(node1, weight), (node2, weight),,,]}
+    Has the same traversal interface as CSRGraph, with the node labels as keys
+    """
+    def neighbours(self, node):
+        return self[node]
+
+    def key(self, label):
+        return label
+
+    def label(self, key):
+        return key
+
 class Graph:
-    def __init__(self, nodes : list, edges : list, directed=False, weighted=False):
+    def __init__(self, nodes : list, edges : list, directed=False, weighted=False, backend="list"):
+        #Cached indexes (adjacency dict, reverse adjacency, matrix, csr), built lazily
+        self._cache = dict()
+        self._version = 0
+        #True while the mutation methods edit self.nodes and self.edges, see _edited
+        self._in_edit = False
+        #Memoised query results (see graph/results.py), only valid for the version they were computed at
+        self.result_cache = ResultCache()
+        self.directed = directed
+        self.weighted = weighted
+        #"list" keeps the edges as given, "csr" interns the node labels and stores the edges
+        #in compact arrays (see graph/csr.py), creating edge lists only when they are accessed
+        self.backend = backend
+        if backend == "csr":
+            if not isinstance(edges, EdgeArrays):
+                edges = EdgeArrays.from_edges(nodes, edges, weighted)
+            nodes = edges.labels
+        elif backend != "list":
+            raise ValueError(f"Unknown graph backend {backend}")
         self.nodes = nodes #list of nodes - [node, node, node]
         self.edges = edges #list of edges - [[node, node, weight], [node, node, weight]] if weighted
         #no weights if not weighted
-        self.directed = directed
-        self.weighted = weighted
+
+    @classmethod
+    def from_edgelist_file(cls, path, directed=False, weighted=False, delimiter=None, comment="#", header=False,
+                           node_type=str, chunk_size=CHUNK_ROWS):
+        """
+        Loads a graph from an edge list file with one edge per row: node1 node2 (weight)
+        The file is read in chunks of chunk_size rows straight into the arrays of a csr backend graph
+        delimiter -> None guesses from the extension: "," for .csv, tab for .tsv, whitespace otherwise
+        comment -> lines starting with it are skipped
+        header -> True if the first row holds column names
+        node_type -> applied to the node labels, e.g. int for numbered nodes
+        Nodes are numbered in order of appearance
+        """
+        store = read_edgelist(path, weighted, delimiter, comment, header, node_type, chunk_size)
+        return Graph(None, store, directed=directed, weighted=weighted, backend="csr")
+
+    def save(self, path):
+        """
+        Saves the graph to a binary file: a versioned header, the node labels, the edge arrays
+        and the CSR arrays (offsets, targets, weights, edge ids), with the directed and weighted flags
+        Node labels must be all ints or all strings
+        The landmark index of the graph (see build_landmarks) is saved next to it, in path + ".landmarks"
+        """
+        if type(self) is not Graph:
+            raise TypeError(f"Only Graph objects can be saved, not {type(self).__name__}")
+        if self.backend == "csr":
+            store, csr = self.edges, self.csr()
+        else:
+            store = self._edge_arrays()
+            csr = CSRGraph.from_edge_arrays(store, self.directed)
+        save_graph(path, store, csr)
+        index = self._landmark_index()
+        if index is not None:
+            save_landmarks(path + ".landmarks", index, len(store))
+        elif os.path.exists(path + ".landmarks"):
+            #A landmark file left from an earlier save would not match the graph
+            os.remove(path + ".landmarks")
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Loads a graph saved with save as a csr backend graph, with its CSR arrays ready to use
+        If mmap is True, the arrays are memory mapped instead of read: loading takes the same time
+        for any graph size, and processes loading the same file share one copy in the page cache.
+        They are copied on the first edit of the graph
+        A landmark index saved next to the graph is loaded (and memory mapped) with it
+        """
+        store, csr, directed, weighted = load_graph(path, mmap)
+        g = Graph(None, store, directed=directed, weighted=weighted, backend="csr")
+        g._cache["csr"] = csr
+        if os.path.exists(path + ".landmarks"):
+            landmarks, forward, backward, alt_directed, n, m = load_landmarks(path + ".landmarks", mmap)
+            if n != len(store.labels) or m != len(store) or alt_directed != directed:
+                raise ValueError(f"{path}.landmarks was not built for {path}, rebuild it with build_landmarks")
+            g._cache["alt"] = LandmarkIndex(landmarks, forward, backward, store.labels)
+        return g
+
+    @property
+    def nodes(self):
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes):
+        if self.backend == "list":
+            #Reports direct edits to _edited, see graph/tracked.py
+            nodes = TrackedList(nodes, self)
+        self._nodes = nodes
+        self.invalidate()
+
+    @property
+    def edges(self):
+        return self._edges
+
+    @edges.setter
+    def edges(self, edges):
+        if self.backend == "list":
+            edges = EdgeList(edges, self)
+        else:
+            edges.owner = self
+        self._edges = edges
+        self.invalidate()
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        #Copies and pickles hold plain node and edge lists, which are tracked again
+        if self.backend == "list":
+            self._nodes = TrackedList(self._nodes, self)
+            self._edges = EdgeList(self._edges, self)
+        else:
+            self._edges.owner = self
+
+    @property
+    def version(self):
+        """
+        Counter bumped on every mutation of the graph
+        Cached indexes and results are only valid for the version they were built at
+        """
+        return self._version
+
+    def invalidate(self):
+        """
+        Drops every cached index and result and bumps the version
+        Called by self.nodes and self.edges when they are edited directly (g.edges.append(edge),
+        g.edges[i][2] = weight), the mutation methods (add_node, add_edge, remove_edge, set_weight)
+        keep the indexes up to date instead. The lists given to the constructor are copied, so editing them
+        afterwards does not change the graph
+        """
+        self._version += 1
+        self._cache.clear()
+
+    def _edited(self):
+        '''
+        Called by the tracked node and edge lists on every edit, which drops the caches
+        unless the edit is made by a mutation method (see _edit)
+        '''
+        if not self._in_edit:
+            self.invalidate()
+
+    @contextmanager
+    def _edit(self):
+        '''
+        Edits of self.nodes and self.edges made in this block come from a mutation method,
+        which updates the cached indexes itself
+        '''
+        self._in_edit = True
+        try:
+            yield
+        finally:
+            self._in_edit = False
+
+    def _mutated(self):
+        '''
+        Bumps the version after an in place mutation
+        Drops the cached indexes that cannot be updated in place
+        '''
+        self._version += 1
+        self._cache.pop("csr", None)
+        self._cache.pop("csr_rev", None)
+        if self.backend == "csr":
+            #The label table is replaced when a memory mapped graph is first edited
+            self._nodes = self.edges.labels
+
+    def _forward_entry(self, edge):
+        '''
+        Entry stored in the adjacency index of edge[0] for the given edge
+        '''
+        return (edge[1], edge[2] if self.weighted else 1)
+
+    def _backward_entry(self, edge):
+        '''
+        Entry stored in the adjacency index of edge[1] for the given edge
+        '''
+        return (edge[0], edge[2] if self.weighted else 1)
+
+    def _public_entry(self, entry):
+        '''
+        Converts an index entry into the format returned by adjacency_dict
+        '''
+        return entry if self.weighted else entry[0]
+
+    def _adjacency(self):
+        '''
+        Returns the cached adjacency index, building it if needed
+        Format: {node : [(node1, weight), (node2, weight),,,]}, weight is 1 if graph is not weighted
+        The index is shared, algorithms must not modify it
+        '''
+        adj = self._cache.get("adj")
+        if adj is None:
+            with timer("index.adj"):
+                adj = AdjacencyIndex()
+                for node in self.nodes:
+                    adj[node] = []
+                for edge in self.edges:
+                    adj[edge[0]].append(self._forward_entry(edge))
+                    if not self.directed:
+                        adj[edge[1]].append(self._backward_entry(edge))
+            self._cache["adj"] = adj
+        return adj
+
+    def _reverse_adjacency(self):
+        '''
+        Returns the cached reverse adjacency index: each node maps to the nodes of its indegree
+        Same as the adjacency index if the graph is undirected
+        '''
+        if not self.directed:
+            return self._adjacency()
+        rev = self._cache.get("rev")
+        if rev is None:
+            with timer("index.rev"):
+                rev = AdjacencyIndex()
+                for node in self.nodes:
+                    rev[node] = []
+                for edge in self.edges:
+                    rev[edge[1]].append(self._backward_entry(edge))
+            self._cache["rev"] = rev
+        return rev
+
+    def csr(self):
+        """
+        Returns the cached CSRGraph of the graph, building it if needed
+        Node ids follow the order of self.nodes
+        """
+        csr = self._cache.get("csr")
+        if csr is None:
+            with timer("index.csr"):
+                if self.backend == "csr":
+                    csr = CSRGraph.from_edge_arrays(self.edges, self.directed)
+                else:
+                    csr = CSRGraph.from_edges(self.nodes, self.edges, self.directed, self.weighted)
+            self._cache["csr"] = csr
+        return csr
+
+    def _search_graph(self):
+        '''
+        Returns the structure the traversal algorithms run on: the CSR arrays for the csr
+        backend, the cached adjacency index otherwise
+        Both provide keys(), neighbours(key) -> (key, weight) pairs, key(label) and label(key)
+        '''
+        if self.backend == "csr":
+            return self.csr()
+        return self._adjacency()
+
+    def _reverse_search_graph(self):
+        '''
+        Returns the search graph with every edge reversed: the cached transpose of the CSR arrays
+        for the csr backend, the cached reverse adjacency index otherwise
+        Same as the search graph if the graph is undirected
+        '''
+        if not self.directed:
+            return self._search_graph()
+        if self.backend != "csr":
+            return self._reverse_adjacency()
+        return self._csr_transpose()
+
+    def _csr_transpose(self):
+        '''
+        Returns the cached transpose of the CSR arrays, the CSR arrays themselves if the graph is undirected
+        '''
+        csr = self.csr()
+        if not self.directed:
+            return csr
+        csr_rev = self._cache.get("csr_rev")
+        if csr_rev is None:
+            with timer("index.csr_rev"):
+                csr_rev = csr.transpose()
+            self._cache["csr_rev"] = csr_rev
+        return csr_rev
+
+    def _has_node(self, node):
+        if self.backend == "csr":
+            return node in self.edges.ids
+        return node in self._adjacency()
+
+    def _matrix(self):
+        '''
+        Returns the cached adjacency matrix, building it if needed
+        The matrix is shared, algorithms must not modify it
+        '''
+        adj_mat = self._cache.get("mat")
+        if adj_mat is None:
+            with timer("index.mat"):
+                adj_mat = [[0 for node in self.nodes] for node in self.nodes]
+                for edge in self.edges:
+                    self._add_to_matrix(adj_mat, edge, 1)
+            self._cache["mat"] = adj_mat
+        return adj_mat
+
+    def _add_to_matrix(self, adj_mat, edge, sign):
+        node1, node2 = edge[0], edge[1]
+        weight = edge[2] if self.weighted else 1
+        adj_mat[node1][node2] += sign * weight
+        if not self.directed:
+            adj_mat[node2][node1] += sign * weight
 
     def adjacency_dict(self):
         """
         Returns the adjacency list of the graph
+        The returned dict is a copy of the cached index, so it can be freely modified
         """
-        adj_dict = dict()
-        for node in self.nodes:
-            adj_dict[node] = []
-        for edge in self.edges:
-            node1, node2 = edge[0], edge[1]
-            #if graph is weighted, it is in this format:
-            #{node : [(node1, weight), (node2, weight),,,]}
-            if self.weighted:
-                weight = edge[2]
-                adj_dict[node1].append((node2, weight))
-                if not self.directed:
-                    adj_dict[node2].append((node1, weight))
-            else:
-                adj_dict[node1].append(node2)
-                if not self.directed:
-                    adj_dict[node2].append(node1)
-        return adj_dict
+        #if graph is weighted, it is in this format:
+        #{node : [(node1, weight), (node2, weight),,,]}
+        #otherwise {node : [node1, node2,,,]}
+        adj = self._adjacency()
+        if self.weighted:
+            return {node : list(adj[node]) for node in adj}
+        return {node : [self._public_entry(entry) for entry in adj[node]] for node in adj}
 
-    def adjacency_matrix(self):
+    def adjacency_matrix(self, format="list", reduce="sum", dtype=None):
         """
         Returns the adjacency matrix of the graph.
-        Assumes that graph.nodes is a list of nodes from 0 to n.
+        format -> "list": 2d list indexed by node, assumes that graph.nodes is a list of nodes from 0 to n
+                  "dense": NumPy array, "coo" / "csr": sparse COOMatrix / CSRMatrix (see graph/matrix.py)
+                  holding only the cells of the edges, in O(E) memory
+        The "dense", "coo" and "csr" formats return a tuple (matrix, index), index being {node : position}
+        of the rows and columns, which follow the order of self.nodes, so any node labels can be used
+        reduce -> how parallel edges are merged: "sum" of their weights, "min" weight or "count" of edges
+        (the list format always sums)
+        Unweighted edges weigh 1, undirected edges fill both of their cells (loops their diagonal cell
+        once, twice in the list format)
         """
-        adj_mat = [[0 for node in self.nodes] for node in self.nodes]
-        for edge in self.edges:
-            node1, node2 = edge[0], edge[1]
-            if self.weighted:
-                weight = edge[2]
-                adj_mat[node1][node2] += weight
-                if not self.directed:
-                    adj_mat[node2][node1] += weight
+        if format == "list":
+            if reduce != "sum":
+                raise ValueError("The list format sums parallel edges, use the dense or sparse formats to reduce them otherwise")
+            return [list(row) for row in self._matrix()]
+        if format not in ("dense", "coo", "csr"):
+            raise ValueError(f"Unknown matrix format {format}, expected 'list', 'dense', 'coo' or 'csr'")
+        with timer("index.sparse_matrix"):
+            coo = adjacency_coo(self._edge_arrays(), self.directed, reduce, dtype)
+        index = label_ids(self.nodes)
+        if format == "dense":
+            return coo.toarray(), index
+        if format == "csr":
+            return coo.tocsr(), index
+        return coo, index
+
+    @classmethod
+    def from_adjacency_matrix(cls, matrix, nodes=None, directed=False, weighted=True):
+        """
+        Builds a graph from an adjacency matrix, e.g. to run chinese_postman or the all pairs algorithms on it
+        matrix -> dense (2d list or NumPy array, 0 meaning no edge) or sparse (COOMatrix, CSRMatrix or scipy.sparse,
+        where every stored cell is an edge, even of weight 0)
+        nodes -> labels of the rows and columns, as a list or as the {node : position} index returned by
+        adjacency_matrix, 0 to n - 1 if None
+        If the graph is undirected, only the cells on and above the diagonal are read
+        If it is unweighted, the values are ignored and every cell is one edge
+        """
+        rows, cols, data, n = as_coo(matrix)
+        if nodes is None:
+            labels = list(range(n))
+        elif isinstance(nodes, Mapping):
+            labels = [None] * n
+            for node, i in nodes.items():
+                labels[i] = node
+        else:
+            labels = list(nodes)
+        if len(labels) != n:
+            raise ValueError(f"{len(labels)} node labels for a matrix of {n} rows")
+        if not directed:
+            upper = rows <= cols
+            rows, cols, data = rows[upper], cols[upper], data[upper]
+        if weighted:
+            edges = [[labels[i], labels[j], w] for i, j, w in zip(rows.tolist(), cols.tolist(), data.tolist())]
+        else:
+            edges = [[labels[i], labels[j]] for i, j in zip(rows.tolist(), cols.tolist())]
+        return Graph(labels, edges, directed=directed, weighted=weighted)
+
+    def add_node(self, node):
+        """
+        Adds a node to the graph, updating the cached indexes in place
+        """
+        if self.backend == "csr":
+            self.edges.intern(node)
+        else:
+            with self._edit():
+                self.nodes.append(node)
+        self._mutated()
+        for key in ("adj", "rev"):
+            if key in self._cache:
+                self._cache[key][node] = []
+        if "alt" in self._cache:
+            self._cache["alt"].add_node(node)
+        #The matrix is indexed by node number, so it is rebuilt on demand instead
+        self._cache.pop("mat", None)
+
+    def add_edge(self, node1, node2, weight=None):
+        """
+        Adds an edge (an arc if the graph is directed) between node1 and node2
+        weight is required if the graph is weighted and ignored otherwise
+        Endpoints that are not in the graph yet are added to it
+        """
+        if not self.weighted:
+            edge = [node1, node2]
+        elif weight is None:
+            raise UnweightedGraphError("Attempting to add an edge without weight to a weighted graph")
+        else:
+            edge = [node1, node2, weight]
+        return self._insert_edge(edge)
+
+    def _insert_edge(self, edge):
+        '''
+        Appends an edge to self.edges and to every cached index that is built, returns the edge as stored
+        '''
+        for node in (edge[0], edge[1]):
+            if not self._has_node(node):
+                self.add_node(node)
+        with self._edit():
+            self.edges.append(edge)
+        edge = self.edges[-1]
+        self._mutated()
+        cache = self._cache
+        if "adj" in cache:
+            cache["adj"][edge[0]].append(self._forward_entry(edge))
+            if not self.directed:
+                cache["adj"][edge[1]].append(self._backward_entry(edge))
+        if "rev" in cache:
+            cache["rev"][edge[1]].append(self._backward_entry(edge))
+        if "mat" in cache:
+            self._add_to_matrix(cache["mat"], edge, 1)
+        if "pos" in cache:
+            cache["pos"].setdefault(self._edge_key(edge), []).append(len(self.edges) - 1)
+        if "alt" in cache:
+            cache["alt"].defer(edge[0], edge[1], self._forward_entry(edge)[1])
+        return edge
+
+    def _edge_positions(self):
+        '''
+        Returns the cached index of edge positions, building it if needed
+        Format: {(node1, node2) : [i, j,,,]}, positions in self.edges of the edges from node1 to node2
+        in increasing order. Nodes are given by their ids on the csr backend
+        '''
+        pos = self._cache.get("pos")
+        if pos is None:
+            with timer("index.pos"):
+                pos = {}
+                if self.backend == "csr":
+                    pairs = zip(self.edges.src, self.edges.dst)
+                else:
+                    pairs = ((edge[0], edge[1]) for edge in self.edges)
+                for i, pair in enumerate(pairs):
+                    positions = pos.get(pair)
+                    if positions is None:
+                        pos[pair] = [i]
+                    else:
+                        positions.append(i)
+            self._cache["pos"] = pos
+        return pos
+
+    def _edge_key(self, edge):
+        '''
+        Key of the edge position index for the given edge
+        '''
+        if self.backend == "csr":
+            ids = self.edges.ids
+            return (ids.get(edge[0]), ids.get(edge[1]))
+        return (edge[0], edge[1])
+
+    def _find_edge(self, node1, node2, weight=None):
+        '''
+        Returns the position in self.edges of the first edge between node1 and node2
+        If weight is given, the edge must also have that weight
+        Raises ValueError if there is no such edge
+        '''
+        pos = self._edge_positions()
+        positions = pos.get(self._edge_key((node1, node2)), [])
+        if not self.directed and node1 != node2:
+            positions = sorted(positions + pos.get(self._edge_key((node2, node1)), []))
+        for i in positions:
+            if weight is None or (self.weighted and self.edges[i][2] == weight):
+                return i
+        raise ValueError(f"No edge between {node1} and {node2} in graph")
+
+    def remove_edge(self, node1, node2, weight=None):
+        """
+        Removes one edge between node1 and node2 (one parallel edge if there are several)
+        If weight is given, only an edge with that weight is removed
+        The last edge of self.edges takes the place of the removed one
+        Returns the removed edge
+        """
+        i = self._find_edge(node1, node2, weight)
+        with self._edit():
+            last = self.edges.pop()
+            if i < len(self.edges):
+                edge = self.edges[i]
+                self.edges[i] = last
             else:
-                adj_mat[node1][node2] += 1
-                if not self.directed:
-                    adj_mat[node2][node1] += 1
-        return adj_mat
+                edge = last
+        self._mutated()
+        cache = self._cache
+        positions = cache["pos"][self._edge_key(edge)]
+        positions.remove(i)
+        if not positions:
+            del cache["pos"][self._edge_key(edge)]
+        if i < len(self.edges):
+            positions = cache["pos"][self._edge_key(last)]
+            positions.pop()
+            insort(positions, i)
+        if "adj" in cache:
+            cache["adj"][edge[0]].remove(self._forward_entry(edge))
+            if not self.directed:
+                cache["adj"][edge[1]].remove(self._backward_entry(edge))
+        if "rev" in cache:
+            cache["rev"][edge[1]].remove(self._backward_entry(edge))
+        if "mat" in cache:
+            self._add_to_matrix(cache["mat"], edge, -1)
+        #Distances can only grow, the landmark bounds (if any) stay valid
+        return edge
+
+    def set_weight(self, node1, node2, weight):
+        """
+        Changes the weight of the edge between node1 and node2 (the first one if there are several)
+        Graph must be weighted
+        """
+        if not self.weighted:
+            raise UnweightedGraphError("Attempting to set the weight of an edge in an unweighted graph")
+        self._set_edge_weight(self._find_edge(node1, node2), weight)
+
+    def _set_edge_weight(self, i, weight):
+        '''
+        Changes the weight of the edge at position i of self.edges, updating the cached indexes in place
+        '''
+        edge = self.edges[i]
+        old_weight = edge[2]
+        old_forward, old_backward = self._forward_entry(edge), self._backward_entry(edge)
+        if "mat" in self._cache:
+            self._add_to_matrix(self._cache["mat"], edge, -1)
+        with self._edit():
+            edge[2] = weight
+            #Writes the edge back, as the csr backend returns copies of its edges
+            self.edges[i] = edge
+        self._mutated()
+        cache = self._cache
+        if "adj" in cache:
+            entries = cache["adj"][edge[0]]
+            entries[entries.index(old_forward)] = self._forward_entry(edge)
+            if not self.directed:
+                entries = cache["adj"][edge[1]]
+                entries[entries.index(old_backward)] = self._backward_entry(edge)
+        if "rev" in cache:
+            entries = cache["rev"][edge[1]]
+            entries[entries.index(old_backward)] = self._backward_entry(edge)
+        if "mat" in cache:
+            self._add_to_matrix(cache["mat"], edge, 1)
+        #Only lighter edges can shorten distances, the landmark bounds stay valid otherwise
+        if "alt" in cache and weight < old_weight:
+            cache["alt"].defer(edge[0], edge[1], weight)
 
-    def show(self, output_filename, node_name_fn = None, edge_name_fn = None):
+    def show(self, output_filename, node_name_fn = None, edge_name_fn = None, open_browser = False):
         """
         Saves an HTML file locally containing a visualization of the graph
+        Opens it in a browser if open_browser is True
         Returns a pyvis Network instance of the graph.
+        For large graphs, use export_json instead
         """
         g = Network(directed=self.directed)
         g.set_edge_smooth('dynamic')
         if node_name_fn == None:
             node_name_fn = lambda name: f"{name}."
-        node_list = []
-        for i in self.nodes:
-            node_list.append(f"{node_name_fn(i)}")
-        g.add_nodes(node_list, title = [str(i) for i in self.nodes])
-        edge_list = copy.deepcopy(self.edges)
-        for i, edg in enumerate(edge_list):
-            start = f"{node_name_fn(edg[0])}"
-            end = f"{node_name_fn(edg[1])}"
-            edge_list[i] = [start, end]
-        if not self.weighted:
-            g.add_edges(edge_list)
-        else:
-            for i in range(len(edge_list)):
-                if edge_name_fn == None:
-                    label = str(self.edges[i][2])
-                else:
-                    label = edge_name_fn(self.edges[i][2])
-                g.add_edge(edge_list[i][0], edge_list[i][1], label = label)
-        g.show(output_filename, notebook=False)
+        g.add_nodes([f"{node_name_fn(i)}" for i in self.nodes], title = [str(i) for i in self.nodes])
+        #Edges are read without copying the edge list
+        for edge in self.edges:
+            start = f"{node_name_fn(edge[0])}"
+            end = f"{node_name_fn(edge[1])}"
+            if not self.weighted:
+                g.add_edge(start, end)
+            elif edge_name_fn == None:
+                g.add_edge(start, end, label = self._edge_label(edge))
+            else:
+                g.add_edge(start, end, label = edge_name_fn(edge[2]))
+        g.write_html(output_filename)
+        if open_browser:
+            webbrowser.open(output_filename)
         return g
-    
+
+    def _edge_label(self, edge):
+        '''
+        Label of an edge in visualizations
+        '''
+        return str(edge[2])
+
+    @timed
+    def export_json(self, path, max_nodes=None, sample="degree", collapse=None, highlight=None, highlight_only=False):
+        """
+        Writes the graph to a JSON file without a browser, for graphs too large for show:
+        {"directed" : bool, "weighted" : bool, "nodes" : [{"id" : node}, ...],
+        "edges" : [{"source" : node1, "target" : node2, "weight" : num, "label" : str}, ...]}
+        Nodes and edges are streamed to the file as they are read, the edge list is not copied
+        Level of detail options:
+        max_nodes -> only keep the max_nodes nodes with the highest degree (sample="degree")
+        or total weight of their edges (sample="weight"), with the edges between them
+        collapse -> "components" to export every connected component as one node {"id", "size"},
+        or a dict / function node -> group (e.g. communities) to export every group as one node,
+        with one edge per pair of connected groups {"source", "target", "count", "weight"}
+        highlight -> edges to mark with "highlight" : true, e.g. the duplicated edges of chinese_postman
+        highlight_only -> only export the highlighted edges and their ends
+        """
+        export = GraphExport(self, max_nodes, sample, collapse, highlight, highlight_only)
+        with open(path, "w") as file:
+            export.write(file)
+
+    @timed
+    def connected_components(self):
+        """
+        Returns the connected components of the graph as lists of nodes, in order of their first node in self.nodes
+        Edges are followed both ways in a directed graph (weakly connected components)
+        Iterative depth first search over the cached CSR arrays, in O(V + E)
+        """
+        csr = self.csr()
+        count, component = connected_components(csr, self._csr_transpose())
+        return component_lists(count, component, csr.labels)
+
+    @timed
+    def strongly_connected_components(self):
+        """
+        Returns the strongly connected components of a directed graph as lists of nodes (every node of a
+        component can reach every other one), in order of their first node in self.nodes
+        Same as connected_components for an undirected graph
+        Iterative Tarjan's algorithm over the cached CSR arrays, in O(V + E)
+        """
+        csr = self.csr()
+        count, component = strongly_connected_components(csr)
+        return component_lists(count, component, csr.labels)
+
+    def _connected_edges(self):
+        '''
+        True if every edge is in the same connected component, nodes without edges being ignored
+        '''
+        csr = self.csr()
+        count, component = connected_components(csr)
+        return len({component[u] for u in range(len(csr)) if csr.degree(u) > 0}) <= 1
+
+    @timed
     def find_eulerian_cycle(self):
         """
         Find a eulerian cycle inside the graph if one exists and returns the vertices of the cycle
         If no path exists, returns None
+        Works on directed and undirected graphs (including multigraphs), starting from the first node
         """
-        #Create the adjacency dict
-        adj = self.adjacency_dict()
-        #Checks if graph eulerian - all nodes must be even and graph must be connected
-        for node in adj:
-            if len(adj[node]) % 2 != 0 or len(adj[node]) == 0:
-                return None
-        #Generate any cycle v0 v1 v2 .... v0 
-        start = self.nodes[0]
-        path = self.generate_cycle(adj, start)
-        #While the cycle is not eulerian (not all edges added)
-        while len(path) - 1 < len(self.edges):
-            #clean up the adj by removing the nodes with no edges
-            for node in copy.deepcopy(adj):
-                if adj[node] == []:
-                    del adj[node]
-            #find a node that connects to the existing path
-            for node in adj:
-                if node in path:
-                    #make a cycle with the connector node, with the new adj
-                    start = node
-                    inner_path = self.generate_cycle(adj, start)
-                    #cut the old path and paste the new one in place of the connecting vertex
-                    for i in range(len(path)):
-                        if path[i] == start:
-                            path = path[:i] + inner_path + path[i + 1:]
-                            break
-                    break
-        #Once thats done, the path is completed
-        return path
-        
-    def generate_cycle(self, adj, start):
-        '''
-        Generates the longest possible cycle in a eulerian graph from the start node
-        Graph must be eularian
-        '''
-        path = [start]
-        current = start
-        #Uses a repeat until structure
-        while True:
-            #If there are loops at a node, keep traversing loops
-            while current in adj[current]:
-                path.append(current)
-                adj[current].remove(current)
-                adj[current].remove(current)
-            #Once no loops, stores current node
-            prev = current
-            current = None
-            #Find the next node
-            #Tries to find a node distinct from start and previous node
-            for node in adj[prev]:
-                if node != start and node != prev:
-                    current = node
-                    break
-            #If did not find such node, cycle is done. Finish it with the start node
-            if current == None: 
-                current = start
-            # add the new node to cycle, remove the edge between prev and current
-            path.append(current)
-            adj[prev].remove(current)
-            adj[current].remove(prev)
-            #If cycle finished, we are done
-            if current == start:
-                break
-        return path
-    
-    def shortestPath(self, src):
+        walk = self.iter_eulerian_cycle()
+        if walk is None:
+            return None
+        return list(walk)
+
+    @timed
+    def find_eulerian_trail(self):
+        """
+        Find a eulerian trail (a walk using every edge exactly once) and returns its vertices
+        Returns a eulerian cycle if one exists, otherwise an open trail between the two odd nodes
+        (from the node with an extra outgoing edge to the node with an extra incoming edge if directed)
+        If no trail exists, returns None
+        """
+        walk = self.iter_eulerian_cycle(trail=True)
+        if walk is None:
+            return None
+        return list(walk)
+
+    @timed_iter
+    def iter_eulerian_cycle(self, trail=False):
+        """
+        Returns an iterator over the vertices of a eulerian cycle, yielded as they are found
+        If trail is True, falls back to an open eulerian trail when no cycle exists
+        Returns None if there is no such cycle (or trail)
+        Uses Hierholzer's algorithm over the edge ids of the CSR arrays, in O(V + E)
+        """
+        return self._eulerian_walk(trail)
+
+    def _eulerian_walk(self, trail=False):
+        '''
+        Same as iter_eulerian_cycle without the instrumentation, for the algorithms that only
+        check whether the walk exists
+        '''
+        csr = self.csr()
+        if not self.nodes:
+            return None
+        start = csr.key(self.nodes[0])
+        rev = self._csr_transpose()
+        walk = eulerian_walk(csr, start, rev=rev)
+        if walk is None and trail:
+            #An open trail may have to start at another node
+            walk = eulerian_walk(csr, trail=True, rev=rev)
+        if walk is None:
+            return None
+        return map(csr.label, walk)
+
+    @timed
+    def shortestPath(self, src, targets=None):
         """
         Find the shortest path length between src and all nodes, and the corresponding paths
         Works on directed and undirected graphs
-        Uses Dijkstras algorithm
-        Returns a disctionary of this format:
+        Uses Dijkstras algorithm with a binary heap
+        If targets (a list of nodes) is given, the search stops once all of them are settled
+        Returns a ShortestPathTree, which can be read as a dictionary of this format:
         {
         node1 : {
                 length : num,
@@ -172,93 +746,227 @@ class Graph:
                 path : [src, v1, v2, ..., node2]
                 }
         }
+        Paths are only built when they are read, tree.distance(node) and tree.predecessor(node)
+        give the length and previous node without building anything
+        Trees are kept in the result cache of the graph until it changes, see result_cache,
+        their tables are read only as they are shared between callers
         """
-        #Keeps vertices with permanent labels and temp labels separate
-        recent_vertex = src
-        temp_vertices = {node for node in self.nodes}
-        temp_vertices.remove(src)
-        adj = self.adjacency_dict()
-        #If graph not weighted, assigns 1 as weight to all edges
-        if not self.weighted:
-            for node1 in adj:
-                for i, node2 in enumerate(adj[node1]):
-                    adj[node1][i] = (node2, 1)
-        #Each vertex has a label
-        #label[0] -> distance
-        #label[1] -> preceding vertex
-        labels = dict()
-        #Initialize all labels to infinity, except the source
-        for node in self.nodes:
-            labels[node] = [math.inf, None]
-        labels[src] = [0, None]
-
-        #Runs until all nodes are assigned a permanent label
-        while len(temp_vertices) > 0:
-            #Takes most recent node which got assigned permanent label
-            current_vertex = recent_vertex
-            #v - vertex, w - weight
-            #Goes through every vertex adjacent to current one, updating labels
-            for (v, w) in adj[current_vertex]:
-                if v in temp_vertices and labels[current_vertex][0] + w < labels[v][0]:
-                    labels[v][0] = labels[current_vertex][0] + w
-                    labels[v][1] = current_vertex
-            #Find the vertex with a temporary label of least weight
-            min_weight = math.inf
-            min_vertex = None
-            for v in temp_vertices:
-                if labels[v][0] < min_weight:
-                    min_weight = labels[v][0]
-                    min_vertex = v
-            #If all temp vertices are at infinity, they cant be reached
-            #Manually change label to -1 and assign permanent label to all
-            if min_weight == math.inf:
-                for v in temp_vertices: #n
-                    labels[v][0] = -1
-                temp_vertices = set()
-            #Else, assign permanent label to the vertex of least weight
-            else:
-                recent_vertex = min_vertex
-                temp_vertices.remove(min_vertex)
-        #Create an output dictionary
-        output = dict()
-        for v in self.nodes:
-            output[v] = dict()
-            output[v]["length"] = labels[v][0]
-            #Find the path to each vertex by tracing back its previous vertex
-            #using label[vertex][1]
-            path = [v]
-            current_vertex = v
-            while labels[current_vertex][1] != None:
-                current_vertex = labels[current_vertex][1]
-                path.insert(0, current_vertex)
-            if labels[v][0] != -1:
-                output[v]["path"] = path
+        #Works on node keys of the search graph (node ids for the csr backend)
+        #Both search graphs assign 1 as weight to all edges if graph not weighted
+        if not self._has_node(src):
+            raise KeyError(f"{src} is not a node of the graph")
+        version = self._version
+        key = ("shortestPath", src, None if targets is None else frozenset(targets))
+        #A complete search also answers the queries with targets
+        tree = self.result_cache.get(version, ("shortestPath", src, None), key)
+        if tree is not None:
+            return tree
+        space = self._search_graph()
+        if targets is not None:
+            targets = [space.key(node) for node in key[2]]
+        source = space.key(src)
+        dist, pred, settled, complete = dijkstra(space, source, targets)
+        tree = ShortestPathTree(space, source, dist, pred, settled, complete)
+        #Measured by the cache before the tables are frozen, read only views do not report the size of their dict
+        self.result_cache.put(version, key, tree)
+        return tree.freeze()
+
+    def _key_heuristic(self, space, heuristic, dst):
+        '''
+        Turns the heuristic option of shortest_path_between into a lower bound function of node keys
+        '''
+        label = space.label
+        if isinstance(heuristic, Mapping):
+            goal = heuristic[dst]
+            return lambda key: math.dist(heuristic[label(key)], goal)
+        return lambda key: heuristic(label(key), dst)
+
+    @timed
+    def shortest_path_between(self, src, dst, heuristic=None):
+        """
+        Finds the shortest path from src to dst only, without solving the whole single source problem
+        Uses A* over the landmark index if the graph has one (see build_landmarks),
+        otherwise a bidirectional Dijkstra (forward from src, backward from dst), or A* if heuristic is given:
+        heuristic -> function h(node, dst) giving a lower bound of the distance from node to dst,
+                     or a dict {node : (x, y, ...)} of coordinates, their straight line distance is used
+                     (so edge weights must not be shorter than the distance between their ends)
+        The heuristic must be consistent: h(u) <= w(u, v) + h(v) for every edge
+        Returns {"length" : num, "path" : [src, v1, v2, ..., dst]}, length -1 and path None if unreachable
+        """
+        for node in (src, dst):
+            if not self._has_node(node):
+                raise KeyError(f"{node} is not a node of the graph")
+        space = self._search_graph()
+        source, target = space.key(src), space.key(dst)
+        index = self._landmark_index() if heuristic is None else None
+        if index is not None:
+            #Index rows are the node ids of the csr backend
+            if self.backend == "csr":
+                key_heuristic = index.heuristic(target)
             else:
-                output[v]["path"] = None
-        return output
+                ids = index.ids
+                bound = index.heuristic(ids[dst])
+                key_heuristic = lambda key: bound(ids[key])
+            #Landmarks reaching neither node give inf - inf, which the bounds skip
+            with np.errstate(invalid="ignore"):
+                length, path = astar(space, source, target, key_heuristic)
+        elif heuristic is None:
+            length, path = bidirectional_dijkstra(space, self._reverse_search_graph(), source, target)
+        else:
+            length, path = astar(space, source, target, self._key_heuristic(space, heuristic, dst))
+        if path is None:
+            return {"length" : -1, "path" : None}
+        return {"length" : length, "path" : [space.label(key) for key in path]}
+
+    def _landmark_index(self):
+        '''
+        Returns the landmark index of the graph, None if it has none
+        The edges queued by the edits since the last query are propagated over the search graphs first,
+        which the query needs anyway (the csr backend rebuilds its arrays after edits)
+        '''
+        index = self._cache.get("alt")
+        if index is not None and index.pending:
+            index.flush(self._search_graph(), self._reverse_search_graph())
+        return index
+
+    @timed
+    def build_landmarks(self, count=16, seed=0):
+        """
+        Builds the landmark (ALT) index that speeds up shortest_path_between on a graph queried many times:
+        the distances from and to count landmarks, picked far apart from each other, give a lower bound
+        of the distance between any two nodes, which A* follows to the destination
+        Takes 2 * count single source searches (count if undirected) and n * count floats per direction
+        The index is kept up to date by add_node, add_edge, remove_edge and set_weight: lighter or new
+        edges are propagated through the distances (at the next query, once for all the edits since the
+        last one, over the CSR arrays for the csr backend), heavier or removed edges leave the bounds valid
+        (only less tight, rebuild the index after many of them). It is saved and loaded with the graph
+        Weights must not be negative
+        """
+        csr = self.csr()
+        with timer("index.alt"):
+            index = LandmarkIndex.build(csr, self._csr_transpose(), count, seed)
+        self._cache["alt"] = index
+        return index
+
+    @timed
+    def shortest_paths_between(self, pairs, heuristic=None):
+        """
+        Batched shortest_path_between over an iterable of (src, dst) pairs
+        Pairs are grouped by source: a source with a single destination gets a point to point search,
+        one with several destinations a single Dijkstra stopped once all of them are settled
+        Returns the results in the order of the pairs, in the format of shortest_path_between
+        """
+        pairs = list(pairs)
+        groups = dict()
+        for i, (src, dst) in enumerate(pairs):
+            for node in (src, dst):
+                if not self._has_node(node):
+                    raise KeyError(f"{node} is not a node of the graph")
+            groups.setdefault(src, []).append(i)
+        results = [None] * len(pairs)
+        for src, positions in groups.items():
+            destinations = {pairs[i][1] for i in positions}
+            if len(destinations) == 1:
+                result = self.shortest_path_between(src, pairs[positions[0]][1], heuristic)
+                for i in positions:
+                    results[i] = result
+                continue
+            tree = self.shortestPath(src, targets=destinations)
+            for i in positions:
+                results[i] = tree[pairs[i][1]]
+        return results
     
-    def shortest_distances_all_pairs(self):
+    @timed
+    def all_pairs_shortest_paths(self, dtype="float64", block_size=64, method="floyd_warshall", processes=None):
+        """
+        Finds the shortest distances and paths between all pairs of nodes
+        method -> "floyd_warshall": vectorized, cache blocked Floyd-Warshall on NumPy arrays, O(V^3)
+                  "johnson": a heap Dijkstra from every node across a process pool, O(V E log V),
+                  much faster on sparse graphs (see iter_shortest_distances)
+        dtype -> "float64" or "float32" (half the memory, exact for integer weights below 2**24)
+        Returns an AllPairsShortestPaths with the distance and predecessor matrices, whose rows
+        and columns follow the order of self.nodes, so any node labels can be used
+        The result is kept in the result cache of the graph until it changes, its matrices are read only
+        """
+        if method not in ("floyd_warshall", "johnson"):
+            raise ValueError(f"Unknown all pairs method {method}")
+        version = self._version
+        key = ("all_pairs_shortest_paths", np.dtype(dtype).name, method)
+        result = self.result_cache.get(version, key)
+        if result is not None:
+            return result
+        if method == "johnson":
+            n = len(self.nodes)
+            dist = np.empty((n, n), dtype=dtype)
+            pred = np.empty((n, n), dtype=np.int32)
+            for source, row, pred_row in johnson_rows(self.csr(), processes=processes, predecessors=True):
+                dist[source] = row
+                pred[source] = pred_row
+        else:
+            space = self._search_graph()
+            dist, pred = distance_matrix(space, np.dtype(dtype))
+            floyd_warshall(dist, pred, block_size)
+        #Shared by every caller getting the cached result
+        dist.setflags(write=False)
+        pred.setflags(write=False)
+        return self.result_cache.put(version, key, AllPairsShortestPaths(list(self.nodes), dist, pred))
+
+    def dynamic_all_pairs(self, dtype="float64", block_size=64, processes=1):
+        """
+        Returns a DynamicAllPairs: the all pairs shortest paths of the graph, kept up to date by
+        making the edge changes through it (add_edge, remove_edge, set_weight or apply for a batch)
+        New or lighter edges update the matrices in O(V^2), removed or heavier ones rerun Dijkstra
+        from the sources whose shortest paths may take them only, on processes worker processes
+        Its matrices are writable copies, rows and columns follow the order of self.nodes
+        """
+        return DynamicAllPairs(self, dtype, block_size, processes)
+
+    def iter_shortest_distances(self, sources=None, processes=None, chunk_size=16, predecessors=False):
+        """
+        Streams the rows of the all pairs distance matrix, so they can be consumed or written out
+        without holding the whole matrix in memory
+        Runs a heap Dijkstra from every node in sources (all nodes by default), spread across a
+        pool of processes (all cores if processes is None, no pool if processes is 1) which
+        share the graph through shared memory. Negative weights are handled by Johnson reweighting
+        Yields (source, row) as rows complete, not in order. row is a NumPy array of the distances
+        to the nodes of self.nodes (math.inf if unreachable)
+        If predecessors is True, yields (source, row, pred_row), pred_row[j] being the position of
+        the node before self.nodes[j] on the path, -1 if there is none
+        """
+        csr = self.csr()
+        if sources is not None:
+            sources = [csr.key(node) for node in sources]
+        for source, row, pred_row in johnson_rows(csr, sources, processes, chunk_size, predecessors):
+            if predecessors:
+                yield self.nodes[source], row, pred_row
+            else:
+                yield self.nodes[source], row
+
+    def _integral_weights(self):
+        '''
+        True if every edge weight is an int (or the graph is unweighted)
+        '''
+        if not self.weighted:
+            return True
+        if self.backend == "csr":
+            return typecode(self.edges.weights) == 'q'
+        return all(isinstance(edge[2], int) for edge in self.edges)
+
+    def shortest_distances_all_pairs(self, dtype=None, block_size=64, method="floyd_warshall", processes=None):
         """
-        Works on a matrix representation of the graph
         Returns a 2d list where value of m[i][j] is shortest dist from vi to vj
-        Assumes that self.nodes is a list of nodes from 0 to n (because it uses an adj matrix).
-        """
-        adj = self.adjacency_matrix()
-        d = [[0 for node in self.nodes] for node in self.nodes]
-        #This makes use of the floyd warshall algorithm
-        for i in self.nodes:
-            for j in self.nodes:
-                if i != j:
-                    if adj[i][j] != 0:
-                        d[i][j] = adj[i][j]
-                    else:
-                        d[i][j] = math.inf
-        for k in self.nodes:
-            for i in self.nodes:
-                for j in self.nodes:
-                    d[i][j] = min(d[i][j], d[i][k] + d[k][j])
-        return d
+        vi is the node at position i of self.nodes, so for nodes 0 to n - 1, m[i][j] is the
+        distance from node i to node j. Unreachable pairs are math.inf
+        If dtype ("float64" or "float32") is given, returns the (read only) NumPy distance matrix instead
+        Uses the Floyd-Warshall algorithm, or Johnson's algorithm if method is "johnson",
+        see all_pairs_shortest_paths
+        """
+        result = self.all_pairs_shortest_paths(dtype or "float64", block_size, method, processes)
+        if dtype is not None:
+            return result.dist
+        return result.to_list(integral=self._integral_weights())
 
+    @timed
     def chinese_postman(self):
         """
         Problem: find the shortest walk that covers every edge at least once
@@ -268,58 +976,56 @@ class Graph:
         Returns a tuple (g, duplicated_edges)
         g -> a Eulerian pseudogaph of minimum weight, obtained by duplicating edges of original graph
         duplicated_edges -> a list of edges that were duplicated to achieve the result
+        Raises ValueError if the graph is directed or if its edges are not all connected
         """
+        if self.directed:
+            raise ValueError("The Chinese postman problem is solved on undirected graphs only")
         #If graph is eulerian, we are done
-        if self.find_eulerian_cycle() != None:
+        if self._eulerian_walk() is not None:
             return (self, [])
-        g_copy = copy.deepcopy(self)
-        adj_dict = self.adjacency_dict()
+        #Checked in linear time, before the quadratic searches and the matching
+        if not self._connected_edges():
+            raise ValueError("Graph is not connected, no walk can cover every edge")
+        #Built from the edges, a deep copy would also copy the cached indexes (and the memory map of a loaded graph)
+        g_copy = Graph(list(self.nodes), [list(edge) for edge in self.edges], self.directed, self.weighted, self.backend)
+        version = self._version
+        #Only the duplicated edges are cached, every call gets its own copies
+        cached = self.result_cache.get(version, ("chinese_postman",))
+        if cached is not None:
+            duplicated_edges = [list(edge) for edge in cached]
+            for edge in duplicated_edges:
+                g_copy.add_edge(*edge)
+            return (g_copy, duplicated_edges)
+        space = self._search_graph()
         #Obtains a list of all odd nodes
-        odd_nodes = []
-        for node in adj_dict:
-            if len(adj_dict[node]) % 2 == 1:
-                odd_nodes.append(node)
-        #Splits the nodes into pairs, and finds every possible partition of such pairings
-        node_permutations = list(permutations(odd_nodes))
-        seen_partitions = set()
-        for perm in node_permutations:
-            pairs = []
-            #For each permutation, pairs two nodes next to each other (in the list)
-            for i in range(0, len(perm), 2):
-                pair = sorted([perm[i], perm[i + 1]])
-                #sorting is to remove duplicate pairs - (0, 1) and (1, 0) are the same
-                pairs.append(tuple(pair))
-            #sorts to avoid duplicate partitions. A set is used for the same purpose
-            pairs = tuple(sorted(pairs))
-            if pairs not in seen_partitions:
-                seen_partitions.add(pairs)
-        #Find a partition in which the sum of distances between all the pairs are minimal
-        min_weights = self.shortest_distances_all_pairs()
-        min_weight = math.inf
-        min_partition = None
-        for partition in seen_partitions:
-            weight = 0
-            for pair in partition:
-                weight += min_weights[pair[0]][pair[1]]
-            if weight < min_weight:
-                min_weight = weight
-                min_partition = partition
+        odd_nodes = [key for key in space.keys() if sum(1 for _ in space.neighbours(key)) % 2 == 1]
+        #One Dijkstra per odd node, stopped once every other odd node is settled
+        #The same searches give the pairing weights and the paths to duplicate
+        searches = {}
+        for key in odd_nodes:
+            dist, pred, settled, complete = dijkstra(space, key, targets=odd_nodes)
+            searches[key] = (dist, pred)
+        #Pairs up the odd nodes such that the sum of distances between the pairs is minimal
+        pairs = min_weight_perfect_matching(odd_nodes, lambda u, v: searches[u][0][v])
+        if pairs is None:
+            raise ValueError("Graph is not connected, odd nodes cannot be paired")
         #Find shortest path between each pair in the minimal partition
-        #Duplicates the edges in such path
-        adj_mat = self.adjacency_matrix()
+        #Duplicates the edges in such path, with the weight of the lightest parallel edge
         duplicated_edges = []
-        for pair in partition:
-            output = self.shortestPath(pair[0])
-            path = output[pair[1]]['path']
+        for node1, node2 in pairs:
+            path = trace_path(searches[node1][1], node2)
             for i in range(len(path) - 1):
+                u, v = path[i], path[i + 1]
                 if not self.weighted:
-                    new_edge = [path[i], path[i + 1]]
+                    new_edge = [space.label(u), space.label(v)]
                 else:
-                    weight = adj_mat[path[i]][path[i + 1]]
-                    new_edge = [path[i], path[i + 1], weight]
+                    weight = min(w for x, w in space.neighbours(u) if x == v)
+                    new_edge = [space.label(u), space.label(v), weight]
                 duplicated_edges.append(new_edge)
+        self.result_cache.put(version, ("chinese_postman",), [list(edge) for edge in duplicated_edges])
         #Adds the duplicated adges to the new pseudograph
-        g_copy.edges.extend(duplicated_edges)
+        for edge in duplicated_edges:
+            g_copy.add_edge(*edge)
         return (g_copy, duplicated_edges)
     
     def total_graph_weight(self):
@@ -335,32 +1041,59 @@ class Graph:
                 total += 1
         return total
     
+    def _edge_arrays(self):
+        '''
+        Returns the edges as an EdgeArrays store, node ids follow the order of self.nodes
+        '''
+        if self.backend == "csr":
+            return self.edges
+        return EdgeArrays.from_edges(self.nodes, self.edges, self.weighted)
+
+    def _spanning_forest(self, positions):
+        edges = self.edges
+        tree_edges = [edges[i] for i in sorted(positions)]
+        return Graph(list(self.nodes), tree_edges, weighted=True, backend=self.backend)
+
+    @timed
     def kruskal(self):
         """
         Returns a Minimum Spanning Tree obtained by Kruskal's algorithm
+        Uses a union-find with path compression and union by rank
+        If the graph is not connected, returns a minimum spanning forest (a tree for each component)
         Graph must be weighted
         """
         if not self.weighted: raise UnweightedGraphError()
-        # Initialize the labels for each node
-        # Useful in future to avoid creating cycles
-        node_labels = {}
-        for i, node in enumerate(self.nodes):
-            node_labels[node] = i
-        # Get the edges sorted in order of the weights
-        graph_edges = sorted(self.edges, key=lambda x: x[2], reverse=True)
-        
-        k = 1
-        tree_edges = [graph_edges.pop()]
-        while k < len(self.nodes):
-            next_edge = graph_edges.pop()
-            if node_labels[next_edge[0]] != node_labels[next_edge[1]]:
-                tree_edges.append(next_edge)
-                k+=1
-        return Graph(self.nodes, tree_edges, weighted=True)
+        return self._spanning_forest(kruskal_forest(self._edge_arrays()))
+
+    @timed
+    def prim(self):
+        """
+        Returns a Minimum Spanning Tree obtained by Prim's algorithm with a binary heap
+        If the graph is not connected, returns a minimum spanning forest (a tree for each component)
+        Graph must be weighted
+        """
+        if not self.weighted: raise UnweightedGraphError()
+        csr = self.csr()
+        if self.directed:
+            #Edges are taken as undirected, as in the other spanning tree algorithms
+            csr = CSRGraph.from_edge_arrays(self._edge_arrays(), False)
+        return self._spanning_forest(prim_forest(csr))
+
+    @timed
+    def boruvka(self, processes=None, chunk_size=1 << 20):
+        """
+        Returns a Minimum Spanning Tree obtained by Borůvka's algorithm, vectorized with NumPy
+        The search for the lightest edge of every component is split across processes
+        (os.cpu_count() if None) in ranges of chunk_size edges, graphs with fewer edges run in process
+        If the graph is not connected, returns a minimum spanning forest (a tree for each component)
+        Graph must be weighted
+        """
+        if not self.weighted: raise UnweightedGraphError()
+        return self._spanning_forest(boruvka_forest(self._edge_arrays(), processes, chunk_size))
     
 class ActivityNetwork(Graph):
 
-    def __init__(self, dependence_table : dict):
+    def __init__(self, dependence_table : dict, node_dict=None):
         #Sample dependence table:
         '''
         {
@@ -374,27 +1107,48 @@ class ActivityNetwork(Graph):
         }
         '''
         self.dependence_table = dependence_table
-        self.node_dict = self.event_dict()
+        #node_dict -> an event dictionary already made by event_dict, see from_event_dict
+        self.node_dict = self.event_dict() if node_dict is None else node_dict
         nodes = list(self.node_dict.keys())
-        edges = []
         #Based on the node dictionary with the associated precursor and follower sets, creates edges
-        #Checking every node and seeing what activities come into it
-        for in_node in nodes:
-            #Check every incoming activity for node
-            for incoming_activity in self.node_dict[in_node][0]:
-                #For each activity, checks all other nodes and finds their outgoing activities
-                for out_node in nodes:
-                    outgoing_activities = self.node_dict[out_node][1]
-                    #if it finds an outgoing activity in any other nodes that match the incoming activity in current node
-                    if out_node != in_node and incoming_activity in outgoing_activities:
-                        if incoming_activity not in dependence_table:
-                            edges.append([out_node, in_node, 0, ""])    
-                        else:
-                            edges.append([out_node, in_node, dependence_table[incoming_activity][1], incoming_activity])
-                        break
+        edges = activity_arcs(self.node_dict, dependence_table)
         #initiate a graph object using the nodes and edges constructed
         super().__init__(nodes, edges, directed=True, weighted=True)
-    
+
+    @classmethod
+    def from_event_dict(cls, dependence_table, node_dict):
+        """
+        Creates an activity network from an event dictionary {node : [{precursor set}, {follower set}]}
+        made beforehand by event_dict (dummies included), skipping the dummy construction
+        The event dictionary is used as is, not copied
+        """
+        return cls(dependence_table, node_dict)
+
+    @classmethod
+    def from_csv(cls, path, delimiter=None, comment="#", header=True, precursor_delimiter=";"):
+        """
+        Creates an activity network from a file with one activity per row: activity, duration, precursors
+        The precursors are separated by precursor_delimiter, e.g. F,3,C;E
+        delimiter -> None guesses from the extension: tab for .tsv, "," otherwise
+        header -> True if the first row holds column names
+        """
+        return cls(read_dependence_table(path, delimiter, comment, header, precursor_delimiter))
+
+    @classmethod
+    def schedule_many(cls, dependence_tables, processes=None, chunk_size=16, floats=True):
+        """
+        Builds and schedules an activity network for every dependence table of an iterable,
+        spread across a pool of processes (all cores if processes is None, no pool if processes is 1)
+        Tables are sent in chunks of chunk_size, with at most two chunks per process in flight
+        Yields (index, duration, event times, floats) as networks complete, not in order:
+        index -> position of the table in dependence_tables
+        event times -> {node : [early_event_time, late_event_time]}
+        floats -> {activity : [total_float, free_float]}, None if floats is False
+        Raises ValueError if a dependence table has circular precedences
+        """
+        return schedule_many(cls, dependence_tables, processes, chunk_size, floats)
+
+    @timed
     def event_dict(self):
         '''
         #Makes a dictionary of nodes with corresponding precursor and follower activity sets
@@ -418,136 +1172,43 @@ class ActivityNetwork(Graph):
         node_dict = dict()
         for node in initial_node_dict:
             node_dict[initial_node_dict[node][1]] = [set(node), set(initial_node_dict[node][0])]
-        self.__add_dummies(node_dict)
-        print(node_dict)
+        add_dummies(node_dict)
         return node_dict
     
-    def __add_dummies(self, node_dict):
-        '''
-        Using K. Neumann algorithm to add dummies to the event dict
-        Neumann, K. (1999). A Heuristic Procedure for Constructing an Activity-on-Arc Project Network. In: Gaul, W., Schader, M. (eds) Mathematische Methoden der Wirtschaftswissenschaften. Physica, Heidelberg. https://doi.org/10.1007/978-3-662-12433-8_30
-        The premise is to check for 3 conditions and keep adding dummies until they are satisfied
-        '''
-        dummy_counter = 0
-        dummies_left = True
-        nodes = list(node_dict.keys())
-        while dummies_left:
-            #Checking if if theres a precursor set which is a subset of another
-            #(Condition 1)
-            #If so, find maximum such set
-            maximum_set_length = -math.inf
-            maximum_nodes = None
-            for node1 in node_dict:
-                for node2 in node_dict:
-                    p1, p2 = node_dict[node1][0], node_dict[node2][0]
-                    if node1 != node2 and p1 != set() and p1.issubset(p2) and \
-                        len(p1) > maximum_set_length:
-                        maximum_set_length = len(p1)
-                        maximum_nodes = (node1, node2)
-            if maximum_nodes != None:
-                node1, node2 = maximum_nodes
-                p1, p2 = node_dict[node1][0], node_dict[node2][0]
-                for activity in copy.copy(p2):
-                    if activity in p1:
-                        p2.remove(activity)
-                        p2.add(str(dummy_counter))
-                node_dict[node1][1].add(str(dummy_counter))
-                dummy_counter += 1
-            else:
-                # Check if there are two precursors such that their intersection is not empty
-                # (condition 2)
-                # if so, find largest such intersection
-                maximum_intersection_length = 0
-                maximum_nodes = None
-                for node1 in node_dict:
-                    for node2 in node_dict:
-                        p1, p2 = node_dict[node1][0], node_dict[node2][0]
-                        intersection = p1 & p2
-                        if node1 != node2 and p1 != p2 and len(intersection) > maximum_intersection_length:
-                            maximum_intersection_length = len(intersection)
-                            maximum_nodes = (node1, node2)
-                if maximum_nodes != None:
-                    node1, node2 = maximum_nodes
-                    p1, p2 = node_dict[node1][0], node_dict[node2][0]
-                    p3 = p1 & p2
-                    new_node = nodes[-1] + 1
-                    for activity in copy.copy(p1):
-                        if activity in p3:
-                            p1.remove(activity)
-                            p1.add(str(dummy_counter))
-                    for activity in copy.copy(p2):
-                        if activity in p3:
-                            p2.remove(activity)
-                            p2.add(str(dummy_counter + 1))
-                    f3 = {str(dummy_counter), str(dummy_counter + 1)}
-                    node_dict[new_node] = [p3, f3]
-                    dummy_counter += 2
-                else:
-                    # Check if there is precursor and follower which have more than 1 common activity
-                    # (condition 3)
-                    nodes_found = None
-                    for node1 in node_dict:
-                        for node2 in node_dict:
-                            p1, f2 = node_dict[node1][0], node_dict[node2][1]
-                            intersection = p1 & f2
-                            if node1 != node2 and len(intersection) > 1:
-                                nodes_found = (node1, node2)
-                    if nodes_found != None:
-                        node1, node2 = nodes_found
-                        p1, f2 = node_dict[node1][0], node_dict[node2][1]
-                        intersection = p1 & p2
-                        r = len(intersection)
-                        for i, activity in enumerate(intersection):
-                            if i < r - 1:
-                                p1.remove(activity)
-                                p1.add(str(dummy_counter + i))
-                                new_node = nodes[-1] + 1
-                                p3 = {activity}
-                                f3 = {str(dummy_counter + i)}
-                                node_dict[new_node] = [p3, f3]
-                        dummy_counter += r - 1
-                    #if all 3 conditions are satisfied, no more dummies needed
-                    else: 
-                        dummies_left = False
+    def _schedule(self):
+        '''
+        Returns the cached critical path schedule (see graph/cpm.py), computing it if the network changed
+        '''
+        cache = self._cache
+        if cache.get("cpm_version") != self._version:
+            adj, rev = self._adjacency(), self._reverse_adjacency()
+            with timer("cpm.schedule"):
+                cache["cpm"] = Schedule(adj, rev, self.edges)
+            cache["cpm_version"] = self._version
+        return cache["cpm"]
 
     def calculate_early_late_event_times(self):
         '''
         Returns a dictionary with early and late event times for each node in this format:
         {node : [early_event_times, late_event_time], ...}
+        Raises ValueError if the dependence table has circular precedences
         '''
-        times = {node : [-math.inf, math.inf] for node in self.nodes}
-        self.__forward_pass(times)
-        self.__backward_pass(times)
-        return times
-    
-    def __forward_pass(self, times):
-        '''
-        Performs a breadth-first algorithm on network to calculate the early event times
-        '''
-        source = 0
-        queue = [source]
-        times[source][0] = 0
-        adj = self.adjacency_dict()
-        while queue != []:
-            current_node = queue.pop(0)
-            for (node2, weight, activity) in adj[current_node]:
-                times[node2][0] = max(times[current_node][0] + weight, times[node2][0])
-                queue.append(node2)
-
-    def __backward_pass(self, times):
-        '''
-        Performs a breadth-first algorithm on a network with inversed arcs
-        to calculate the late event times
-        '''
-        source = self.nodes[-1]
-        queue = [source]
-        times[source][1] = times[source][0]
-        adj = self.reverse_adjacency_dict()
-        while queue != []:
-            current_node = queue.pop(0)
-            for (node2, weight, activity) in adj[current_node]:
-                times[node2][1] = min(times[current_node][1] - weight, times[node2][1])
-                queue.append(node2)
+        return self._schedule().times()
+
+    def floats(self):
+        '''
+        Returns the total and free float of every activity in this format:
+        {activity : [total_float, free_float], ...}
+        Total float is the amount of time the start of an activity may be delayed without affecting the duration of the project
+        Free float is the amount of time it may be delayed without delaying the early start of any following activity
+        '''
+        return self._schedule().floats()
+
+    def critical_path(self):
+        '''
+        Returns the critical activities (those without total float) ordered by early start
+        '''
+        return self._schedule().critical()
 
     def float_of_activity(self, activity):
         '''
@@ -555,52 +1216,103 @@ class ActivityNetwork(Graph):
         Total float of an activity is the amount of time that its start may be delayed 
         without affecting the duration of the project
         '''
-        times = self.calculate_early_late_event_times()
-        float_edge = None
-        for edge in self.edges:
-            if edge[3] == activity:
-                float_edge = edge
-        if float_edge == None:
-            return None
-        else:
-            node1, node2, weight, activity = float_edge[0], float_edge[1], float_edge[2], float_edge[3] 
-            return times[node2][1] - times[node1][0] - weight
+        return self._schedule().total_float(activity)
         
     def total_project_duration(self):
         """
         Returns the total duration of the project
         """
-        times = self.calculate_early_late_event_times()
-        return times[self.nodes[-1]][0]
+        return self._schedule().duration
 
-    def adjacency_dict(self):
+    def update_duration(self, activity, duration):
+        """
+        Changes the duration of an activity, in the network and in its dependence table
+        The cached event times are updated incrementally: only the events after the activity
+        (early times) and before it (late times) are revisited, until their times stop changing
+        """
+        self.update_durations({activity : duration})
+
+    @timed
+    def update_durations(self, durations):
+        """
+        Changes the durations of several activities at once: {activity : duration}
+        All the changes are propagated through the event times in a single pass
+        Raises KeyError for activities that are not in the network
+        """
+        schedule = self._schedule()
+        for activity in durations:
+            if activity not in schedule.arcs:
+                raise KeyError(f"No activity {activity} in network")
+        changed = []
+        for activity, duration in durations.items():
+            i = schedule.arcs[activity]
+            self._set_edge_weight(i, duration)
+            self.dependence_table[activity][1] = duration
+            changed.append(self.edges[i])
+        schedule.update(changed)
+        #The schedule was kept in sync with the new weights
+        self._cache["cpm_version"] = self._version
+
+    @timed
+    def simulate(self, distributions=None, scenarios=10000, seed=None, processes=None, chunk_size=None):
+        """
+        Monte Carlo simulation of the project with random activity durations
+        distributions -> {activity : distribution}, activities left out keep their duration, a distribution is:
+        a tuple (optimistic, likely, pessimistic) for a PERT (beta) three point estimate,
+        an object with a scipy.stats style rvs(size, random_state) method, or a function (rng, size) -> array
+        All the scenarios are evaluated at once with NumPy, in chunks of chunk_size scenarios,
+        split across processes (os.cpu_count() if None) when there is more than one chunk
+        seed -> makes the results reproducible, whatever the number of processes
+        Returns a SimulationResult: durations (array of the project duration of every scenario),
+        percentiles(q) -> {percentile : duration}, mean(), std(),
+        and criticality -> {activity : fraction of the scenarios in which it is critical}
+        """
+        return simulate(self._schedule().order, self.edges, distributions or {}, scenarios, seed, processes, chunk_size)
+
+    def _forward_entry(self, edge):
         '''
-        Returns an adjacency dictionary for an activity network
+        Adjacency entries of an activity network also carry the activity name
         '''
-        adj_dict = dict()
-        for node in self.nodes:
-            adj_dict[node] = []
-        for edge in self.edges:
-            node1, node2, weight, activity = edge[0], edge[1], edge[2], edge[3]
-            adj_dict[node1].append((node2, weight, activity))
-        return adj_dict
-    
+        return (edge[1], edge[2], edge[3])
+
+    def _backward_entry(self, edge):
+        return (edge[0], edge[2], edge[3])
+
+    def add_edge(self, node1, node2, weight=0, activity=""):
+        """
+        Adds an activity (or a dummy if activity is "") between events node1 and node2
+        """
+        return self._insert_edge([node1, node2, weight, activity])
+
     def reverse_adjacency_dict(self):
         '''
         Returns an adjacency dictionary for an activity network
         But instead of each node having the nodes part of its outdegree
         It has the nodes that are part of its indegree
         '''
-        adj_dict = dict()
-        for node in self.nodes:
-            adj_dict[node] = []
-        for edge in self.edges:
-            node1, node2, weight, activity = edge[0], edge[1], edge[2], edge[3]
-            adj_dict[node2].append((node1, weight, activity))
-        return adj_dict
+        adj = self._reverse_adjacency()
+        return {node : list(adj[node]) for node in adj}
     
-    def show(self, output_filename):
+    def show(self, output_filename, open_browser=False):
         '''
         Creates a .html file with output_filename in working directory containing a representation of the network
         '''
-        return super().show(output_filename, edge_name_fn = lambda weight, name: f"{name}{weight}")
\ No newline at end of file
+        return super().show(output_filename, open_browser=open_browser)
+
+    def _edge_label(self, edge):
+        '''
+        Activities are labelled with their name and duration, dummies with their duration only
+        '''
+        return f"{edge[3]}{edge[2]}"
+
+    @timed
+    def export_json(self, path, max_nodes=None, sample="degree", collapse=None, highlight=None, highlight_only=False,
+                    critical=False):
+        """
+        Writes the network to a JSON file, see Graph.export_json
+        critical -> highlight the critical activities (instead of highlight)
+        """
+        if critical:
+            activities = set(self.critical_path())
+            highlight = [edge for edge in self.edges if edge[3] in activities]
+        super().export_json(path, max_nodes, sample, collapse, highlight, highlight_only)
\ No newline at end of file
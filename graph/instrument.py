@@ -0,0 +1,178 @@
+from collections import defaultdict
+import functools, re, time
+
+#Instrumentation collecting the counters and timings, None when disabled
+#Algorithms only look it up once per call, so disabled instrumentation costs one check per call
+_current = None
+
+class Instrumentation:
+    """
+    Opt-in collection of per call timings and operation counters of the graph algorithms
+    with Instrumentation() as stats:
+        g.shortestPath(0)
+    stats.counters -> {name : total}, e.g. "dijkstra.settled", "dijkstra.pushes", "dummies.added"
+    stats.timings -> {name : [calls, total seconds]}, e.g. "Graph.shortestPath", "index.adj"
+    callback -> called as callback(name, seconds) after every timed call
+    Only one instrumentation collects at a time (the innermost), for the whole process
+    """
+    def __init__(self, callback=None):
+        self.counters = defaultdict(int)
+        self.timings = defaultdict(lambda: [0, 0.0])
+        self.callback = callback
+        self._previous = None
+
+    def __enter__(self):
+        global _current
+        self._previous = _current
+        _current = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _current
+        _current = self._previous
+        self._previous = None
+        return False
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def record(self, name, seconds):
+        timing = self.timings[name]
+        timing[0] += 1
+        timing[1] += seconds
+        if self.callback is not None:
+            self.callback(name, seconds)
+
+    def reset(self):
+        self.counters.clear()
+        self.timings.clear()
+
+    def as_dict(self):
+        """
+        Returns {"counters" : {name : total}, "timings" : {name : {"calls" : n, "seconds" : total}}}
+        """
+        return {"counters" : dict(self.counters),
+                "timings" : {name : {"calls" : calls, "seconds" : seconds} for name, (calls, seconds) in self.timings.items()}}
+
+    def prometheus(self, prefix="graph"):
+        """
+        Returns the counters and timings in the Prometheus text exposition format
+        Counters become <prefix>_<name>_total, timings <prefix>_call_seconds_sum / _count with a "call" label
+        """
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            metric = f"{prefix}_{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        if self.timings:
+            metric = f"{prefix}_call_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for name, (calls, seconds) in sorted(self.timings.items()):
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{metric}_sum{{call="{label}"}} {seconds!r}')
+                lines.append(f'{metric}_count{{call="{label}"}} {calls}')
+        return "\n".join(lines) + "\n"
+
+def _metric_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+def current():
+    '''
+    Returns the collecting Instrumentation, None if instrumentation is disabled
+    '''
+    return _current
+
+def count(name, value=1):
+    '''
+    Adds value to a counter if instrumentation is enabled
+    '''
+    if _current is not None:
+        _current.counters[name] += value
+
+class _Timer:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.record(self.name, time.perf_counter() - self.start)
+        return False
+
+class _NoTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NO_TIMER = _NoTimer()
+
+def timer(name):
+    '''
+    Context manager timing a block under name if instrumentation is enabled, doing nothing otherwise
+    '''
+    if _current is None:
+        return _NO_TIMER
+    return _Timer(_current, name)
+
+def timed(function):
+    '''
+    Decorator timing every call of a function under its qualified name, e.g. "Graph.shortestPath"
+    '''
+    name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        stats = _current
+        if stats is None:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats.record(name, time.perf_counter() - start)
+    return wrapper
+
+def timed_iter(function):
+    '''
+    Decorator for functions returning a lazy iterator (or None): times the call and the iteration of
+    the iterator together, recorded as one call once the iterator is exhausted or closed
+    The time spent by the caller between two items is not counted
+    '''
+    name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        stats = _current
+        if stats is None:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            iterator = function(*args, **kwargs)
+        except BaseException:
+            stats.record(name, time.perf_counter() - start)
+            raise
+        elapsed = time.perf_counter() - start
+        if iterator is None:
+            stats.record(name, elapsed)
+            return None
+        return _timed_iteration(stats, name, iterator, elapsed)
+    return wrapper
+
+def _timed_iteration(stats, name, iterator, elapsed):
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        stats.record(name, elapsed)
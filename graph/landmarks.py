@@ -0,0 +1,155 @@
+from graph.shortest_paths import dijkstra
+from graph.csr import CSRGraph, label_ids
+import numpy as np
+import heapq, math, random
+
+class LandmarkIndex:
+    """
+    ALT (A*, landmarks, triangle inequality) index of a graph, for repeated point to point queries
+    Rows follow the order of the node labels, columns are the landmarks
+    forward[v, i] -> distance from landmark i to node v
+    backward[v, i] -> distance from node v to landmark i, the same array as forward if undirected
+    For any landmark L, d(v, t) >= d(L, t) - d(L, v) and d(v, t) >= d(v, L) - d(t, L),
+    the largest of these bounds is a consistent A* heuristic
+    Bounds stay valid when weights grow (distances only grow), so only decreases have to be propagated.
+    They are queued by defer and propagated by flush, once per batch of edits
+    """
+    def __init__(self, landmarks, forward, backward, labels):
+        self.landmarks = landmarks #rows of the landmarks
+        self.forward = forward
+        self.backward = backward
+        self.labels = labels #row -> label when the index was built
+        self._ids = None #label -> row, built when first needed
+        self.pending = [] #(node1, node2, weight) of the new or lighter edges not propagated yet
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = label_ids(self.labels)
+        return self._ids
+
+    @classmethod
+    def build(cls, csr, rev, count=16, seed=0):
+        """
+        Picks count landmarks by farthest selection over a CSRGraph (rev being its transpose):
+        the first one is the node farthest from a random node, every next one the node farthest
+        from all the landmarks so far, preferring nodes none of them reaches
+        """
+        n = len(csr)
+        count = min(count, n)
+        directed = rev is not csr
+        forward = np.empty((n, count))
+        backward = np.empty((n, count)) if directed else forward
+        landmarks = []
+        if count == 0:
+            return cls(landmarks, forward, backward, csr.labels)
+        start = random.Random(seed).randrange(n)
+        dist = np.array(dijkstra(csr, start)[0])
+        #Distance from the closest landmark, inf for nodes no landmark reaches
+        closest = np.full(n, math.inf)
+        for i in range(count):
+            candidates = closest if i else dist
+            unreached = np.isinf(candidates)
+            if i and unreached.any():
+                landmark = int(np.argmax(unreached))
+            else:
+                landmark = int(np.argmax(np.where(np.isinf(candidates), -1, candidates)))
+            landmarks.append(landmark)
+            forward[:, i] = dijkstra(csr, landmark)[0]
+            if directed:
+                backward[:, i] = dijkstra(rev, landmark)[0]
+            closest = np.minimum(closest, forward[:, i])
+        return cls(landmarks, forward, backward, csr.labels)
+
+    @property
+    def directed(self):
+        return self.backward is not self.forward
+
+    def heuristic(self, target):
+        '''
+        Returns the lower bound function row -> distance from the node at that row to the target row
+        '''
+        forward, backward = self.forward, self.backward
+        to_target, from_target = forward[target], backward[target]
+
+        def bound(row):
+            #inf - inf gives nan for landmarks reaching neither node, fmax ignores them
+            h = np.fmax.reduce(np.fmax(to_target - forward[row], backward[row] - from_target))
+            return h if h > 0 else 0
+        return bound
+
+    def _make_writable(self):
+        #Tables mapped from a saved index are read only, they are copied before the first update
+        if not self.forward.flags.writeable:
+            directed = self.directed
+            self.forward = self.forward.copy()
+            self.backward = self.backward.copy() if directed else self.forward
+
+    def add_node(self, label):
+        '''
+        Adds a row for a new node, which no landmark reaches yet
+        '''
+        self._make_writable()
+        directed = self.directed
+        self.ids[label] = len(self.forward)
+        self.forward = np.vstack((self.forward, np.full((1, len(self.landmarks)), math.inf)))
+        self.backward = np.vstack((self.backward, np.full((1, len(self.landmarks)), math.inf))) if directed else self.forward
+
+    def defer(self, node1, node2, weight):
+        '''
+        Queues a new or lighter edge node1 -> node2 of the given weight, propagated by the next flush
+        '''
+        self.pending.append((node1, node2, weight))
+
+    def flush(self, space, rev):
+        '''
+        Propagates the queued edges over the search graphs (AdjacencyIndex or CSRGraph) of the edited graph
+        and of its transpose. Each edge is propagated over the final graph, so later edges are taken into
+        account as well, and the tables are exact again once they all are
+        '''
+        pending, self.pending = self.pending, []
+        for node1, node2, weight in pending:
+            self.lower(space, rev, node1, node2, weight)
+
+    def lower(self, space, rev, node1, node2, weight):
+        '''
+        Propagates a new or lighter edge node1 -> node2 of the given weight (both ways if undirected)
+        through the tables, space / rev being the search graphs of the edited graph and of its transpose
+        Only the nodes whose distance to or from a landmark gets shorter are visited
+        '''
+        self._make_writable()
+        #The node ids of the CSR arrays are the rows, the adjacency index is keyed by label
+        row = int if isinstance(space, CSRGraph) else self.ids.__getitem__
+        key1, key2 = space.key(node1), space.key(node2)
+        row1, row2 = row(key1), row(key2)
+        for i in range(len(self.landmarks)):
+            self._relax(self.forward, i, space, row, key2, self.forward[row1, i] + weight)
+            if self.directed:
+                self._relax(self.backward, i, rev, row, key1, self.backward[row2, i] + weight)
+            else:
+                self._relax(self.forward, i, space, row, key1, self.forward[row2, i] + weight)
+
+    def _relax(self, table, column, space, row, key, dist):
+        '''
+        Dijkstra restricted to the nodes whose distance in a column of table improves, from key at dist
+        row -> maps the keys of space to the rows of table
+        '''
+        if not dist < table[row(key), column]:
+            return
+        table[row(key), column] = dist
+        counter = 0
+        heap = [(dist, counter, key)]
+        while heap:
+            d, _, u = heapq.heappop(heap)
+            if d > table[row(u), column]:
+                continue
+            for v, w in space.neighbours(u):
+                new_dist = d + w
+                r = row(v)
+                if new_dist < table[r, column]:
+                    table[r, column] = new_dist
+                    counter += 1
+                    heapq.heappush(heap, (new_dist, counter, v))
+
+    def __repr__(self):
+        return f"LandmarkIndex({len(self.landmarks)} landmarks, {len(self.forward)} nodes, directed={self.directed})"
@@ -0,0 +1,155 @@
+from itertools import islice
+from graph.csr import EdgeArrays
+import csv, os
+
+#Number of rows parsed at a time, only one chunk of rows is held in memory
+CHUNK_ROWS = 1 << 16
+
+def parse_number(text):
+    '''
+    Parses an int if possible, a float otherwise
+    '''
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+def delimiter_for(path):
+    '''
+    Guesses the delimiter from the file extension: "," for .csv, tab for .tsv, whitespace otherwise (None)
+    '''
+    extension = os.path.splitext(path)[1].lower()
+    return {".csv" : ",", ".tsv" : "\t"}.get(extension)
+
+def read_rows(file, delimiter=None, comment="#", header=False):
+    """
+    Yields the rows of a delimited text file as lists of strings, skipping blank and comment lines
+    delimiter -> a single character for csv style files (quoting is supported), None for whitespace
+    """
+    if delimiter is None:
+        rows = (line.split() for line in file)
+    else:
+        rows = csv.reader(file, delimiter=delimiter, skipinitialspace=True)
+    if header:
+        for row in rows:
+            if row and not row[0].startswith(comment):
+                break
+    for row in rows:
+        if not row or not row[0] or row[0].startswith(comment):
+            continue
+        yield row
+
+def append_rows(store, rows, node_type=str):
+    """
+    Appends a chunk of [node1, node2, (weight)] rows to an EdgeArrays store
+    Node labels are interned as they are seen and the ids go straight into the arrays
+    Raises ValueError if a row does not have exactly the columns of the store
+    """
+    count = 3 if store.weighted else 2
+    for row in rows:
+        if len(row) != count:
+            raise _malformed(store, f"row {row} has {len(row)} columns")
+    columns = [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows] if store.weighted else None
+    append_columns(store, *columns, node_type)
+
+def append_columns(store, sources, targets, weights=None, node_type=str):
+    """
+    Appends a chunk of edges, given as columns of strings, to an EdgeArrays store
+    """
+    intern = store.intern
+    #Restored if the chunk is malformed, with the labels and the weight type as they were
+    size, labels, weight_array = len(store), len(store.labels), store.weights
+    try:
+        store.src.extend(map(intern, map(node_type, sources)))
+        store.dst.extend(map(intern, map(node_type, targets)))
+        if store.weighted:
+            weights = list(map(parse_number, weights))
+            for weight in weights:
+                if not isinstance(weight, int):
+                    store._store_weight(weight)
+                    break
+            store.weights.extend(weights)
+    except ValueError as error:
+        #Keeps the store consistent, every array must hold one entry per edge
+        del store.src[size:]
+        del store.dst[size:]
+        if store.weighted:
+            store.weights = weight_array
+            del store.weights[size:]
+        for label in store.labels[labels:]:
+            del store.ids[label]
+        del store.labels[labels:]
+        raise _malformed(store, error) from error
+
+def _malformed(store, error):
+    expected = "node1 node2 weight" if store.weighted else "node1 node2"
+    return ValueError(f"Malformed edge list row, expected {expected}: {error}")
+
+def read_edgelist(path, weighted=False, delimiter=None, comment="#", header=False, node_type=str, chunk_size=CHUNK_ROWS):
+    """
+    Streams an edge list file into an EdgeArrays store, one row per edge: node1 node2 (weight)
+    The file is read in chunks of chunk_size rows, so no per edge lists are kept in memory
+    delimiter -> None guesses from the extension: "," for .csv, tab for .tsv, whitespace otherwise
+    comment -> lines starting with it are skipped
+    header -> True if the first row holds column names
+    node_type -> applied to the node labels, e.g. int for numbered nodes
+    Weights are read as ints, or floats once a non integer weight is seen
+    """
+    if delimiter is None:
+        delimiter = delimiter_for(path)
+    store = EdgeArrays(weighted=weighted)
+    with open(path, newline="") as file:
+        if delimiter is None:
+            _read_whitespace(file, store, comment, header, node_type, chunk_size)
+            return store
+        rows = read_rows(file, delimiter, comment, header)
+        chunk = list(islice(rows, chunk_size))
+        while chunk:
+            append_rows(store, chunk, node_type)
+            chunk = list(islice(rows, chunk_size))
+    return store
+
+def _read_whitespace(file, store, comment, header, node_type, chunk_size):
+    '''
+    Whitespace separated edge lists are split a whole chunk at a time, the columns are then
+    taken by slicing the tokens. Every line end is split as a marker token, so a line with a
+    wrong number of columns shifts the markers out of place even if the chunk has the right
+    number of tokens. Chunks with comments, blank or ragged lines are read row by row
+    '''
+    columns = 3 if store.weighted else 2
+    #Tokens of a row and its line end marker
+    stride = columns + 1
+    if header:
+        next(read_rows(file, None, comment), None)
+    lines = list(islice(file, chunk_size))
+    while lines:
+        text = "".join(lines)
+        #The last line of the file may have no line end
+        tokens = (text if text.endswith("\n") else text + "\n").replace("\n", " \0 ").split()
+        if ((not comment or comment not in text) and "\0" not in text and len(tokens) == stride * len(lines)
+                and tokens[columns::stride].count("\0") == len(lines)):
+            weights = tokens[2::stride] if store.weighted else None
+            append_columns(store, tokens[0::stride], tokens[1::stride], weights, node_type)
+        else:
+            append_rows(store, list(read_rows(lines, None, comment)), node_type)
+        lines = list(islice(file, chunk_size))
+
+def read_dependence_table(path, delimiter=None, comment="#", header=True, precursor_delimiter=";"):
+    """
+    Reads a dependence table from a file with one activity per row: activity, duration, precursors
+    precursors -> the precursor activities separated by precursor_delimiter, empty if there are none
+    Returns {activity : [list_of_precursors, duration]}
+    """
+    if delimiter is None:
+        delimiter = delimiter_for(path) or ","
+    dependence_table = dict()
+    with open(path, newline="") as file:
+        for row in read_rows(file, delimiter, comment, header):
+            if len(row) < 2:
+                raise ValueError(f"Malformed dependence table row {row}, expected activity, duration, precursors")
+            activity, duration = row[0], parse_number(row[1])
+            precursors = []
+            if len(row) > 2:
+                precursors = [p.strip() for p in row[2].split(precursor_delimiter) if p.strip()]
+            dependence_table[activity] = [precursors, duration]
+    return dependence_table
@@ -0,0 +1,434 @@
+from graph import instrument
+import math
+
+#Odd sets up to this size are paired with the bitmask dynamic programme, larger ones with the
+#blossom algorithm. The programme is O(2^k k), faster than the blossom's bookkeeping for small k
+BITMASK_LIMIT = 14
+
+def max_weight_matching(edges, maxcardinality=False):
+    """
+    Edmonds' blossom algorithm for a maximum weight matching in a general graph, O(V^3)
+    (Galil's primal-dual formulation, after Joris van Rantwijk's reference implementation)
+    edges -> list of (i, j, weight) with vertices numbered 0..n-1
+    If maxcardinality is True, only matchings of maximum cardinality are considered
+    Returns mate, where mate[i] is the vertex matched to i, -1 if i is unmatched
+    """
+    if not edges:
+        return []
+    nedge = len(edges)
+    nvertex = 1 + max(max(i, j) for i, j, w in edges)
+    maxweight = max(0, max(w for i, j, w in edges))
+    integral = all(isinstance(w, int) for i, j, w in edges)
+    #endpoint[p] is the vertex at end p of the edges, edge k has ends 2k and 2k + 1
+    endpoint = [edges[p // 2][p % 2] for p in range(2 * nedge)]
+    #neighbend[v] lists the remote ends of the edges of v
+    neighbend = [[] for v in range(nvertex)]
+    for k, (i, j, w) in enumerate(edges):
+        neighbend[i].append(2 * k + 1)
+        neighbend[j].append(2 * k)
+    mate = [-1] * nvertex
+    #Top level blossoms (and vertices) are labelled 1 (S), 2 (T) or 0 (free)
+    label = [0] * (2 * nvertex)
+    labelend = [-1] * (2 * nvertex)
+    inblossom = list(range(nvertex))
+    blossomparent = [-1] * (2 * nvertex)
+    blossomchilds = [None] * (2 * nvertex)
+    blossombase = list(range(nvertex)) + [-1] * nvertex
+    blossomendps = [None] * (2 * nvertex)
+    bestedge = [-1] * (2 * nvertex)
+    blossombestedges = [None] * (2 * nvertex)
+    unusedblossoms = list(range(nvertex, 2 * nvertex))
+    dualvar = [maxweight] * nvertex + [0] * nvertex
+    allowedge = [False] * nedge
+    queue = []
+
+    def slack(k):
+        i, j, w = edges[k]
+        return dualvar[i] + dualvar[j] - 2 * w
+
+    def blossom_leaves(b):
+        if b < nvertex:
+            yield b
+        else:
+            for t in blossomchilds[b]:
+                if t < nvertex:
+                    yield t
+                else:
+                    yield from blossom_leaves(t)
+
+    def assign_label(w, t, p):
+        b = inblossom[w]
+        label[w] = label[b] = t
+        labelend[w] = labelend[b] = p
+        bestedge[w] = bestedge[b] = -1
+        if t == 1:
+            queue.extend(blossom_leaves(b))
+        elif t == 2:
+            base = blossombase[b]
+            assign_label(endpoint[mate[base]], 1, mate[base] ^ 1)
+
+    def scan_blossom(v, w):
+        #Traces back from v and w to find a new blossom or an augmenting path
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = inblossom[v]
+            if label[b] & 4:
+                base = blossombase[b]
+                break
+            path.append(b)
+            label[b] = 5
+            if labelend[b] == -1:
+                v = -1
+            else:
+                v = endpoint[labelend[b]]
+                b = inblossom[v]
+                v = endpoint[labelend[b]]
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            label[b] = 1
+        return base
+
+    def add_blossom(base, k):
+        v, w, wt = edges[k]
+        bb = inblossom[base]
+        bv = inblossom[v]
+        bw = inblossom[w]
+        b = unusedblossoms.pop()
+        blossombase[b] = base
+        blossomparent[b] = -1
+        blossomparent[bb] = b
+        blossomchilds[b] = path = []
+        blossomendps[b] = endps = []
+        while bv != bb:
+            blossomparent[bv] = b
+            path.append(bv)
+            endps.append(labelend[bv])
+            v = endpoint[labelend[bv]]
+            bv = inblossom[v]
+        path.append(bb)
+        path.reverse()
+        endps.reverse()
+        endps.append(2 * k)
+        while bw != bb:
+            blossomparent[bw] = b
+            path.append(bw)
+            endps.append(labelend[bw] ^ 1)
+            w = endpoint[labelend[bw]]
+            bw = inblossom[w]
+        label[b] = 1
+        labelend[b] = labelend[bb]
+        dualvar[b] = 0
+        for v in blossom_leaves(b):
+            if label[inblossom[v]] == 2:
+                queue.append(v)
+            inblossom[v] = b
+        #Least slack edges from the new blossom to every neighbouring S blossom
+        bestedgeto = [-1] * (2 * nvertex)
+        for bv in path:
+            if blossombestedges[bv] is None:
+                nblists = [[p // 2 for p in neighbend[v]] for v in blossom_leaves(bv)]
+            else:
+                nblists = [blossombestedges[bv]]
+            for nblist in nblists:
+                for k in nblist:
+                    i, j, wt = edges[k]
+                    if inblossom[j] == b:
+                        i, j = j, i
+                    bj = inblossom[j]
+                    if bj != b and label[bj] == 1 and (bestedgeto[bj] == -1 or slack(k) < slack(bestedgeto[bj])):
+                        bestedgeto[bj] = k
+            blossombestedges[bv] = None
+            bestedge[bv] = -1
+        blossombestedges[b] = [k for k in bestedgeto if k != -1]
+        bestedge[b] = -1
+        for k in blossombestedges[b]:
+            if bestedge[b] == -1 or slack(k) < slack(bestedge[b]):
+                bestedge[b] = k
+
+    def expand_blossom(b, endstage):
+        for s in blossomchilds[b]:
+            blossomparent[s] = -1
+            if s < nvertex:
+                inblossom[s] = s
+            elif endstage and dualvar[s] == 0:
+                expand_blossom(s, endstage)
+            else:
+                for v in blossom_leaves(s):
+                    inblossom[v] = s
+        if not endstage and label[b] == 2:
+            #Relabel the sub-blossoms along the even path through the expanded T blossom
+            entrychild = inblossom[endpoint[labelend[b] ^ 1]]
+            j = blossomchilds[b].index(entrychild)
+            if j & 1:
+                j -= len(blossomchilds[b])
+                jstep = 1
+                endptrick = 0
+            else:
+                jstep = -1
+                endptrick = 1
+            p = labelend[b]
+            while j != 0:
+                label[endpoint[p ^ 1]] = 0
+                label[endpoint[blossomendps[b][j - endptrick] ^ endptrick ^ 1]] = 0
+                assign_label(endpoint[p ^ 1], 2, p)
+                allowedge[blossomendps[b][j - endptrick] // 2] = True
+                j += jstep
+                p = blossomendps[b][j - endptrick] ^ endptrick
+                allowedge[p // 2] = True
+                j += jstep
+            bv = blossomchilds[b][j]
+            label[endpoint[p ^ 1]] = label[bv] = 2
+            labelend[endpoint[p ^ 1]] = labelend[bv] = p
+            bestedge[bv] = -1
+            j += jstep
+            while blossomchilds[b][j] != entrychild:
+                bv = blossomchilds[b][j]
+                if label[bv] == 1:
+                    j += jstep
+                    continue
+                for v in blossom_leaves(bv):
+                    if label[v] != 0:
+                        break
+                if label[v] != 0:
+                    label[v] = 0
+                    label[endpoint[mate[blossombase[bv]]]] = 0
+                    assign_label(v, 2, labelend[v])
+                j += jstep
+        label[b] = labelend[b] = -1
+        blossomchilds[b] = blossomendps[b] = None
+        blossombase[b] = -1
+        blossombestedges[b] = None
+        bestedge[b] = -1
+        unusedblossoms.append(b)
+
+    def augment_blossom(b, v):
+        #Swaps matched and unmatched edges inside blossom b so that v becomes its base
+        t = v
+        while blossomparent[t] != b:
+            t = blossomparent[t]
+        if t >= nvertex:
+            augment_blossom(t, v)
+        i = j = blossomchilds[b].index(t)
+        if i & 1:
+            j -= len(blossomchilds[b])
+            jstep = 1
+            endptrick = 0
+        else:
+            jstep = -1
+            endptrick = 1
+        while j != 0:
+            j += jstep
+            t = blossomchilds[b][j]
+            p = blossomendps[b][j - endptrick] ^ endptrick
+            if t >= nvertex:
+                augment_blossom(t, endpoint[p])
+            j += jstep
+            t = blossomchilds[b][j]
+            if t >= nvertex:
+                augment_blossom(t, endpoint[p ^ 1])
+            mate[endpoint[p]] = p ^ 1
+            mate[endpoint[p ^ 1]] = p
+        blossomchilds[b] = blossomchilds[b][i:] + blossomchilds[b][:i]
+        blossomendps[b] = blossomendps[b][i:] + blossomendps[b][:i]
+        blossombase[b] = blossombase[blossomchilds[b][0]]
+
+    def augment_matching(k):
+        v, w, wt = edges[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = inblossom[s]
+                if bs >= nvertex:
+                    augment_blossom(bs, s)
+                mate[s] = p
+                if labelend[bs] == -1:
+                    break
+                t = endpoint[labelend[bs]]
+                bt = inblossom[t]
+                s = endpoint[labelend[bt]]
+                j = endpoint[labelend[bt] ^ 1]
+                if bt >= nvertex:
+                    augment_blossom(bt, j)
+                mate[j] = labelend[bt]
+                p = labelend[bt] ^ 1
+
+    #Each stage finds one augmenting path
+    for stage in range(nvertex):
+        label[:] = [0] * (2 * nvertex)
+        bestedge[:] = [-1] * (2 * nvertex)
+        blossombestedges[nvertex:] = [None] * nvertex
+        allowedge[:] = [False] * nedge
+        queue[:] = []
+        for v in range(nvertex):
+            if mate[v] == -1 and label[inblossom[v]] == 0:
+                assign_label(v, 1, -1)
+        augmented = False
+        while True:
+            while queue and not augmented:
+                v = queue.pop()
+                for p in neighbend[v]:
+                    k = p // 2
+                    w = endpoint[p]
+                    if inblossom[v] == inblossom[w]:
+                        continue
+                    if not allowedge[k]:
+                        kslack = slack(k)
+                        if kslack <= 0:
+                            allowedge[k] = True
+                    if allowedge[k]:
+                        if label[inblossom[w]] == 0:
+                            assign_label(w, 2, p ^ 1)
+                        elif label[inblossom[w]] == 1:
+                            base = scan_blossom(v, w)
+                            if base >= 0:
+                                add_blossom(base, k)
+                            else:
+                                augment_matching(k)
+                                augmented = True
+                                break
+                        elif label[w] == 0:
+                            label[w] = 2
+                            labelend[w] = p ^ 1
+                    elif label[inblossom[w]] == 1:
+                        b = inblossom[v]
+                        if bestedge[b] == -1 or kslack < slack(bestedge[b]):
+                            bestedge[b] = k
+                    elif label[w] == 0:
+                        if bestedge[w] == -1 or kslack < slack(bestedge[w]):
+                            bestedge[w] = k
+            if augmented:
+                break
+            #No augmenting path with the current duals, find the largest dual update
+            deltatype = -1
+            delta = deltaedge = deltablossom = None
+            if not maxcardinality:
+                deltatype = 1
+                delta = min(dualvar[:nvertex])
+            for v in range(nvertex):
+                if label[inblossom[v]] == 0 and bestedge[v] != -1:
+                    d = slack(bestedge[v])
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 2
+                        deltaedge = bestedge[v]
+            for b in range(2 * nvertex):
+                if blossomparent[b] == -1 and label[b] == 1 and bestedge[b] != -1:
+                    kslack = slack(bestedge[b])
+                    d = kslack // 2 if integral else kslack / 2
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 3
+                        deltaedge = bestedge[b]
+            for b in range(nvertex, 2 * nvertex):
+                if blossombase[b] >= 0 and blossomparent[b] == -1 and label[b] == 2 and \
+                    (deltatype == -1 or dualvar[b] < delta):
+                    delta = dualvar[b]
+                    deltatype = 4
+                    deltablossom = b
+            if deltatype == -1:
+                #No further improvement possible, the matching has maximum cardinality
+                deltatype = 1
+                delta = max(0, min(dualvar[:nvertex]))
+            for v in range(nvertex):
+                if label[inblossom[v]] == 1:
+                    dualvar[v] -= delta
+                elif label[inblossom[v]] == 2:
+                    dualvar[v] += delta
+            for b in range(nvertex, 2 * nvertex):
+                if blossombase[b] >= 0 and blossomparent[b] == -1:
+                    if label[b] == 1:
+                        dualvar[b] += delta
+                    elif label[b] == 2:
+                        dualvar[b] -= delta
+            if deltatype == 1:
+                break
+            elif deltatype == 2:
+                allowedge[deltaedge] = True
+                i, j, wt = edges[deltaedge]
+                if label[inblossom[i]] == 0:
+                    i, j = j, i
+                queue.append(i)
+            elif deltatype == 3:
+                allowedge[deltaedge] = True
+                i, j, wt = edges[deltaedge]
+                queue.append(i)
+            elif deltatype == 4:
+                expand_blossom(deltablossom, False)
+        if not augmented:
+            break
+        #Expand the S blossoms whose dual variable dropped to zero
+        for b in range(nvertex, 2 * nvertex):
+            if blossomparent[b] == -1 and blossombase[b] >= 0 and label[b] == 1 and dualvar[b] == 0:
+                expand_blossom(b, True)
+    for v in range(nvertex):
+        if mate[v] >= 0:
+            mate[v] = endpoint[mate[v]]
+    return mate
+
+def _bitmask_matching(weights):
+    '''
+    Minimum weight perfect matching of a small complete graph, given as a weight matrix
+    Dynamic programme over subsets: the lowest unmatched vertex is paired with every other one
+    '''
+    k = len(weights)
+    full = (1 << k) - 1
+    cost = [math.inf] * (1 << k)
+    choice = [0] * (1 << k)
+    cost[0] = 0
+    for mask in range(1, full + 1):
+        if bin(mask).count("1") % 2:
+            continue
+        low = (mask & -mask).bit_length() - 1
+        rest = mask ^ (1 << low)
+        row = weights[low]
+        best, best_j = math.inf, -1
+        j_mask = rest
+        while j_mask:
+            j = (j_mask & -j_mask).bit_length() - 1
+            j_mask ^= 1 << j
+            c = row[j] + cost[rest ^ (1 << j)]
+            if c < best:
+                best, best_j = c, j
+        cost[mask] = best
+        choice[mask] = best_j
+    if cost[full] == math.inf:
+        return None
+    pairs = []
+    mask = full
+    while mask:
+        low = (mask & -mask).bit_length() - 1
+        j = choice[mask]
+        pairs.append((low, j))
+        mask ^= (1 << low) | (1 << j)
+    return pairs
+
+def min_weight_perfect_matching(nodes, weight):
+    """
+    Pairs up an even number of nodes so that the total weight of the pairs is minimal
+    weight(node1, node2) -> weight of pairing the two nodes, math.inf if they cannot be paired
+    Uses a bitmask dynamic programme for small sets and the blossom algorithm otherwise
+    Returns a list of (node1, node2) pairs, or None if no perfect matching exists
+    """
+    k = len(nodes)
+    if k % 2:
+        return None
+    if k == 0:
+        return []
+    weights = [[weight(u, v) if u != v else math.inf for v in nodes] for u in nodes]
+    if k <= BITMASK_LIMIT:
+        #Every subset of an even size s pairs its lowest vertex with each of the s - 1 others
+        instrument.count("matching.partitions", sum(math.comb(k, s) * (s - 1) for s in range(2, k + 1, 2)))
+        pairs = _bitmask_matching(weights)
+        return None if pairs is None else [(nodes[i], nodes[j]) for i, j in pairs]
+    #Maximum weight matching of maximum cardinality on (M - weight) is a minimum weight perfect matching
+    finite = [weights[i][j] for i in range(k) for j in range(i + 1, k) if weights[i][j] != math.inf]
+    if not finite:
+        return None
+    top = max(finite) + 1
+    edges = [(i, j, top - weights[i][j]) for i in range(k) for j in range(i + 1, k) if weights[i][j] != math.inf]
+    instrument.count("matching.blossom_edges", len(edges))
+    mate = max_weight_matching(edges, maxcardinality=True)
+    if len(mate) < k or -1 in mate:
+        return None
+    return [(nodes[i], nodes[mate[i]]) for i in range(k) if i < mate[i]]
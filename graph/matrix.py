@@ -0,0 +1,131 @@
+import numpy as np
+
+REDUCTIONS = ("sum", "min", "count")
+
+class COOMatrix:
+    """
+    Sparse matrix in coordinate format: data[k] is the value of the cell (row[k], col[k])
+    Only the cells holding an edge are stored, so a stored 0 is an edge of weight 0
+    The attributes have the same names as in scipy.sparse, whose matrices are accepted wherever these are
+    """
+    def __init__(self, row, col, data, shape):
+        self.row = row
+        self.col = col
+        self.data = data
+        self.shape = shape
+
+    @classmethod
+    def from_dense(cls, matrix):
+        '''
+        Sparse form of a dense adjacency matrix (2d list or array), where 0 means no edge
+        '''
+        matrix = np.asarray(matrix)
+        row, col = np.nonzero(matrix)
+        return cls(row, col, matrix[row, col], matrix.shape)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def tocoo(self):
+        return self
+
+    def tocsr(self):
+        n = self.shape[0]
+        order = np.lexsort((self.col, self.row))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.row, minlength=n), out=indptr[1:])
+        return CSRMatrix(indptr, self.col[order], self.data[order], self.shape)
+
+    def toarray(self):
+        '''
+        Dense array with 0 in the empty cells, cells stored more than once are summed
+        '''
+        dense = np.zeros(self.shape, dtype=self.data.dtype)
+        np.add.at(dense, (self.row, self.col), self.data)
+        return dense
+
+    def __repr__(self):
+        return f"COOMatrix(shape={self.shape}, nnz={self.nnz}, dtype={self.data.dtype})"
+
+class CSRMatrix:
+    """
+    Sparse matrix in compressed sparse row format: the cells of row i are indices[indptr[i]:indptr[i + 1]]
+    with the values data[indptr[i]:indptr[i + 1]]
+    """
+    def __init__(self, indptr, indices, data, shape):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.shape = shape
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def tocoo(self):
+        row = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        return COOMatrix(row, self.indices, self.data, self.shape)
+
+    def tocsr(self):
+        return self
+
+    def toarray(self):
+        return self.tocoo().toarray()
+
+    def __repr__(self):
+        return f"CSRMatrix(shape={self.shape}, nnz={self.nnz}, dtype={self.data.dtype})"
+
+def as_coo(matrix):
+    '''
+    Returns the coordinates (row, col, data) and size of a sparse matrix (anything with a tocoo method)
+    or of a dense one (2d list or array, 0 meaning no edge)
+    '''
+    coo = matrix.tocoo() if hasattr(matrix, "tocoo") else COOMatrix.from_dense(matrix)
+    return np.asarray(coo.row, dtype=np.int64), np.asarray(coo.col, dtype=np.int64), np.asarray(coo.data), coo.shape[0]
+
+def reduce_cells(row, col, data, n, reduce="sum"):
+    '''
+    Merges the entries that fall on the same cell (parallel edges) with a reduction:
+    "sum" adds their weights, "min" keeps the lightest, "count" counts them
+    Returns the cells in row major order, as (row, col, data) arrays without duplicates
+    '''
+    if reduce not in REDUCTIONS:
+        raise ValueError(f"Unknown reduction {reduce}, expected one of {REDUCTIONS}")
+    if reduce == "count":
+        data = np.ones(len(row), dtype=np.int64)
+    key = row * n + col
+    order = np.argsort(key, kind="stable")
+    key, data = key[order], data[order]
+    if len(key) == 0:
+        return row[:0], col[:0], data
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    if reduce == "min":
+        data = np.minimum.reduceat(data, starts)
+    else:
+        data = np.add.reduceat(data, starts)
+    key = key[starts]
+    return key // n, key % n, data
+
+def adjacency_coo(store, directed, reduce="sum", dtype=None):
+    '''
+    Adjacency matrix of an EdgeArrays store as a COOMatrix, rows and columns being the node ids
+    Undirected edges fill both of their cells, loops their diagonal cell once
+    Unweighted edges weigh 1
+    '''
+    n = len(store.labels)
+    src = np.asarray(store.src, dtype=np.int64)
+    dst = np.asarray(store.dst, dtype=np.int64)
+    if store.weighted:
+        weights = np.asarray(store.weights)
+    else:
+        weights = np.ones(len(store), dtype=np.int64)
+    if not directed:
+        #The mirrored cell of every edge but the loops
+        mirrored = src != dst
+        src, dst = np.concatenate((src, dst[mirrored])), np.concatenate((dst, src[mirrored]))
+        weights = np.concatenate((weights, weights[mirrored]))
+    row, col, data = reduce_cells(src, dst, weights, n, reduce)
+    if dtype is not None:
+        data = data.astype(dtype)
+    return COOMatrix(row, col, data, (n, n))
@@ -0,0 +1,240 @@
+from graph.csr import typecode
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from array import array
+import numpy as np
+import heapq, os
+
+#Kruskal walks the sorted edges in blocks of this many positions, so only one block is boxed at a time
+SCAN_BLOCK = 1 << 16
+
+class DisjointSet:
+    """
+    Union-find over the ints 0..n-1, with path compression and union by rank
+    """
+    def __init__(self, n):
+        self.parent = array('q', range(n))
+        self.rank = bytearray(n)
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        #Points every node on the way directly at the root
+        while parent[x] != root:
+            next_x = parent[x]
+            parent[x] = root
+            x = next_x
+        return root
+
+    def union(self, x, y):
+        """
+        Merges the sets of x and y, returns False if they were already the same set
+        """
+        x, y = self.find(x), self.find(y)
+        if x == y:
+            return False
+        if self.rank[x] < self.rank[y]:
+            x, y = y, x
+        self.parent[y] = x
+        if self.rank[x] == self.rank[y]:
+            self.rank[x] += 1
+        return True
+
+def _weights_array(store):
+    return np.frombuffer(store.weights, dtype=np.int64 if typecode(store.weights) == 'q' else np.float64)
+
+def kruskal_forest(store):
+    """
+    Kruskal's algorithm over an EdgeArrays store, edges are taken as undirected
+    Edges are ordered by (weight, position), so equal weights are resolved the same way by every engine
+    Returns the positions of the edges of a minimum spanning forest
+    """
+    n = len(store.labels)
+    m = len(store)
+    if m == 0:
+        return []
+    order = np.argsort(_weights_array(store), kind="stable")
+    src = np.frombuffer(store.src, dtype=np.int64)
+    dst = np.frombuffer(store.dst, dtype=np.int64)
+    sets = DisjointSet(n)
+    tree = []
+    for start in range(0, m, SCAN_BLOCK):
+        block = order[start:start + SCAN_BLOCK]
+        for i, u, v in zip(block.tolist(), src[block].tolist(), dst[block].tolist()):
+            if sets.union(u, v):
+                tree.append(i)
+                #A spanning tree is complete, the remaining edges can only form cycles
+                if len(tree) == n - 1:
+                    return tree
+    return tree
+
+def prim_forest(csr):
+    """
+    Prim's algorithm with a binary heap over a CSRGraph, restarted in every component
+    Heap entries are (weight, edge id, node), so ties follow the edge positions as in Kruskal
+    Returns the edge ids of a minimum spanning forest
+    """
+    n = len(csr)
+    indptr, indices, edge_ids = csr.indptr, csr.indices, csr.edge_ids
+    weights = csr.weights
+    in_tree = bytearray(n)
+    tree = []
+    for root in range(n):
+        if in_tree[root]:
+            continue
+        in_tree[root] = 1
+        heap = [(weights[pos], edge_ids[pos], indices[pos]) for pos in range(indptr[root], indptr[root + 1])]
+        heapq.heapify(heap)
+        while heap:
+            w, edge_id, u = heapq.heappop(heap)
+            #Stale entry, u was joined through a lighter edge
+            if in_tree[u]:
+                continue
+            in_tree[u] = 1
+            tree.append(edge_id)
+            for pos in range(indptr[u], indptr[u + 1]):
+                v = indices[pos]
+                if not in_tree[v]:
+                    heapq.heappush(heap, (weights[pos], edge_ids[pos], v))
+    return tree
+
+#Rank of "no edge" in the per component minimum, above any real rank
+NO_EDGE = np.iinfo(np.int64).max
+
+def _cheapest_edges(comp, src, dst, ranks):
+    '''
+    Returns the rank of the lowest ranked edge leaving every component among the given edges,
+    NO_EDGE for components without one
+    '''
+    cu = comp[src]
+    cv = comp[dst]
+    cross = cu != cv
+    ranks = ranks[cross]
+    best = np.full(len(comp), NO_EDGE, dtype=np.int64)
+    np.minimum.at(best, cu[cross], ranks)
+    np.minimum.at(best, cv[cross], ranks)
+    return best
+
+_shared = None
+
+def _share_edges(src, dst, ranks, n):
+    '''
+    Copies the edge arrays into one shared memory block, followed by room for the component labels
+    Returns the block and the layout the workers need to map the arrays back
+    '''
+    parts = [("src", src), ("dst", dst), ("ranks", ranks), ("comp", None)]
+    block = shared_memory.SharedMemory(create=True, size=8 * (3 * len(src) + n) or 1)
+    layout = []
+    offset = 0
+    for name, values in parts:
+        count = n if values is None else len(values)
+        if values is not None:
+            np.ndarray(count, dtype=np.int64, buffer=block.buf, offset=offset)[:] = values
+        layout.append((name, offset, count))
+        offset += count * 8
+    return block, layout
+
+def _map_shared_edges(buf, layout):
+    return {name : np.ndarray(count, dtype=np.int64, buffer=buf, offset=offset) for name, offset, count in layout}
+
+def _attach_shared_edges(name, layout):
+    '''
+    Worker initializer: maps the shared edge arrays without copying them
+    '''
+    global _shared
+    #The parent owns the block and unlinks it once the pool is done
+    block = shared_memory.SharedMemory(name=name)
+    _shared = (block, _map_shared_edges(block.buf, layout))
+
+def _cheapest_task(start, end):
+    block, arrays = _shared
+    best = _cheapest_edges(arrays["comp"], arrays["src"][start:end], arrays["dst"][start:end], arrays["ranks"][start:end])
+    #Only the components with an edge in the range are sent back
+    c = np.flatnonzero(best != NO_EDGE)
+    return c, best[c]
+
+def _merge_components(comp, c, e, src, dst):
+    '''
+    Joins every component to the component at the other end of its cheapest edge
+    The cheapest edges form trees whose only cycles are pairs choosing the same edge,
+    so breaking those pairs and jumping pointers finds the new component of every node
+    '''
+    other = comp[src[e]]
+    same = other == c
+    other[same] = comp[dst[e]][same]
+    target = np.arange(len(comp), dtype=np.int64)
+    target[c] = other
+    mutual = (target[other] == c) & (c < other)
+    target[c[mutual]] = c[mutual]
+    while True:
+        jumped = target[target]
+        if np.array_equal(jumped, target):
+            break
+        target = jumped
+    return target[comp]
+
+def boruvka_forest(store, processes=None, chunk_size=1 << 20):
+    """
+    Borůvka's algorithm over an EdgeArrays store, edges are taken as undirected
+    Every round finds the cheapest edge leaving each component with NumPy and merges along them,
+    so there are at most log2(V) rounds. Edges are ranked by (weight, position) as in Kruskal
+    With processes > 1 (os.cpu_count() if None) the edges are put in shared memory once and every
+    round splits the search across a process pool in ranges of chunk_size edges, with at most one
+    process per range. A single range of edges is searched in process
+    Without a pool, edges inside a component are dropped after every round
+    Returns the positions of the edges of a minimum spanning forest
+    """
+    n = len(store.labels)
+    m = len(store)
+    if m == 0:
+        return []
+    src = np.frombuffer(store.src, dtype=np.int64)
+    dst = np.frombuffer(store.dst, dtype=np.int64)
+    order = np.argsort(_weights_array(store), kind="stable")
+    ranks = np.empty(m, dtype=np.int64)
+    ranks[order] = np.arange(m, dtype=np.int64)
+    comp = np.arange(n, dtype=np.int64)
+    tree = []
+    if processes is None:
+        processes = os.cpu_count() or 1
+    #More processes than ranges of edges would only add startup time
+    processes = min(processes, -(-m // chunk_size))
+    if processes <= 1:
+        live_src, live_dst, live_ranks = src, dst, ranks
+        while True:
+            best = _cheapest_edges(comp, live_src, live_dst, live_ranks)
+            c = np.flatnonzero(best != NO_EDGE)
+            if len(c) == 0:
+                break
+            e = order[best[c]]
+            tree.append(e)
+            comp = _merge_components(comp, c, e, src, dst)
+            #Edges inside a component can never be picked again
+            live = comp[live_src] != comp[live_dst]
+            live_src, live_dst, live_ranks = live_src[live], live_dst[live], live_ranks[live]
+        return np.unique(np.concatenate(tree)).tolist() if tree else []
+    block, layout = _share_edges(src, dst, ranks, n)
+    shared_comp = _map_shared_edges(block.buf, layout)["comp"]
+    pool = ProcessPoolExecutor(processes, initializer=_attach_shared_edges, initargs=(block.name, layout))
+    try:
+        while True:
+            #Workers only read the labels while a round is running
+            shared_comp[:] = comp
+            futures = [pool.submit(_cheapest_task, start, min(start + chunk_size, m)) for start in range(0, m, chunk_size)]
+            best = np.full(n, NO_EDGE, dtype=np.int64)
+            for future in futures:
+                np.minimum.at(best, *future.result())
+            c = np.flatnonzero(best != NO_EDGE)
+            if len(c) == 0:
+                break
+            e = order[best[c]]
+            tree.append(e)
+            comp = _merge_components(comp, c, e, src, dst)
+        return np.unique(np.concatenate(tree)).tolist() if tree else []
+    finally:
+        pool.shutdown(cancel_futures=True)
+        del shared_comp
+        block.close()
+        block.unlink()
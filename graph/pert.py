@@ -0,0 +1,169 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import os
+
+#Scenarios are evaluated in chunks small enough for the event time tables to hold about this many cells
+CHUNK_CELLS = 1 << 22
+
+class ThreePoint:
+    """
+    PERT distribution of a three point estimate: a beta distribution between the optimistic
+    and pessimistic durations, with its mode at the most likely one
+    Mean is (optimistic + 4 * likely + pessimistic) / 6
+    """
+    def __init__(self, optimistic, likely, pessimistic):
+        if not optimistic <= likely <= pessimistic:
+            raise ValueError(f"Three point estimate must satisfy optimistic <= likely <= pessimistic, got {(optimistic, likely, pessimistic)}")
+        self.optimistic = optimistic
+        self.likely = likely
+        self.pessimistic = pessimistic
+
+    def mean(self):
+        return (self.optimistic + 4 * self.likely + self.pessimistic) / 6
+
+    def __call__(self, rng, size):
+        spread = self.pessimistic - self.optimistic
+        if spread == 0:
+            return np.full(size, float(self.likely))
+        alpha = 1 + 4 * (self.likely - self.optimistic) / spread
+        beta = 1 + 4 * (self.pessimistic - self.likely) / spread
+        return self.optimistic + spread * rng.beta(alpha, beta, size)
+
+def sampler(distribution):
+    '''
+    Turns a duration distribution into a function (rng, size) -> array of samples
+    distribution -> a number (fixed duration), a tuple (optimistic, likely, pessimistic),
+    an object with a scipy.stats style rvs(size, random_state) method, or a function (rng, size) -> array
+    '''
+    if isinstance(distribution, (int, float)):
+        return ThreePoint(distribution, distribution, distribution)
+    if isinstance(distribution, (tuple, list)):
+        return ThreePoint(*distribution)
+    if hasattr(distribution, "rvs"):
+        return _RvsSampler(distribution)
+    if callable(distribution):
+        return distribution
+    raise TypeError(f"Unsupported duration distribution {distribution!r}")
+
+class _RvsSampler:
+    def __init__(self, distribution):
+        self.distribution = distribution
+
+    def __call__(self, rng, size):
+        return self.distribution.rvs(size=size, random_state=rng)
+
+class PertModel:
+    """
+    Arcs of an activity network as (tail, head, column) over the positions of its events in topological order,
+    sorted by tail, with the duration sampler of every activity
+    Activities missing from distributions keep the weight of their arc as a fixed duration
+    column -> for every arc, the index of its activity in activities, -1 for dummies
+    """
+    def __init__(self, order, edges, distributions):
+        position = {node : i for i, node in enumerate(order)}
+        arcs = sorted(((position[edge[0]], position[edge[1]], edge[3]) for edge in edges), key=lambda arc: arc[0])
+        weights = {edge[3] : edge[2] for edge in edges}
+        self.n = len(order)
+        self.activities = [activity for tail, head, activity in arcs if activity != ""]
+        index = {activity : i for i, activity in enumerate(self.activities)}
+        self.arcs = [(tail, head, index.get(activity, -1)) for tail, head, activity in arcs]
+        unknown = set(distributions) - set(index)
+        if unknown:
+            raise KeyError(f"No activities {sorted(unknown, key=str)} in network")
+        self.samplers = [sampler(distributions.get(activity, weights[activity])) for activity in self.activities]
+
+    def sample(self, rng, width):
+        '''
+        Returns an array of shape (activities, width) with a duration of every activity in every scenario
+        '''
+        samples = np.empty((len(self.activities), width))
+        for i, activity_sampler in enumerate(self.samplers):
+            samples[i] = activity_sampler(rng, width)
+        return samples
+
+    def evaluate(self, samples):
+        '''
+        Max-plus forward and backward passes over all the scenarios (columns of samples) at once
+        Returns the project duration of every scenario and, for every activity,
+        the number of scenarios in which it is critical
+        '''
+        width = samples.shape[1]
+        early = np.zeros((self.n, width))
+        for tail, head, column in self.arcs:
+            np.maximum(early[head], early[tail] + samples[column] if column >= 0 else early[tail], out=early[head])
+        duration = early.max(axis=0) if self.n else np.zeros(width)
+        #Longest path from every event to the end, arcs are walked by decreasing tail
+        remaining = np.zeros((self.n, width))
+        for tail, head, column in reversed(self.arcs):
+            np.maximum(remaining[tail], remaining[head] + samples[column] if column >= 0 else remaining[head], out=remaining[tail])
+        tolerance = 1e-9 * np.maximum(duration, 1)
+        critical = np.zeros(len(self.activities), dtype=np.int64)
+        for tail, head, column in self.arcs:
+            if column >= 0:
+                critical[column] = np.count_nonzero(early[tail] + samples[column] + remaining[head] >= duration - tolerance)
+        return duration, critical
+
+    def run(self, seed, width):
+        return self.evaluate(self.sample(np.random.default_rng(seed), width))
+
+_model = None
+
+def _set_model(model):
+    '''
+    Worker initializer: the model is sent once per worker instead of once per chunk
+    '''
+    global _model
+    _model = model
+
+def _run_chunk(seed, width):
+    return _model.run(seed, width)
+
+class SimulationResult:
+    """
+    Result of a Monte Carlo simulation of an activity network
+    durations -> array with the project duration of every scenario
+    criticality -> {activity : fraction of the scenarios in which it is critical}
+    """
+    def __init__(self, durations, criticality):
+        self.durations = durations
+        self.criticality = criticality
+
+    def mean(self):
+        return float(self.durations.mean())
+
+    def std(self):
+        return float(self.durations.std())
+
+    def percentiles(self, q=(10, 50, 80, 90, 95)):
+        '''
+        Returns {percentile : project duration} for the given percentiles
+        '''
+        return dict(zip(q, np.percentile(self.durations, q).tolist()))
+
+def simulate(order, edges, distributions, scenarios=10000, seed=None, processes=None, chunk_size=None):
+    """
+    Monte Carlo simulation of the project duration of an activity network
+    order -> the events in topological order, edges -> [tail, head, weight, activity] arcs
+    distributions -> {activity : distribution}, see sampler
+    Scenarios are sampled and evaluated chunk_size at a time (by default as many as fit in CHUNK_CELLS),
+    with processes > 1 (os.cpu_count() if None) the chunks are split across a process pool, unless
+    there are less than CHUNK_CELLS cells to evaluate in all (a pool would take longer to start).
+    Every chunk has its own seed spawned from seed, so results do not depend on the number of processes
+    Distributions must be picklable to use a process pool
+    """
+    model = PertModel(order, edges, distributions)
+    if chunk_size is None:
+        chunk_size = max(1, CHUNK_CELLS // max(model.n, 1))
+    widths = [min(chunk_size, scenarios - start) for start in range(0, scenarios, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(widths))
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or len(widths) <= 1 or scenarios * model.n < CHUNK_CELLS:
+        results = [model.run(chunk_seed, width) for chunk_seed, width in zip(seeds, widths)]
+    else:
+        with ProcessPoolExecutor(min(processes, len(widths)), initializer=_set_model, initargs=(model,)) as pool:
+            results = list(pool.map(_run_chunk, seeds, widths))
+    project = np.concatenate([duration for duration, critical in results]) if results else np.zeros(0)
+    critical = sum((critical for duration, critical in results), np.zeros(len(model.activities), dtype=np.int64))
+    criticality = {activity : int(count) / max(scenarios, 1) for activity, count in zip(model.activities, critical)}
+    return SimulationResult(project, criticality)
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from graph.shortest_paths import ShortestPathTree
+from graph.all_pairs import AllPairsShortestPaths
+from graph import instrument
+import sys
+
+#Default memory budget of the result cache of a graph
+DEFAULT_MAX_BYTES = 64 << 20
+
+#Approximate size of a number object held in a node table
+NUMBER_BYTES = 32
+
+def result_bytes(value):
+    '''
+    Approximate memory held by a cached result: its tables, not the graph indexes it refers to
+    '''
+    if isinstance(value, ShortestPathTree):
+        tables = (value.dist, value.pred, value.settled)
+        return sum(sys.getsizeof(table) for table in tables) + NUMBER_BYTES * len(value.dist)
+    if isinstance(value, AllPairsShortestPaths):
+        return value.dist.nbytes + value.pred.nbytes + sys.getsizeof(value.index) + sys.getsizeof(value.nodes)
+    if isinstance(value, list):
+        return sys.getsizeof(value) + sum(result_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """
+    LRU cache of query results of a graph, keyed by (algorithm, arguments) for one graph version
+    Looking up a result for another version than the cached ones drops them all, so mutations
+    of the graph invalidate the cache without having to notify it
+    max_bytes -> memory budget, the least recently used results are evicted to stay under it
+    and results larger than the budget are not kept (0 disables the cache)
+    Cached results are shared between the callers that get them and must not be modified
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() #key -> (result, size in bytes)
+        self.version = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _sync(self, version):
+        if version != self.version:
+            self.entries.clear()
+            self.bytes = 0
+            self.version = version
+
+    def get(self, version, *keys):
+        '''
+        Returns the first of the keys found for this version (counted as one hit), None if there is none (one miss)
+        '''
+        self._sync(version)
+        for key in keys:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                instrument.count("results.hits")
+                return entry[0]
+        self.misses += 1
+        instrument.count("results.misses")
+        return None
+
+    def put(self, version, key, value):
+        '''
+        Stores a result for this version, evicting the least recently used ones if over budget
+        Returns the result
+        '''
+        self._sync(version)
+        size = result_bytes(value)
+        if size > self.max_bytes:
+            return value
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        self.entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, old_size) = self.entries.popitem(last=False)
+            self.bytes -= old_size
+            self.evictions += 1
+        return value
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """
+        Returns {"hits", "misses", "evictions", "entries", "bytes", "max_bytes"}
+        """
+        return {"hits" : self.hits, "misses" : self.misses, "evictions" : self.evictions,
+                "entries" : len(self.entries), "bytes" : self.bytes, "max_bytes" : self.max_bytes}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __deepcopy__(self, memo):
+        #Copies of a graph start with an empty cache, the results refer to the original's indexes
+        return ResultCache(self.max_bytes)
+
+    def __getstate__(self):
+        return {"max_bytes" : self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_bytes"])
+
+    def __repr__(self):
+        return f"ResultCache({len(self.entries)} results, {self.bytes} of {self.max_bytes} bytes)"
@@ -0,0 +1,271 @@
+from collections.abc import Mapping
+from types import MappingProxyType
+from graph.csr import CSRGraph
+from graph import instrument
+import heapq, math
+
+def node_table(space, value):
+    '''
+    Returns a table with one entry per node key of a search graph, initialised to value
+    A list indexed by node id for a CSRGraph, a dict keyed by node label otherwise
+    '''
+    if isinstance(space, CSRGraph):
+        return [value] * len(space)
+    return dict.fromkeys(space.keys(), value)
+
+def dijkstra(space, source, targets=None):
+    """
+    Heap based Dijkstra from the source key over a search graph (AdjacencyIndex or CSRGraph)
+    If targets (an iterable of keys) is given, stops as soon as all of them are settled
+    Returns a tuple (dist, pred, settled, complete)
+    dist -> tentative distance of every key, math.inf if not reached
+    pred -> preceding key on the shortest path of every key, None for the source and unreached keys
+    settled -> True for every key whose distance is final
+    complete -> True if the search was not stopped early
+    """
+    dist = node_table(space, math.inf)
+    pred = node_table(space, None)
+    settled = node_table(space, False)
+    dist[source] = 0
+    remaining = None
+    if targets is not None:
+        remaining = set(targets)
+    #Entries are (distance, tie breaker, key), the counter avoids comparing node labels
+    counter = 0
+    heap = [(0, counter, source)]
+    while heap:
+        d, _, u = heapq.heappop(heap)
+        #Stale entry, u was reached again with a shorter distance
+        if settled[u]:
+            continue
+        settled[u] = True
+        if remaining is not None:
+            remaining.discard(u)
+            if not remaining:
+                _count_search("dijkstra", settled, counter)
+                return dist, pred, settled, False
+        for v, w in space.neighbours(u):
+            new_dist = d + w
+            if new_dist < dist[v]:
+                dist[v] = new_dist
+                pred[v] = u
+                counter += 1
+                heapq.heappush(heap, (new_dist, counter, v))
+    _count_search("dijkstra", settled, counter)
+    return dist, pred, settled, True
+
+def _count_search(name, settled, counter, roots=1):
+    '''
+    Reports the counters of a search to the instrumentation, derived from its tables once it is over
+    so the search loop is left as it is: every improvement of a distance pushed one heap entry
+    settled -> a node table of the search, or the number of settled keys
+    roots -> number of entries the heaps started with
+    '''
+    stats = instrument.current()
+    if stats is None:
+        return
+    if not isinstance(settled, int):
+        settled = sum(settled if isinstance(settled, list) else settled.values())
+    stats.count(f"{name}.searches")
+    stats.count(f"{name}.settled", settled)
+    stats.count(f"{name}.improvements", counter)
+    stats.count(f"{name}.pushes", counter + roots)
+
+def bidirectional_dijkstra(space, reverse, source, target):
+    """
+    Point to point Dijkstra, searching forward from the source over space and backward from the target
+    over reverse (the transposed search graph, space itself if undirected), one step at a time on the
+    side with the closest frontier, until the two frontiers are further apart than the best meeting found
+    State is kept in dicts, so a query only touches the nodes around the two searches
+    Returns a tuple (distance, path), path being the list of keys, (math.inf, None) if target is unreachable
+    """
+    if source == target:
+        return 0, [source]
+    dists = ({source : 0}, {target : 0})
+    preds = ({source : None}, {target : None})
+    settled = (set(), set())
+    heaps = ([(0, 0, source)], [(0, 0, target)])
+    graphs = (space, reverse)
+    counter = 0
+    best, meeting = math.inf, None
+    while heaps[0] and heaps[1]:
+        #Stale entries only make the frontier distances smaller, so the stop is never too early
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        d, _, u = heapq.heappop(heaps[side])
+        if u in settled[side]:
+            continue
+        settled[side].add(u)
+        dist, pred, other = dists[side], preds[side], dists[1 - side]
+        for v, w in graphs[side].neighbours(u):
+            new_dist = d + w
+            if new_dist < dist.get(v, math.inf):
+                dist[v] = new_dist
+                pred[v] = u
+                counter += 1
+                heapq.heappush(heaps[side], (new_dist, counter, v))
+            if v in other and new_dist + other[v] < best:
+                best, meeting = new_dist + other[v], v
+    _count_search("bidirectional", len(settled[0]) + len(settled[1]), counter, roots=2)
+    if meeting is None:
+        return math.inf, None
+    path = trace_path(preds[0], meeting)
+    current = preds[1][meeting]
+    while current is not None:
+        path.append(current)
+        current = preds[1][current]
+    return best, path
+
+def astar(space, source, target, heuristic):
+    """
+    A* search from the source key to the target key over a search graph
+    heuristic(key) -> lower bound of the distance from key to the target, which must be consistent
+    (h(u) <= w(u, v) + h(v) for every edge), as straight line distances and landmark bounds are
+    Returns a tuple (distance, path), path being the list of keys, (math.inf, None) if target is unreachable
+    """
+    dist = {source : 0}
+    pred = {source : None}
+    settled = set()
+    #Every key is estimated once, the estimates are kept for the later pushes
+    estimate = {source : heuristic(source)}
+    counter = 0
+    heap = [(estimate[source], counter, source)]
+    while heap:
+        _, _, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        settled.add(u)
+        if u == target:
+            _count_search("astar", len(settled), counter)
+            return dist[u], trace_path(pred, u)
+        d = dist[u]
+        for v, w in space.neighbours(u):
+            new_dist = d + w
+            if new_dist < dist.get(v, math.inf):
+                dist[v] = new_dist
+                pred[v] = u
+                if v not in estimate:
+                    estimate[v] = heuristic(v)
+                counter += 1
+                heapq.heappush(heap, (new_dist + estimate[v], counter, v))
+    _count_search("astar", len(settled), counter)
+    return math.inf, None
+
+def trace_path(pred, target):
+    '''
+    Returns the list of keys from the source to target by following the predecessor map
+    Built in reverse and flipped once, so linear in the length of the path
+    '''
+    path = [target]
+    current = pred[target]
+    while current is not None:
+        path.append(current)
+        current = pred[current]
+    path.reverse()
+    return path
+
+class ShortestPathTree(Mapping):
+    """
+    Result of a single source shortest path search
+    Keeps the distances and the predecessor map of the search, paths are only built when asked for
+    Can also be read as the dictionary returned by Graph.shortestPath:
+    {node : {"length" : num, "path" : [src, v1, v2, ..., node]}}
+    where unreachable nodes have length -1 and path None
+    If the search stopped early, only the settled nodes are part of the mapping
+    The nodes are those of the graph at search time: nodes added to it later are not part of the tree
+    """
+    def __init__(self, space, source, dist, pred, settled, complete):
+        self.space = space
+        self.source = space.label(source)
+        self.dist = dist
+        self.pred = pred
+        self.settled = settled
+        self.complete = complete
+
+    def freeze(self):
+        """
+        Makes the tables read only (tuples, or read only views of the dicts), for a tree shared
+        between callers by the result cache of a graph. Returns the tree
+        """
+        if isinstance(self.dist, list):
+            self.dist, self.pred, self.settled = tuple(self.dist), tuple(self.pred), tuple(self.settled)
+        elif isinstance(self.dist, dict):
+            self.dist, self.pred, self.settled = (MappingProxyType(self.dist), MappingProxyType(self.pred),
+                                                  MappingProxyType(self.settled))
+        return self
+
+    def _keys(self):
+        #The keys of the tree's own tables, the search graph may have grown since the search
+        if isinstance(self.dist, Mapping):
+            return self.dist.keys()
+        return range(len(self.dist))
+
+    def _key(self, node):
+        key = self.space.key(node)
+        if isinstance(self.dist, Mapping):
+            if key not in self.dist:
+                raise KeyError(f"{node} was added to the graph after the search")
+        elif not 0 <= key < len(self.dist):
+            raise KeyError(f"{node} was added to the graph after the search")
+        if not self.settled[key] and not self.complete:
+            raise KeyError(f"{node} was not settled by the search")
+        return key
+
+    def distance(self, node):
+        """
+        Returns the length of the shortest path from the source to node, math.inf if unreachable
+        """
+        return self.dist[self._key(node)]
+
+    def predecessor(self, node):
+        """
+        Returns the node before node on its shortest path, None for the source or unreachable nodes
+        """
+        key = self.pred[self._key(node)]
+        return None if key is None else self.space.label(key)
+
+    def path(self, node):
+        """
+        Returns the shortest path from the source to node as a list of nodes, None if unreachable
+        """
+        key = self._key(node)
+        if self.dist[key] == math.inf:
+            return None
+        label = self.space.label
+        return [label(k) for k in trace_path(self.pred, key)]
+
+    def reachable(self):
+        """
+        Yields the nodes settled by the search
+        """
+        label = self.space.label
+        for key in self._keys():
+            if self.settled[key]:
+                yield label(key)
+
+    def __getitem__(self, node):
+        key = self._key(node)
+        if self.dist[key] == math.inf:
+            return {"length" : -1, "path" : None}
+        return {"length" : self.dist[key], "path" : self.path(node)}
+
+    def __iter__(self):
+        if self.complete:
+            return map(self.space.label, self._keys())
+        return self.reachable()
+
+    def __len__(self):
+        if self.complete:
+            return len(self.dist)
+        return sum(1 for key in self._keys() if self.settled[key])
+
+    def __contains__(self, node):
+        try:
+            self._key(node)
+        except KeyError:
+            return False
+        return True
+
+    def __repr__(self):
+        return f"ShortestPathTree(source={self.source!r}, nodes={len(self)}, complete={self.complete})"
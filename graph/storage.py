@@ -0,0 +1,263 @@
+from collections.abc import Sequence
+from graph.csr import EdgeArrays, CSRGraph, typecode
+from array import array
+import mmap as mmap_module
+import numpy as np
+import struct, sys
+
+#Binary graph file, integers in native (little endian) byte order and every section aligned to 8 bytes:
+#header -> magic, format version, flags, label kind, nodes n, edges m, csr slots s, label table bytes
+#label table -> nothing (labels 0..n-1), n int64 labels, or n + 1 int64 offsets followed by utf-8 text
+#edge arrays -> m int64 sources, m int64 targets, m weights (int64 or float64) if weighted
+#csr arrays -> n + 1 int64 offsets, s int64 targets, s weights if weighted, s int64 edge ids
+MAGIC = b"GRAPHCSR"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHIQQQQ")
+
+DIRECTED = 1
+WEIGHTED = 2
+FLOAT_WEIGHTS = 4
+
+RANGE_LABELS = 0
+INT_LABELS = 1
+STR_LABELS = 2
+
+class RangeIds:
+    """
+    label -> id mapping of the labels 0..n-1, without storing it
+    """
+    def __init__(self, n):
+        self.n = n
+
+    def get(self, label, default=None):
+        if type(label) is int and 0 <= label < self.n:
+            return label
+        return default
+
+    def __getitem__(self, label):
+        node_id = self.get(label)
+        if node_id is None:
+            raise KeyError(label)
+        return node_id
+
+    def __contains__(self, label):
+        return self.get(label) is not None
+
+    def __len__(self):
+        return self.n
+
+class LabelTable(Sequence):
+    """
+    Read only table of the node labels of a graph read by load_graph, which is g.nodes of a
+    loaded graph until its first edit (it is then copied to a list)
+    Labels are 0..n-1 (nothing stored), int64 values, or utf-8 text with an offset per label
+    (n + 1 int64 values), decoded when accessed
+    Compares equal to any sequence of the same labels, copies and pickles are lists
+    """
+    def __init__(self, kind, n, values=None, text=None):
+        self.kind = kind
+        self.n = n
+        self.values = values
+        self.text = text
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("label index out of range")
+        if self.kind == RANGE_LABELS:
+            return i
+        if self.kind == INT_LABELS:
+            return self.values[i]
+        return str(self.text[self.values[i]:self.values[i + 1]], "utf-8")
+
+    def __iter__(self):
+        if self.kind == RANGE_LABELS:
+            return iter(range(self.n))
+        if self.kind == INT_LABELS:
+            return iter(self.values)
+        return super().__iter__()
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __reduce__(self):
+        #The values can be memoryviews over a memory map, which cannot be pickled
+        return (list, (list(self),))
+
+    def __repr__(self):
+        return f"LabelTable({self.n} labels)"
+
+def _label_kind(labels):
+    if all(type(label) is int and label == i for i, label in enumerate(labels)):
+        return RANGE_LABELS
+    if all(type(label) is int for label in labels):
+        return INT_LABELS
+    if all(type(label) is str for label in labels):
+        return STR_LABELS
+    raise TypeError("Only graphs whose node labels are all ints or all strings can be saved")
+
+def _label_table(labels, kind):
+    if kind == RANGE_LABELS:
+        return b""
+    if kind == INT_LABELS:
+        return array('q', labels).tobytes()
+    encoded = [label.encode("utf-8") for label in labels]
+    offsets = array('q', [0])
+    for label in encoded:
+        offsets.append(offsets[-1] + len(label))
+    return offsets.tobytes() + b"".join(encoded)
+
+def _padding(size):
+    return -size % 8
+
+def save_graph(path, store, csr):
+    """
+    Writes the edge arrays of an EdgeArrays store and the matching CSRGraph to a binary file
+    """
+    if sys.byteorder != "little":
+        raise NotImplementedError("Graph files are little endian, saving is not supported on this platform")
+    n, m, slots = len(store.labels), len(store), csr.num_slots
+    kind = _label_kind(store.labels)
+    labels = _label_table(store.labels, kind)
+    flags = DIRECTED if csr.directed else 0
+    arrays = [store.src, store.dst]
+    csr_arrays = [csr.indptr, csr.indices]
+    if store.weighted:
+        flags |= WEIGHTED
+        if typecode(store.weights) == 'd':
+            flags |= FLOAT_WEIGHTS
+        arrays.append(store.weights)
+        csr_arrays.append(csr.weights)
+    csr_arrays.append(csr.edge_ids)
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, flags, kind, n, m, slots, len(labels)))
+        file.write(bytes(_padding(HEADER.size)))
+        file.write(labels)
+        file.write(bytes(_padding(len(labels))))
+        for values in arrays + csr_arrays:
+            file.write(memoryview(values).cast('B'))
+
+def load_graph(path, mmap=True):
+    """
+    Reads a file written by save_graph
+    If mmap is True, the arrays are memoryviews over a read only memory map of the file (no copy),
+    so processes loading the same file share the page cache. Otherwise they are read into arrays
+    The node labels are a LabelTable in both cases
+    Returns a tuple (store, csr, directed, weighted)
+    """
+    with open(path, "rb") as file:
+        if mmap:
+            buffer = memoryview(mmap_module.mmap(file.fileno(), 0, access=mmap_module.ACCESS_READ))
+        else:
+            buffer = memoryview(file.read())
+    if len(buffer) < HEADER.size:
+        raise ValueError(f"{path} is not a graph file")
+    magic, version, flags, kind, n, m, slots, label_bytes = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a graph file")
+    if sys.byteorder != "little":
+        raise NotImplementedError("Graph files are little endian, loading is not supported on this platform")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {version}, only version {FORMAT_VERSION} can be read")
+    weighted = bool(flags & WEIGHTED)
+    weight_code = 'd' if flags & FLOAT_WEIGHTS else 'q'
+    offset = HEADER.size + _padding(HEADER.size)
+
+    def take(count, code, size=None):
+        nonlocal offset
+        if size is None:
+            size = count * 8
+        section = buffer[offset:offset + size]
+        if len(section) != size:
+            raise ValueError(f"{path} is truncated")
+        offset += size + _padding(size)
+        if code is None:
+            return section
+        if mmap:
+            return section.cast(code)
+        values = array(code)
+        values.frombytes(section)
+        return values
+
+    labels_start = offset
+    if kind == RANGE_LABELS:
+        labels, ids = LabelTable(kind, n), RangeIds(n)
+    elif kind == INT_LABELS:
+        labels, ids = LabelTable(kind, n, take(n, 'q')), None
+    elif kind == STR_LABELS:
+        label_offsets = take(n + 1, 'q')
+        text = take(None, None, label_bytes - (n + 1) * 8)
+        labels, ids = LabelTable(kind, n, label_offsets, text if mmap else bytes(text)), None
+    else:
+        raise ValueError(f"{path} has an unknown label table")
+    offset = labels_start + label_bytes + _padding(label_bytes)
+    src, dst = take(m, 'q'), take(m, 'q')
+    weights = take(m, weight_code) if weighted else None
+    indptr, indices = take(n + 1, 'q'), take(slots, 'q')
+    slot_weights = take(slots, weight_code) if weighted else None
+    edge_ids = take(slots, 'q')
+    store = EdgeArrays.from_arrays(labels, src, dst, weights, ids)
+    csr = CSRGraph(labels, indptr, indices, slot_weights, edge_ids, bool(flags & DIRECTED), ids)
+    return store, csr, bool(flags & DIRECTED), weighted
+
+#Landmark index file, written next to a graph file (see graph/landmarks.py):
+#header -> magic, format version, flags, landmarks k, nodes n, edges m of the graph it was built for
+#k int64 landmark rows, n * k float64 forward distances, n * k float64 backward distances if directed
+LANDMARKS_MAGIC = b"GRAPHALT"
+LANDMARKS_HEADER = struct.Struct("<8sHHIQQ")
+
+def save_landmarks(path, index, edges):
+    """
+    Writes the tables of a LandmarkIndex built over a graph with the given number of edges
+    """
+    if sys.byteorder != "little":
+        raise NotImplementedError("Graph files are little endian, saving is not supported on this platform")
+    n, k = index.forward.shape
+    flags = DIRECTED if index.directed else 0
+    with open(path, "wb") as file:
+        file.write(LANDMARKS_HEADER.pack(LANDMARKS_MAGIC, FORMAT_VERSION, flags, k, n, edges))
+        file.write(bytes(_padding(LANDMARKS_HEADER.size)))
+        file.write(array('q', index.landmarks).tobytes())
+        file.write(np.ascontiguousarray(index.forward, dtype=np.float64).tobytes())
+        if index.directed:
+            file.write(np.ascontiguousarray(index.backward, dtype=np.float64).tobytes())
+
+def load_landmarks(path, mmap=True):
+    """
+    Reads a file written by save_landmarks, memory mapping the tables if mmap is True
+    Returns a tuple (landmarks, forward, backward, directed, nodes, edges)
+    """
+    with open(path, "rb") as file:
+        if mmap:
+            buffer = mmap_module.mmap(file.fileno(), 0, access=mmap_module.ACCESS_READ)
+        else:
+            buffer = file.read()
+    if len(buffer) < LANDMARKS_HEADER.size:
+        raise ValueError(f"{path} is not a landmark file")
+    magic, version, flags, k, n, m = LANDMARKS_HEADER.unpack_from(buffer)
+    if magic != LANDMARKS_MAGIC:
+        raise ValueError(f"{path} is not a landmark file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {version}, only version {FORMAT_VERSION} can be read")
+    directed = bool(flags & DIRECTED)
+    offset = LANDMARKS_HEADER.size + _padding(LANDMARKS_HEADER.size)
+    size = 8 * (k + n * k * (2 if directed else 1))
+    if len(buffer) < offset + size:
+        raise ValueError(f"{path} is truncated")
+    landmarks = np.frombuffer(buffer, dtype=np.int64, count=k, offset=offset).tolist()
+    offset += 8 * k
+    forward = np.frombuffer(buffer, dtype=np.float64, count=n * k, offset=offset).reshape(n, k)
+    backward = forward
+    if directed:
+        backward = np.frombuffer(buffer, dtype=np.float64, count=n * k, offset=offset + 8 * n * k).reshape(n, k)
+    return landmarks, forward, backward, directed, n, m
@@ -0,0 +1,121 @@
+#Node and edge lists of the list backend of Graph, which tell the graph when they are edited directly
+#(g.edges.append(edge), g.edges[i][2] = weight) so its cached indexes and results are dropped
+
+class TrackedList(list):
+    """
+    List calling owner._edited() after every change made through it (owner is None while it is detached)
+    Copies and pickles are plain lists, a copied graph attaches new tracked lists to itself
+    """
+    __slots__ = ("owner",)
+
+    def __init__(self, items=(), owner=None):
+        super().__init__(items)
+        self.owner = owner
+
+    def _notify(self):
+        if self.owner is not None:
+            self.owner._edited()
+
+    def _adopt(self, item):
+        return item
+
+    def _release(self, item):
+        pass
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+    def __setitem__(self, i, value):
+        old = self[i]
+        if isinstance(i, slice):
+            value = [self._adopt(item) for item in value]
+            super().__setitem__(i, value)
+            kept = {id(item) for item in value}
+            for item in old:
+                if id(item) not in kept:
+                    self._release(item)
+        else:
+            value = self._adopt(value)
+            super().__setitem__(i, value)
+            if old is not value:
+                self._release(old)
+        self._notify()
+
+    def __delitem__(self, i):
+        old = self[i]
+        super().__delitem__(i)
+        for item in (old if isinstance(i, slice) else (old,)):
+            self._release(item)
+        self._notify()
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def __imul__(self, times):
+        raise TypeError(f"{type(self).__name__} cannot be repeated in place")
+
+    def append(self, item):
+        super().append(self._adopt(item))
+        self._notify()
+
+    def extend(self, items):
+        super().extend([self._adopt(item) for item in items])
+        self._notify()
+
+    def insert(self, i, item):
+        super().insert(i, self._adopt(item))
+        self._notify()
+
+    def pop(self, i=-1):
+        item = super().pop(i)
+        self._release(item)
+        self._notify()
+        return item
+
+    def remove(self, item):
+        self.pop(self.index(item))
+
+    def clear(self):
+        for item in self:
+            self._release(item)
+        super().clear()
+        self._notify()
+
+    def sort(self, *, key=None, reverse=False):
+        super().sort(key=key, reverse=reverse)
+        self._notify()
+
+    def reverse(self):
+        super().reverse()
+        self._notify()
+
+class Edge(TrackedList):
+    """
+    [node1, node2, weight] edge of an EdgeList (its owner), which is told about edits such as a new weight
+    An edge removed from its list is detached, it can then be edited freely
+    """
+    __slots__ = ()
+
+class EdgeList(TrackedList):
+    """
+    Edges of a graph (its owner): the edges put in it are taken over as Edge objects, so edits
+    of a single edge are reported too. Edges of another list are copied instead
+    """
+    __slots__ = ()
+
+    def __init__(self, edges=(), owner=None):
+        super().__init__(owner=owner)
+        list.extend(self, map(self._adopt, edges))
+
+    def _edited(self):
+        self._notify()
+
+    def _adopt(self, edge):
+        if type(edge) is Edge and (edge.owner is None or edge.owner is self):
+            edge.owner = self
+            return edge
+        return Edge(edge, self)
+
+    def _release(self, edge):
+        edge.owner = None
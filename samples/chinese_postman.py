@@ -5,12 +5,12 @@ edges = [[0, 4], [1, 4], [1, 5], [1, 7], [7, 8], [5, 8], [4, 3], [5, 3], [3, 6],
 g1 = Graph(nodes, edges)
 #returns a new pseudograph and the edges that were duplicated to obtain it
 g_new, dup_edges = g1.chinese_postman()
-print(dup_edges) #(0, 4) (4, 3), (1, 5), (5, 8), (8, 2)
+print(dup_edges) #(0, 4) (4, 1), (2, 8), (8, 5), (5, 3)
 
 nodes = list(range(8))
 edges = [[0, 2], [0, 7], [0, 4], [1, 7], [1, 4], [1 ,6], [2, 3], [3, 4], [4, 5], [5, 6]]
 g2 = Graph(nodes, edges)
-print(g2.chinese_postman()[1]) # (0, 4), (4, 1)
+print(g2.chinese_postman()[1]) # (0, 7), (7, 1)
 
 #This is an example of a weighted graph
 nodes = list(range(8))
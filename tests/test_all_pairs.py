@@ -0,0 +1,169 @@
+from graph import Graph
+from benchmarks.generators import erdos_renyi
+import math, random, pytest
+
+def naive_floyd_warshall(g):
+    '''
+    Reference distance matrix, the textbook triple loop over lists
+    '''
+    n = len(g.nodes)
+    index = {node : i for i, node in enumerate(g.nodes)}
+    dist = [[0 if i == j else math.inf for j in range(n)] for i in range(n)]
+    for edge in g.edges:
+        w = edge[2] if g.weighted else 1
+        i, j = index[edge[0]], index[edge[1]]
+        dist[i][j] = min(dist[i][j], w)
+        if not g.directed:
+            dist[j][i] = min(dist[j][i], w)
+    for k in range(n):
+        for i in range(n):
+            for j in range(n):
+                if dist[i][k] + dist[k][j] < dist[i][j]:
+                    dist[i][j] = dist[i][k] + dist[k][j]
+    return dist
+
+def negative_graph(n, m, seed):
+    '''
+    Directed graph with negative weights but no negative cycle: w(u, v) = c + p(u) - p(v) with c >= 0,
+    so every cycle weighs the sum of its c. The potentials p are kept in g.potential
+    '''
+    rng = random.Random(seed)
+    potential = [rng.randint(0, 20) for _ in range(n)]
+    edges = []
+    for _ in range(m):
+        u, v = rng.sample(range(n), 2)
+        edges.append([u, v, rng.randint(0, 10) + potential[u] - potential[v]])
+    g = Graph(list(range(n)), edges, directed=True, weighted=True)
+    g.potential = potential
+    return g
+
+def assert_paths(g, result, expected):
+    '''
+    Every path of the result starts and ends at the right nodes and has the expected length
+    '''
+    weight = dict()
+    for edge in g.edges:
+        w = edge[2] if g.weighted else 1
+        weight[edge[0], edge[1]] = min(weight.get((edge[0], edge[1]), math.inf), w)
+        if not g.directed:
+            weight[edge[1], edge[0]] = min(weight.get((edge[1], edge[0]), math.inf), w)
+    for i, u in enumerate(g.nodes):
+        for j, v in enumerate(g.nodes):
+            path = result.path(u, v)
+            if expected[i][j] == math.inf:
+                assert path is None
+                continue
+            assert path[0] == u and path[-1] == v
+            assert sum(weight[a, b] for a, b in zip(path, path[1:])) == expected[i][j]
+
+GRAPHS = [
+    erdos_renyi(30, 60, seed=1),
+    erdos_renyi(30, 80, directed=True, seed=2),
+    erdos_renyi(25, 30, weighted=False, seed=3),
+    negative_graph(30, 90, seed=4),
+    Graph(["a", "b", "c", "d"], [["a", "b", 2], ["b", "c", -1], ["a", "c", 3], ["a", "b", 1]], directed=True, weighted=True),
+]
+
+@pytest.mark.parametrize("method", ["floyd_warshall", "johnson"])
+@pytest.mark.parametrize("g", GRAPHS)
+def test_against_naive(g, method):
+    expected = naive_floyd_warshall(g)
+    assert g.shortest_distances_all_pairs(method=method, processes=1) == expected
+    assert_paths(g, g.all_pairs_shortest_paths(method=method, processes=1), expected)
+
+@pytest.mark.parametrize("g", GRAPHS)
+def test_small_blocks(g):
+    #Blocks smaller than the graph run every phase of the blocked algorithm
+    assert g.shortest_distances_all_pairs(block_size=4) == naive_floyd_warshall(g)
+
+@pytest.mark.parametrize("offset", [0, 0.5, 2 ** 45])
+def test_weight_offsets(offset):
+    #Integer weights relax the blocks through exact keys, other weights (or too large ones) one pivot at a time
+    g = erdos_renyi(40, 160, directed=True, seed=13)
+    for edge in g.edges:
+        edge[2] += offset
+    expected = naive_floyd_warshall(g)
+    assert g.shortest_distances_all_pairs(block_size=8) == expected
+    assert_paths(g, g.all_pairs_shortest_paths(block_size=8), expected)
+
+def test_float32():
+    g = negative_graph(30, 90, seed=5)
+    dist = g.shortest_distances_all_pairs(dtype="float32")
+    assert dist.dtype.name == "float32"
+    assert dist.tolist() == naive_floyd_warshall(g)
+
+def test_streamed_rows():
+    g = negative_graph(20, 50, seed=6)
+    expected = naive_floyd_warshall(g)
+    rows = dict(g.iter_shortest_distances(processes=1))
+    assert sorted(rows) == g.nodes
+    for source, row in rows.items():
+        assert row.tolist() == expected[source]
+    #Through a pool of processes too
+    assert g.shortest_distances_all_pairs(method="johnson", processes=2) == expected
+
+@pytest.mark.parametrize("method", ["floyd_warshall", "johnson"])
+def test_negative_cycle(method):
+    g = Graph([0, 1, 2], [[0, 1, 1], [1, 2, -3], [2, 0, 1]], directed=True, weighted=True)
+    with pytest.raises(ValueError):
+        g.all_pairs_shortest_paths(method=method, processes=1)
+
+def random_changes(g, rng, count):
+    '''
+    A batch of random adds, removes and weight changes, each existing edge of g changed at most once
+    New weights follow the potentials of a negative_graph, so no negative cycle is made
+    '''
+    potential = getattr(g, "potential", None)
+    def weight(u, v):
+        return rng.randint(1, 30) + (potential[u] - potential[v] if potential else 0)
+    changes = []
+    edges = rng.sample(g.edges, min(count, len(g.edges)))
+    for _ in range(count):
+        op = rng.choice(("add", "remove", "set"))
+        if op == "add" or not edges:
+            u, v = rng.sample(g.nodes, 2)
+            changes.append(("add", u, v, weight(u, v)))
+        else:
+            edge = edges.pop()
+            if op == "remove":
+                changes.append(("remove", edge[0], edge[1], edge[2]))
+            else:
+                changes.append(("set", edge[0], edge[1], weight(edge[0], edge[1])))
+    return changes
+
+@pytest.mark.parametrize("g", [erdos_renyi(25, 50, seed=8), negative_graph(25, 60, seed=9)])
+def test_dynamic(g):
+    rng = random.Random(10)
+    dynamic = g.dynamic_all_pairs(block_size=8)
+    for batch in range(12):
+        changes = random_changes(g, rng, rng.choice((1, 1, 3, 20)))
+        if len(changes) == 1:
+            op, *args = changes[0]
+            {"add" : dynamic.add_edge, "remove" : dynamic.remove_edge, "set" : dynamic.set_weight}[op](*args)
+        else:
+            dynamic.apply(changes)
+        #A full recompute of the changed graph
+        expected = naive_floyd_warshall(g)
+        assert dynamic.to_list() == expected
+        assert_paths(g, dynamic, expected)
+
+def test_dynamic_direct_changes():
+    g = erdos_renyi(20, 40, seed=11)
+    dynamic = g.dynamic_all_pairs()
+    #Changes made to the graph directly rebuild the matrices
+    g.add_edge(0, 19, 1)
+    dynamic.set_weight(*g.edges[0][:2], 2)
+    assert dynamic.to_list() == naive_floyd_warshall(g)
+
+def test_dynamic_negative_cycle():
+    g = negative_graph(10, 30, seed=12)
+    dynamic = g.dynamic_all_pairs()
+    with pytest.raises(ValueError):
+        dynamic.add_edge(1, 0, -1000)
+    #Raised again on next use, as long as the cycle is there
+    with pytest.raises(ValueError):
+        dynamic.refresh()
+    #Every update rebuilds first, so the cycle is broken on the graph itself
+    g.remove_edge(1, 0, -1000)
+    dynamic.refresh()
+    assert dynamic.to_list() == naive_floyd_warshall(g)
@@ -0,0 +1,121 @@
+from graph import Graph
+from benchmarks.generators import erdos_renyi, grid_graph
+import math, random, pytest
+
+#The list and csr backends must answer every query the same way
+
+def both(g):
+    '''
+    Returns the graph with the list backend and the same graph with the csr backend
+    '''
+    nodes, edges = list(g.nodes), [list(edge) for edge in g.edges]
+    return (Graph(nodes, edges, g.directed, g.weighted),
+            Graph(list(nodes), [list(edge) for edge in edges], g.directed, g.weighted, backend="csr"))
+
+def distances(g, src):
+    tree = g.shortestPath(src)
+    return {node : tree.distance(node) for node in g.nodes}
+
+GRAPHS = [
+    erdos_renyi(40, 90, seed=1),
+    erdos_renyi(40, 120, directed=True, seed=2),
+    erdos_renyi(30, 40, weighted=False, seed=3),
+    grid_graph(5, 6, seed=4),
+]
+
+def slots(nodes, edges, directed, reverse=False):
+    '''
+    Neighbours of every node as (node, weight, edge id) triples, in the order of the edges
+    The reversed edges are in the order of the slots they come from, by source and then by edge
+    '''
+    slots = {node : [] for node in nodes}
+    for i, edge in enumerate(edges):
+        tail, head = (edge[1], edge[0]) if reverse else (edge[0], edge[1])
+        slots[tail].append((head, edge[2], i))
+        if not directed:
+            slots[head].append((tail, edge[2], i))
+    if reverse:
+        order = {node : i for i, node in enumerate(nodes)}
+        for node in nodes:
+            slots[node].sort(key=lambda slot: (order[slot[0]], slot[2]))
+    return slots
+
+def csr_slots(csr):
+    slots = {}
+    for u in csr.keys():
+        start, end = csr.indptr[u], csr.indptr[u + 1]
+        slots[csr.label(u)] = [(csr.label(v), w, i) for v, w, i in
+                               zip(csr.indices[start:end], csr.weights[start:end], csr.edge_ids[start:end])]
+    return slots
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_csr_layout(directed, seed):
+    rng = random.Random(seed)
+    nodes = [f"n{i}" for i in range(12)]
+    #Loops, parallel edges and isolated nodes, int weights then float ones
+    edges = [[rng.choice(nodes[:10]), rng.choice(nodes[:10]), rng.randint(1, 9)] for _ in range(40)]
+    edges += [[rng.choice(nodes[:10]), rng.choice(nodes[:10]), rng.random()] for _ in range(seed * 5)]
+    g = Graph(list(nodes), edges, directed, True, backend="csr")
+    assert csr_slots(g.csr()) == slots(nodes, edges, directed)
+    assert csr_slots(g._csr_transpose()) == slots(nodes, edges, directed, reverse=directed)
+
+@pytest.mark.parametrize("g", GRAPHS)
+def test_shortest_paths(g):
+    plain, csr = both(g)
+    for src in (0, 7, 19):
+        assert distances(plain, src) == distances(csr, src)
+    for src, dst in ((0, 29), (3, 11), (17, 2)):
+        assert plain.shortest_path_between(src, dst)["length"] == csr.shortest_path_between(src, dst)["length"]
+
+@pytest.mark.parametrize("g", GRAPHS)
+def test_all_pairs(g):
+    plain, csr = both(g)
+    assert plain.shortest_distances_all_pairs() == csr.shortest_distances_all_pairs()
+
+@pytest.mark.parametrize("g", GRAPHS)
+def test_components(g):
+    plain, csr = both(g)
+    assert plain.connected_components() == csr.connected_components()
+    assert plain.strongly_connected_components() == csr.strongly_connected_components()
+
+@pytest.mark.parametrize("g", [g for g in GRAPHS if g.weighted and not g.directed])
+def test_spanning_trees(g):
+    plain, csr = both(g)
+    for method in ("kruskal", "prim", "boruvka"):
+        assert getattr(plain, method)().total_graph_weight() == getattr(csr, method)().total_graph_weight()
+
+def test_mutations():
+    plain, csr = both(erdos_renyi(30, 60, seed=5))
+    for g in (plain, csr):
+        #Built before the edits, so they must be brought up to date
+        g.shortestPath(0)
+        g.all_pairs_shortest_paths()
+        g.add_node(30)
+        g.add_edge(30, 4, 3)
+        g.add_edge(0, 30, 2)
+        g.remove_edge(*g.edges[0][:2])
+        g.set_weight(*g.edges[5][:2], 1)
+    assert distances(plain, 0) == distances(csr, 0)
+    assert plain.shortest_distances_all_pairs() == csr.shortest_distances_all_pairs()
+    assert plain.kruskal().total_graph_weight() == csr.kruskal().total_graph_weight()
+
+def test_direct_edits():
+    plain, csr = both(erdos_renyi(20, 40, seed=6))
+    for g in (plain, csr):
+        g.shortestPath(0)
+    #Edited in place on one backend, through set_weight on the other
+    plain.edges[0][2] = 1
+    csr.set_weight(*csr.edges[0][:2], 1)
+    assert distances(plain, 0) == distances(csr, 0)
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        Graph([0, 1], [[0, 1]], backend="dict")
+
+def test_missing_node():
+    for g in both(erdos_renyi(5, 6, seed=10)):
+        with pytest.raises(KeyError):
+            g.shortestPath(5)
+        assert g.shortestPath(0).distance(0) == 0
+        assert all(d == math.inf or d >= 0 for d in distances(g, 0).values())
@@ -0,0 +1,42 @@
+from benchmarks import generators
+from benchmarks.runner import CASES, BASELINE, measure, compare
+import copy, json, math, pytest
+
+def graph_data(g):
+    return list(g.nodes), [list(edge) for edge in g.edges]
+
+@pytest.mark.parametrize("generator, args", [
+    (generators.grid_graph, (6, 7)),
+    (generators.erdos_renyi, (50, 120)),
+    (generators.scale_free, (50,)),
+    (generators.road_network, (50,)),
+    (generators.eulerian_graph, (30,)),
+])
+def test_generators_are_seeded(generator, args):
+    assert graph_data(generator(*args, seed=1)) == graph_data(generator(*args, seed=1))
+    assert graph_data(generator(*args, seed=1)) != graph_data(generator(*args, seed=2))
+
+def test_dependence_tables_are_seeded():
+    assert generators.dependence_table(50, seed=1) == generators.dependence_table(50, seed=1)
+    assert generators.dependence_table(50, seed=1) != generators.dependence_table(50, seed=2)
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_baseline_values(case):
+    #The results of the committed report hold on any machine, the timings do not
+    with open(BASELINE) as file:
+        baseline = json.load(file)
+    assert baseline["environment"]["seed"] == 0
+    size = case.sizes[0]
+    expected, = [result for result in baseline["results"] if (result["case"], result["size"]) == (case.name, size)]
+    assert math.isclose(measure(case, size, seed=0, repeat=1)["value"], expected["value"], rel_tol=1e-9)
+
+def test_compare():
+    result = {"case" : "kruskal", "size" : 10, "time" : 1.0, "peak_memory" : 1000, "value" : 5}
+    baseline = {"environment" : {"seed" : 0}, "results" : [result]}
+    report = copy.deepcopy(baseline)
+    assert compare(report, baseline) == []
+    report["results"][0].update(time=2.0, peak_memory=2000, value=6)
+    assert len(compare(report, baseline)) == 3
+    #Values of runs on other inputs are not compared
+    report["environment"]["seed"] = 1
+    assert len(compare(report, baseline)) == 2
@@ -0,0 +1,49 @@
+from graph import Graph
+from graph.results import ResultCache, result_bytes
+from benchmarks.generators import erdos_renyi
+import pytest
+
+@pytest.mark.parametrize("backend", ["list", "csr"])
+def test_shared_tree_is_read_only(backend):
+    base = erdos_renyi(10, 20, seed=8)
+    g = Graph(list(base.nodes), base.edges, False, True, backend)
+    tree = g.shortestPath(0)
+    assert g.shortestPath(0) is tree
+    #A complete tree answers the queries with targets too
+    assert g.shortestPath(0, targets=[3]) is tree
+    with pytest.raises(TypeError):
+        tree.dist[tree.space.key(3)] = -1
+
+def test_all_pairs_is_read_only():
+    result = erdos_renyi(10, 20, seed=7).all_pairs_shortest_paths()
+    with pytest.raises(ValueError):
+        result.dist[0, 1] = 0
+
+def test_versions():
+    g = erdos_renyi(20, 40, seed=1)
+    tree = g.shortestPath(0)
+    result = g.all_pairs_shortest_paths()
+    assert g.all_pairs_shortest_paths() is result
+    #Any change of the graph, through the mutation methods or directly, drops the results
+    g.add_edge(0, 19, 1)
+    assert g.shortestPath(0) is not tree
+    tree = g.shortestPath(0)
+    g.edges[0][2] = 1
+    assert g.shortestPath(0) is not tree
+    assert g.all_pairs_shortest_paths() is not result
+
+def test_budget():
+    value = b"x" * 50
+    cache = ResultCache(max_bytes=4 * result_bytes(value))
+    for key in range(4):
+        cache.put(0, key, value)
+    #The least recently used result goes first
+    cache.get(0, 0)
+    cache.put(0, 4, value)
+    assert cache.get(0, 1) is None
+    assert cache.get(0, 0) is not None
+    #Results over the budget are returned without being kept
+    assert cache.put(0, 5, value * 10) is not None and cache.get(0, 5) is None
+    assert cache.stats()["evictions"] == 1 and cache.bytes == cache.max_bytes
+    #Another version drops every result
+    assert cache.get(1, 0) is None and len(cache) == 0
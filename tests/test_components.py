@@ -0,0 +1,56 @@
+from graph import Graph
+from benchmarks.generators import erdos_renyi
+import pytest
+
+def reachable(g, src, both_ways=False):
+    '''
+    Nodes reachable from src, along the edges or both ways along them
+    '''
+    adj = {node : [] for node in g.nodes}
+    for edge in g.edges:
+        adj[edge[0]].append(edge[1])
+        if both_ways or not g.directed:
+            adj[edge[1]].append(edge[0])
+    seen, stack = {src}, [src]
+    while stack:
+        for node in adj[stack.pop()]:
+            if node not in seen:
+                seen.add(node)
+                stack.append(node)
+    return seen
+
+def assert_partition(g, components, same):
+    #Every node once, components and their nodes in order of self.nodes
+    order = {node : i for i, node in enumerate(g.nodes)}
+    assert sorted(node for component in components for node in component) == sorted(g.nodes)
+    assert [order[component[0]] for component in components] == sorted(order[component[0]] for component in components)
+    for component in components:
+        assert component == sorted(component, key=order.get)
+        assert all(same(component[0], node) for node in component)
+    #Two components never hold related nodes
+    firsts = [component[0] for component in components]
+    assert not any(same(u, v) for i, u in enumerate(firsts) for v in firsts[i + 1:])
+
+@pytest.mark.parametrize("backend", ["list", "csr"])
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_components(seed, directed, backend):
+    base = erdos_renyi(40, 45, directed=directed, seed=seed)
+    g = Graph(list(base.nodes), base.edges, directed, True, backend)
+    weak = {node : reachable(g, node, both_ways=True) for node in g.nodes}
+    assert_partition(g, g.connected_components(), lambda u, v: v in weak[u])
+    forward = {node : reachable(g, node) for node in g.nodes}
+    assert_partition(g, g.strongly_connected_components(), lambda u, v: v in forward[u] and u in forward[v])
+
+def test_postman_inputs():
+    #Edges in two components, or a directed graph, have no postman tour
+    g = Graph([0, 1, 2, 3], [[0, 1, 1], [2, 3, 1]], weighted=True)
+    with pytest.raises(ValueError):
+        g.chinese_postman()
+    assert g.find_eulerian_cycle() is None
+    with pytest.raises(ValueError):
+        Graph([0, 1], [[0, 1, 1], [1, 0, 1]], directed=True, weighted=True).chinese_postman()
+    #Isolated nodes are left out of the check
+    g = Graph([0, 1, 2, 3], [[0, 1, 1], [1, 2, 1], [2, 0, 1], [2, 1, 1]], weighted=True)
+    postman, duplicated = g.chinese_postman()
+    assert duplicated == [[1, 2, 1]] or duplicated == [[2, 1, 1]]
@@ -0,0 +1,206 @@
+from graph import ActivityNetwork
+from benchmarks.generators import dependence_table
+import copy, math, random, pytest
+
+#The arcs and the critical path engine (graph/cpm.py) are checked against the loops and breadth first passes they replaced
+
+def old_arcs(node_dict, table):
+    '''
+    Arcs of the network as the first ActivityNetwork built them: every activity entering an event
+    joins it from the event the activity leaves
+    '''
+    edges = []
+    for in_node in node_dict:
+        for incoming_activity in node_dict[in_node][0]:
+            for out_node in node_dict:
+                if out_node != in_node and incoming_activity in node_dict[out_node][1]:
+                    if incoming_activity not in table:
+                        edges.append([out_node, in_node, 0, ""])
+                    else:
+                        edges.append([out_node, in_node, table[incoming_activity][1], incoming_activity])
+                    break
+    return edges
+
+def old_times(net):
+    '''
+    Early and late event times by the breadth first passes from event 0 and back from the end event
+    The end event is the one without outgoing arcs, events added for dummies come after it in net.nodes
+    '''
+    times = {node : [-math.inf, math.inf] for node in net.nodes}
+    adj = {node : [] for node in net.nodes}
+    rev = {node : [] for node in net.nodes}
+    for node1, node2, weight, activity in net.edges:
+        adj[node1].append((node2, weight))
+        rev[node2].append((node1, weight))
+    times[0][0] = 0
+    queue = [0]
+    while queue:
+        node = queue.pop(0)
+        for node2, weight in adj[node]:
+            times[node2][0] = max(times[node][0] + weight, times[node2][0])
+            queue.append(node2)
+    sink, = [node for node in net.nodes if not adj[node]]
+    times[sink][1] = times[sink][0]
+    queue = [sink]
+    while queue:
+        node = queue.pop(0)
+        for node2, weight in rev[node]:
+            times[node2][1] = min(times[node][1] - weight, times[node2][1])
+            queue.append(node2)
+    return times
+
+def old_floats(net, times):
+    '''
+    Total float as the first float_of_activity computed it, free float up to the earliest start
+    of the activities that follow, directly or through dummies
+    '''
+    adj = {node : [] for node in net.nodes}
+    for node1, node2, weight, activity in net.edges:
+        adj[node1].append((node2, activity))
+    def next_start(node):
+        if not adj[node] or any(activity != "" for node2, activity in adj[node]):
+            return times[node][0]
+        return min(next_start(node2) for node2, activity in adj[node])
+    floats = {}
+    for node1, node2, weight, activity in net.edges:
+        if activity != "":
+            floats[activity] = [times[node2][1] - times[node1][0] - weight, next_start(node2) - times[node1][0] - weight]
+    return floats
+
+SAMPLE = {
+    "A" : [[], 10],
+    "B" : [[], 6],
+    "C" : [["A"], 7],
+    "D" : [["A"], 9],
+    "E" : [["B"], 10],
+    "F" : [["C", "E"], 3],
+    "G" : [["D", "F"], 6],
+}
+
+#Shared and overlapping precursor sets, so the network needs dummies
+DUMMIES = {
+    "A" : [[], 4],
+    "B" : [[], 3],
+    "C" : [["A"], 5],
+    "D" : [["A", "B"], 2],
+    "E" : [["A", "B"], 6],
+    "F" : [["C", "D"], 1],
+    "G" : [["C", "D", "E"], 3],
+}
+
+TABLES = [SAMPLE, DUMMIES] + [dependence_table(n, window=6, seed=seed) for seed, n in enumerate((6, 9, 12, 14))]
+
+@pytest.mark.parametrize("table", TABLES)
+def test_dummies(table):
+    net = ActivityNetwork(copy.deepcopy(table))
+    activities = [edge[3] for edge in net.edges if edge[3] != ""]
+    assert sorted(activities) == sorted(table)
+    #Dummies take no time, and no two arcs join the same pair of events
+    assert all(edge[2] == 0 for edge in net.edges if edge[3] == "")
+    assert len({(edge[0], edge[1]) for edge in net.edges}) == len(net.edges)
+    #Every precursor of an activity ends before it starts, through dummies if needed
+    after = {node : set() for node in net.nodes}
+    for node1, node2, weight, activity in net.edges:
+        after[node1].add(node2)
+    def reaches(node, target):
+        return node == target or any(reaches(node2, target) for node2 in after[node])
+    arcs = {edge[3] : edge for edge in net.edges}
+    for activity, (precursors, duration) in table.items():
+        for precursor in precursors:
+            assert reaches(arcs[precursor][1], arcs[activity][0])
+
+@pytest.mark.parametrize("table", TABLES)
+def test_arcs(table):
+    net = ActivityNetwork(copy.deepcopy(table))
+    assert sorted(map(tuple, net.edges)) == sorted(map(tuple, old_arcs(net.node_dict, table)))
+
+@pytest.mark.parametrize("table", TABLES)
+def test_against_old_passes(table):
+    net = ActivityNetwork(copy.deepcopy(table))
+    times = old_times(net)
+    assert net.calculate_early_late_event_times() == times
+    assert net.total_project_duration() == max(early for early, late in times.values())
+    assert net.floats() == old_floats(net, times)
+    for activity in table:
+        assert net.float_of_activity(activity) == old_floats(net, times)[activity][0]
+    assert net.float_of_activity("not an activity") is None
+
+@pytest.mark.parametrize("table", TABLES)
+def test_critical_path(table):
+    net = ActivityNetwork(copy.deepcopy(table))
+    times = old_times(net)
+    floats = old_floats(net, times)
+    critical = net.critical_path()
+    assert set(critical) == {activity for activity in floats if floats[activity][0] == 0}
+    start = {edge[3] : times[edge[0]][0] for edge in net.edges}
+    assert [start[activity] for activity in critical] == sorted(start[activity] for activity in critical)
+    #Critical activities take up the whole project
+    assert sum(table[activity][1] for activity in critical) >= net.total_project_duration()
+
+def test_sample_schedule():
+    net = ActivityNetwork(copy.deepcopy(SAMPLE))
+    assert net.total_project_duration() == 26
+    assert net.critical_path() == ["A", "C", "F", "G"]
+    assert net.floats()["D"] == [1, 1]
+    assert net.floats()["B"] == [1, 0]
+
+@pytest.mark.parametrize("seed", range(4))
+def test_update_durations(seed):
+    rng = random.Random(seed)
+    table = dependence_table(14, window=6, seed=seed)
+    net = ActivityNetwork(copy.deepcopy(table))
+    net.calculate_early_late_event_times()
+    for _ in range(5):
+        changes = {activity : rng.randint(0, 25) for activity in rng.sample(sorted(table), rng.randint(1, 4))}
+        if len(changes) == 1:
+            net.update_duration(*next(iter(changes.items())))
+        else:
+            net.update_durations(changes)
+        for activity, duration in changes.items():
+            table[activity][1] = duration
+        #Brought up to date incrementally, against a network built with the new durations
+        fresh = ActivityNetwork(copy.deepcopy(table))
+        assert net.calculate_early_late_event_times() == fresh.calculate_early_late_event_times()
+        assert net.floats() == fresh.floats()
+        assert net.critical_path() == fresh.critical_path()
+    with pytest.raises(KeyError):
+        net.update_duration("not an activity", 3)
+
+def test_cycle():
+    with pytest.raises(ValueError):
+        ActivityNetwork({"A" : [["B"], 1], "B" : [["A"], 2]}).calculate_early_late_event_times()
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_schedule_many(processes):
+    tables = [dependence_table(n, window=6, seed=n) for n in range(3, 20)]
+    results = sorted(ActivityNetwork.schedule_many(tables, processes=processes, chunk_size=4))
+    assert [index for index, *result in results] == list(range(len(tables)))
+    for index, duration, times, floats in results:
+        net = ActivityNetwork(copy.deepcopy(tables[index]))
+        assert duration == net.total_project_duration()
+        assert times == net.calculate_early_late_event_times()
+        assert floats == net.floats()
+
+def test_simulate_fixed_durations():
+    net = ActivityNetwork(copy.deepcopy(SAMPLE))
+    result = net.simulate(scenarios=50, seed=1, processes=1)
+    assert (result.durations == 26).all()
+    assert {activity for activity, share in result.criticality.items() if share == 1} == set(net.critical_path())
+
+def test_simulate_seed():
+    net = ActivityNetwork(copy.deepcopy(SAMPLE))
+    distributions = {"A" : (8, 10, 15), "E" : (5, 10, 20)}
+    first = net.simulate(distributions, scenarios=200, seed=3, processes=1)
+    second = net.simulate(distributions, scenarios=200, seed=3, processes=1)
+    assert (first.durations == second.durations).all()
+    #A can be 2 shorter, E is not critical by 1
+    assert (first.durations >= 26 - 2).all()
+
+def test_simulate_chunks():
+    net = ActivityNetwork(dependence_table(40, window=6, seed=1))
+    distributions = {activity : (1, 2, 5) for activity in sorted(net.dependence_table)[:20]}
+    first = net.simulate(distributions, scenarios=500, seed=4, processes=1, chunk_size=64)
+    #Every chunk has its own seed, so a pool gives the same scenarios
+    second = net.simulate(distributions, scenarios=500, seed=4, processes=2, chunk_size=64)
+    assert (first.durations == second.durations).all()
+    assert first.criticality == second.criticality
@@ -0,0 +1,92 @@
+from graph import Graph
+from benchmarks.generators import eulerian_graph, erdos_renyi
+from collections import Counter
+import random, pytest
+
+def arcs(g, walk):
+    '''
+    Edges walked between consecutive vertices, as a multiset comparable with the edges of g
+    '''
+    steps = zip(walk, walk[1:])
+    if g.directed:
+        return Counter(steps)
+    return Counter(frozenset(step) if step[0] != step[1] else (step[0],) for step in steps)
+
+def edge_set(g):
+    if g.directed:
+        return Counter((edge[0], edge[1]) for edge in g.edges)
+    return Counter(frozenset(edge[:2]) if edge[0] != edge[1] else (edge[0],) for edge in g.edges)
+
+def assert_cycle(g, walk):
+    assert walk[0] == walk[-1] == g.nodes[0]
+    assert_trail(g, walk)
+
+def assert_trail(g, walk):
+    #Every edge walked exactly once, each step along an edge
+    assert len(walk) == len(g.edges) + 1
+    assert arcs(g, walk) == edge_set(g)
+
+def directed_eulerian(n, seed):
+    '''
+    Directed graph made of random closed walks, so every node enters as often as it leaves
+    '''
+    rng = random.Random(seed)
+    order = list(range(n))
+    rng.shuffle(order)
+    edges = [[order[i], order[(i + 1) % n]] for i in range(n)]
+    for _ in range(n // 3):
+        cycle = rng.sample(range(n), rng.randint(2, 6))
+        edges += [[cycle[i], cycle[(i + 1) % len(cycle)]] for i in range(len(cycle))]
+    return Graph(list(range(n)), edges, directed=True)
+
+@pytest.mark.parametrize("backend", ["list", "csr"])
+@pytest.mark.parametrize("g", [eulerian_graph(40, seed=1), eulerian_graph(12, cycles=10, seed=2),
+                               directed_eulerian(30, seed=3)])
+def test_cycle(g, backend):
+    g = Graph(list(g.nodes), g.edges, g.directed, g.weighted, backend)
+    walk = g.find_eulerian_cycle()
+    assert_cycle(g, walk)
+    assert list(g.iter_eulerian_cycle()) == walk
+    assert g.find_eulerian_trail() == walk
+
+def test_multigraph_and_loops():
+    g = Graph([0, 1, 2], [[0, 1], [1, 0], [0, 1], [1, 2], [2, 0], [2, 2]])
+    assert_cycle(g, g.find_eulerian_cycle())
+    g = Graph([0, 1], [[0, 1], [1, 0], [0, 0], [1, 0], [0, 1]], directed=True)
+    assert_cycle(g, g.find_eulerian_cycle())
+
+@pytest.mark.parametrize("directed", [False, True])
+def test_trail(directed):
+    g = directed_eulerian(20, seed=4) if directed else eulerian_graph(20, seed=4)
+    #An extra edge between two nodes leaves a trail from the first to the second only
+    g.add_edge(3, 11, *([1] if g.weighted else []))
+    assert g.find_eulerian_cycle() is None
+    assert g.iter_eulerian_cycle() is None
+    walk = g.find_eulerian_trail()
+    assert_trail(g, walk)
+    if directed:
+        assert (walk[0], walk[-1]) == (3, 11)
+    else:
+        assert {walk[0], walk[-1]} == {3, 11}
+
+@pytest.mark.parametrize("edges, directed", [
+    ([[0, 1], [1, 2], [2, 3], [3, 0], [0, 2], [1, 3]], False),
+    ([[0, 1], [1, 2], [0, 2], [0, 3]], True),
+    ([[0, 1], [1, 0], [2, 3], [3, 2]], True),
+    ([[0, 1], [1, 2], [2, 0], [3, 4], [4, 5], [5, 3]], False),
+])
+def test_none(edges, directed):
+    g = Graph(sorted({node for edge in edges for node in edge}), edges, directed=directed)
+    assert g.find_eulerian_cycle() is None
+    assert g.find_eulerian_trail() is None
+
+def test_isolated_node():
+    g = Graph([0, 1, 2, 3], [[0, 1], [1, 2], [2, 0]])
+    assert g.find_eulerian_cycle() is None
+    assert Graph([], []).find_eulerian_cycle() is None
+
+def test_odd_graph():
+    g = erdos_renyi(30, 60, seed=5)
+    degree = Counter(node for edge in g.edges for node in edge[:2])
+    if any(degree[node] % 2 for node in g.nodes):
+        assert g.find_eulerian_cycle() is None
@@ -0,0 +1,47 @@
+from graph import Graph, ActivityNetwork
+from benchmarks.generators import erdos_renyi
+from collections import Counter
+import json, pytest
+
+def export(g, tmp_path, **options):
+    path = str(tmp_path / "g.json")
+    g.export_json(path, **options)
+    with open(path) as file:
+        return json.load(file)
+
+@pytest.mark.parametrize("backend", ["list", "csr"])
+def test_whole_graph(tmp_path, backend):
+    base = erdos_renyi(30, 60, seed=1)
+    g = Graph(list(base.nodes), base.edges, False, True, backend)
+    data = export(g, tmp_path)
+    assert (data["directed"], data["weighted"]) == (False, True)
+    assert [node["id"] for node in data["nodes"]] == list(g.nodes)
+    assert [[edge["source"], edge["target"], edge["weight"]] for edge in data["edges"]] == [list(edge) for edge in g.edges]
+
+def test_max_nodes(tmp_path):
+    g = erdos_renyi(40, 80, seed=2)
+    degree = Counter(node for edge in g.edges for node in edge[:2])
+    data = export(g, tmp_path, max_nodes=5)
+    kept = {node["id"] for node in data["nodes"]}
+    assert len(kept) == 5
+    #The busiest nodes, with only the edges between them
+    assert min(degree[node] for node in kept) >= max(degree[node] for node in g.nodes if node not in kept)
+    assert len(data["edges"]) == sum(edge[0] in kept and edge[1] in kept for edge in g.edges)
+
+def test_collapse_components(tmp_path):
+    g = erdos_renyi(30, 25, seed=3)
+    data = export(g, tmp_path, collapse="components")
+    assert sorted(node["size"] for node in data["nodes"]) == sorted(map(len, g.connected_components()))
+    assert data["edges"] == []
+
+def test_highlight_only(tmp_path):
+    g = erdos_renyi(20, 40, seed=4)
+    data = export(g, tmp_path, highlight=[g.edges[0]], highlight_only=True)
+    assert [node["id"] for node in data["nodes"]] == g.edges[0][:2]
+    assert [edge["highlight"] for edge in data["edges"]] == [True]
+
+def test_activity_network(tmp_path):
+    net = ActivityNetwork({"A" : [[], 3], "B" : [["A"], 2], "C" : [["A"], 4]})
+    data = export(net, tmp_path)
+    #Activities are labelled with their durations, the dummy joining the ends of B and C by its own
+    assert sorted(edge["label"] for edge in data["edges"]) == ["0", "A3", "B2", "C4"]
@@ -0,0 +1,116 @@
+from graph import Graph
+from benchmarks.generators import erdos_renyi
+import random, pytest
+
+#Edits through the mutation methods or directly on g.nodes and g.edges, against graphs built from scratch
+
+def distances(g, src):
+    tree = g.shortestPath(src)
+    return {node : tree.distance(node) for node in g.nodes}
+
+def rebuilt(g):
+    return Graph(list(g.nodes), [list(edge) for edge in g.edges], g.directed, g.weighted, g.backend)
+
+def find(model, directed, node1, node2, weight=None):
+    '''
+    Position of the first edge of model between node1 and node2 (with that weight if given), None if there is none
+    '''
+    for i, edge in enumerate(model):
+        if (edge[0], edge[1]) == (node1, node2) or not directed and (edge[1], edge[0]) == (node1, node2):
+            if weight is None or edge[2] == weight:
+                return i
+    return None
+
+@pytest.mark.parametrize("backend", ["list", "csr"])
+@pytest.mark.parametrize("seed", range(40))
+def test_edge_positions(seed, backend):
+    rng = random.Random(seed)
+    directed = rng.random() < 0.5
+    n = rng.randint(1, 6)
+    #Few nodes and weights, so there are parallel edges and loops to pick from
+    model = [[rng.randrange(n), rng.randrange(n), rng.randint(1, 3)] for _ in range(rng.randint(0, 15))]
+    g = Graph(list(range(n)), [list(edge) for edge in model], directed, True, backend)
+    for _ in range(30):
+        op = rng.choice(("remove", "add", "set"))
+        node1, node2 = rng.randrange(n), rng.randrange(n)
+        if op == "remove":
+            weight = rng.choice((None, 1, 2, 3))
+            i = find(model, directed, node1, node2, weight)
+            if i is None:
+                with pytest.raises(ValueError):
+                    g.remove_edge(node1, node2, weight)
+                continue
+            assert list(g.remove_edge(node1, node2, weight)) == model[i]
+            #The last edge takes the place of the removed one
+            last = model.pop()
+            if i < len(model):
+                model[i] = last
+        elif op == "add":
+            model.append([node1, node2, rng.randint(1, 3)])
+            g.add_edge(*model[-1])
+        elif find(model, directed, node1, node2) is not None:
+            weight = rng.randint(1, 3)
+            g.set_weight(node1, node2, weight)
+            model[find(model, directed, node1, node2)][2] = weight
+        assert [list(edge) for edge in g.edges] == model
+
+@pytest.mark.parametrize("backend", ["list", "csr"])
+def test_mutations(backend):
+    base = erdos_renyi(30, 60, seed=1)
+    g = Graph(list(base.nodes), base.edges, False, True, backend)
+    #Built before the edits, so they must be brought up to date
+    g.shortestPath(0)
+    g.adjacency_dict()
+    version = g.version
+    g.add_node(30)
+    g.add_edge(30, 4, 3)
+    g.remove_edge(*g.edges[0][:2])
+    g.set_weight(*g.edges[5][:2], 1)
+    assert g.version == version + 4
+    assert distances(g, 0) == distances(rebuilt(g), 0)
+    assert g.adjacency_dict() == rebuilt(g).adjacency_dict()
+
+def test_direct_edits():
+    g = erdos_renyi(20, 40, seed=2)
+    model = [list(edge) for edge in g.edges]
+    g.shortestPath(0)
+    g.adjacency_dict()
+    for edit in (lambda edges: edges[0].__setitem__(2, 1),
+                 lambda edges: edges.append([0, 19, 1]),
+                 lambda edges: edges.pop(3),
+                 lambda edges: edges.__delitem__(slice(0, 2))):
+        version = g.version
+        edit(g.edges)
+        edit(model)
+        assert g.version > version
+        assert distances(g, 0) == distances(rebuilt(g), 0)
+        assert g.adjacency_dict() == rebuilt(g).adjacency_dict()
+        #The edge position index is rebuilt too
+        g.set_weight(*g.edges[-1][:2], 2)
+        model[find(model, False, *model[-1][:2])][2] = 2
+        assert [list(edge) for edge in g.edges] == model
+    g.nodes.append(20)
+    assert distances(g, 20) == {node : (0 if node == 20 else float("inf")) for node in g.nodes}
+
+def test_detached_edges():
+    g = Graph([0, 1, 2], [[0, 1, 1], [1, 2, 1]], weighted=True)
+    edges = [[0, 1, 1], [1, 2, 1]]
+    #The lists given to the graph are copied, an edge removed from it is no longer tracked
+    edges[0][2] = 5
+    assert g.shortestPath(0).distance(2) == 2
+    edge = g.remove_edge(1, 2)
+    version = g.version
+    edge[2] = 7
+    assert g.version == version
+    g.edges = [[0, 2, 4]]
+    assert g.shortestPath(0).distance(2) == 4
+    g.edges[0][2] = 3
+    assert g.shortestPath(0).distance(2) == 3
+
+def test_invalidate():
+    g = erdos_renyi(20, 40, seed=3)
+    g.shortestPath(0)
+    version = g.version
+    g.invalidate()
+    assert g.version == version + 1
+    assert distances(g, 0) == distances(rebuilt(g), 0)
@@ -0,0 +1,34 @@
+from graph import Graph
+from graph.instrument import Instrumentation, current
+from benchmarks.generators import eulerian_graph, erdos_renyi
+import pytest
+
+def test_counters():
+    g = Graph([0, 1, 2], [[0, 1, 1], [0, 2, 5], [1, 2, 1]], directed=True, weighted=True)
+    with Instrumentation() as stats:
+        g.shortestPath(0)
+    #2 is improved twice, first from 0 and then through 1
+    assert stats.counters["dijkstra.searches"] == 1
+    assert stats.counters["dijkstra.settled"] == 3
+    assert stats.counters["dijkstra.improvements"] == 3
+    assert stats.counters["dijkstra.pushes"] == 4
+    assert stats.timings["Graph.shortestPath"][0] == 1
+    assert current() is None
+
+def test_iteration_is_timed():
+    g = eulerian_graph(30, seed=6)
+    with Instrumentation() as stats:
+        walk = g.iter_eulerian_cycle()
+        #Recorded once the walk is over, not when the iterator is made
+        assert "Graph.iter_eulerian_cycle" not in stats.timings
+        assert len(list(walk)) == len(g.edges) + 1
+        assert stats.timings["Graph.iter_eulerian_cycle"][0] == 1
+
+@pytest.mark.parametrize("seed", range(3))
+def test_postman_is_timed_once(seed):
+    g = erdos_renyi(20, 40, seed=seed)
+    with Instrumentation() as stats:
+        g.chinese_postman()
+    #The Eulerian checks and walks of the postman are part of its own timing
+    assert stats.timings["Graph.chinese_postman"][0] == 1
+    assert not any("eulerian" in name for name in stats.timings)
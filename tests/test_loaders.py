@@ -0,0 +1,77 @@
+from graph import Graph, ActivityNetwork
+from graph.loaders import read_edgelist, append_columns
+from graph.csr import EdgeArrays
+from benchmarks.generators import erdos_renyi
+import pytest
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+EDGES = [["a", "b", 3], ["b", "c", 1.5], ["c", "a", 2], ["a", "d", 7]]
+
+@pytest.mark.parametrize("name, delimiter", [("g.txt", " "), ("g.csv", ","), ("g.tsv", "\t")])
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_formats(tmp_path, name, delimiter, chunk_size):
+    text = "# an edge list\n" + "".join(delimiter.join(map(str, edge)) + "\n" for edge in EDGES)
+    g = Graph.from_edgelist_file(write(tmp_path, name, text), weighted=True, chunk_size=chunk_size)
+    assert list(g.nodes) == ["a", "b", "c", "d"]
+    assert [list(edge) for edge in g.edges] == EDGES
+
+@pytest.mark.parametrize("chunk_size", [2, 100])
+def test_whitespace(tmp_path, chunk_size):
+    #Runs of spaces and tabs, a header, a blank line and no line end at the end of the file
+    text = "source target weight\n1  2\t5\n2 3 4\n\n3   1 6"
+    store = read_edgelist(write(tmp_path, "g.txt", text), weighted=True, header=True, node_type=int, chunk_size=chunk_size)
+    g = Graph(None, store, weighted=True, backend="csr")
+    assert list(g.nodes) == [1, 2, 3]
+    assert [list(edge) for edge in g.edges] == [[1, 2, 5], [2, 3, 4], [3, 1, 6]]
+
+@pytest.mark.parametrize("text", [
+    #The two lines make up the right number of tokens together
+    "a b 1\nc d 2\ne f\ng h 3 4\n",
+    "a b\nc d 2 e\n",
+    "a b 1 c\nd 2\n",
+    "a b 1\nc d\n",
+])
+@pytest.mark.parametrize("chunk_size", [2, 4, 100])
+def test_ragged_lines(tmp_path, text, chunk_size):
+    with pytest.raises(ValueError):
+        read_edgelist(write(tmp_path, "g.txt", text), weighted=True, chunk_size=chunk_size)
+
+def test_unweighted(tmp_path):
+    store = read_edgelist(write(tmp_path, "g.txt", "a b\nc d\n"), weighted=False)
+    assert [list(edge) for edge in Graph(None, store, backend="csr").edges] == [["a", "b"], ["c", "d"]]
+    #A weight or any other extra column is rejected, in whole chunks and in ragged ones
+    for text in ("a b 1\nc d 2\n", "a b\nc d e\n", "a b\nc\n"):
+        with pytest.raises(ValueError):
+            read_edgelist(write(tmp_path, "g.txt", text), weighted=False)
+
+def test_rollback():
+    store = EdgeArrays(weighted=True)
+    append_columns(store, ["a"], ["b"], ["1"])
+    with pytest.raises(ValueError):
+        append_columns(store, ["c", "d"], ["e", "f"], ["1.5", "x"])
+    #The labels and the int weights are as they were before the malformed chunk
+    assert len(store) == 1 and store.labels == ["a", "b"] and store.ids == {"a" : 0, "b" : 1}
+    assert store.weights.typecode == "q"
+
+def test_bad_weight(tmp_path):
+    path = write(tmp_path, "g.txt", "a b 1\nc d x\n")
+    with pytest.raises(ValueError):
+        read_edgelist(path, weighted=True)
+
+def test_roundtrip(tmp_path):
+    g = erdos_renyi(50, 120, seed=1)
+    path = write(tmp_path, "g.txt", "".join(f"{u} {v} {w}\n" for u, v, w in g.edges))
+    loaded = Graph.from_edgelist_file(path, weighted=True, node_type=int, chunk_size=16)
+    assert [list(edge) for edge in loaded.edges] == g.edges
+    #Nodes are numbered in order of appearance, isolated nodes are not in the file
+    assert sorted(loaded.nodes) == sorted({node for edge in g.edges for node in edge[:2]})
+
+def test_dependence_table(tmp_path):
+    text = "activity,duration,precursors\nA,10,\nB,6\nC,7,A\nF,3,C; B\n"
+    net = ActivityNetwork.from_csv(write(tmp_path, "t.csv", text))
+    assert net.dependence_table == {"A" : [[], 10], "B" : [[], 6], "C" : [["A"], 7], "F" : [["C", "B"], 3]}
+    assert net.total_project_duration() == 20
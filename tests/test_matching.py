@@ -0,0 +1,114 @@
+from graph.matching import max_weight_matching, min_weight_perfect_matching, _bitmask_matching, BITMASK_LIMIT
+from benchmarks.generators import erdos_renyi
+import math, random, pytest
+
+def pairs_weight(pairs, weights):
+    return sum(weights[i][j] for i, j in pairs)
+
+def random_weights(rng, k, missing=0.0, floats=False):
+    '''
+    Symmetric k x k weight matrix, with a share of missing (math.inf) pairs
+    '''
+    weights = [[math.inf] * k for _ in range(k)]
+    for i in range(k):
+        for j in range(i + 1, k):
+            if rng.random() >= missing:
+                weights[i][j] = weights[j][i] = rng.uniform(1, 50) if floats else rng.randint(1, 50)
+    return weights
+
+def blossom_perfect(weights):
+    '''
+    Minimum weight perfect matching through the blossom algorithm, as min_weight_perfect_matching
+    does above BITMASK_LIMIT nodes
+    '''
+    k = len(weights)
+    finite = [weights[i][j] for i in range(k) for j in range(i + 1, k) if weights[i][j] != math.inf]
+    top = max(finite) + 1
+    mate = max_weight_matching([(i, j, top - weights[i][j]) for i in range(k) for j in range(i + 1, k)
+                                if weights[i][j] != math.inf], maxcardinality=True)
+    if len(mate) < k or -1 in mate:
+        return None
+    return [(i, mate[i]) for i in range(k) if i < mate[i]]
+
+@pytest.mark.parametrize("seed", range(20))
+def test_blossom_against_bitmask(seed):
+    rng = random.Random(seed)
+    k = rng.choice((2, 4, 6, 8, 10, 12))
+    weights = random_weights(rng, k, missing=rng.choice((0.0, 0.3, 0.6)), floats=seed % 2 == 1)
+    expected = _bitmask_matching(weights)
+    found = blossom_perfect(weights)
+    if expected is None:
+        assert found is None
+        return
+    assert sorted(i for pair in found for i in pair) == list(range(k))
+    assert math.isclose(pairs_weight(found, weights), pairs_weight(expected, weights))
+
+def brute_force(weights, nodes):
+    '''
+    Weight of the best pairing of nodes, trying every partner of the first one
+    '''
+    if not nodes:
+        return 0
+    first, rest = nodes[0], nodes[1:]
+    return min((weights[first][other] + brute_force(weights, [n for n in rest if n != other]) for other in rest),
+               default=math.inf)
+
+@pytest.mark.parametrize("seed", range(10))
+def test_bitmask_against_brute_force(seed):
+    rng = random.Random(100 + seed)
+    k = rng.choice((2, 4, 6, 8))
+    weights = random_weights(rng, k, missing=0.2)
+    pairs = _bitmask_matching(weights)
+    expected = brute_force(weights, list(range(k)))
+    if expected == math.inf:
+        assert pairs is None
+    else:
+        assert pairs_weight(pairs, weights) == expected
+
+@pytest.mark.parametrize("k", [BITMASK_LIMIT - 2, BITMASK_LIMIT + 2, 30])
+def test_min_weight_perfect_matching(k):
+    rng = random.Random(k)
+    points = [(rng.random(), rng.random()) for _ in range(k)]
+    nodes = [f"n{i}" for i in range(k)]
+    weight = lambda u, v: math.dist(points[int(u[1:])], points[int(v[1:])])
+    pairs = min_weight_perfect_matching(nodes, weight)
+    assert sorted(node for pair in pairs for node in pair) == sorted(nodes)
+    weights = [[weight(u, v) if u != v else math.inf for v in nodes] for u in nodes]
+    if k <= 16:
+        expected = _bitmask_matching(weights)
+        assert math.isclose(sum(weight(u, v) for u, v in pairs), pairs_weight(expected, weights))
+
+def test_no_perfect_matching():
+    assert min_weight_perfect_matching([0, 1, 2], lambda u, v: 1) is None
+    assert min_weight_perfect_matching([], lambda u, v: 1) == []
+    #Two pairs can only be made across a missing pair
+    weights = {(0, 1) : 1, (1, 0) : 1}
+    assert min_weight_perfect_matching([0, 1, 2, 3], lambda u, v: weights.get((u, v), math.inf)) is None
+
+def test_max_weight_matching():
+    #The heaviest matching leaves the middle edge out
+    assert max_weight_matching([(0, 1, 5), (1, 2, 11), (2, 3, 5)]) == [-1, 2, 1, -1]
+    assert max_weight_matching([(0, 1, 5), (1, 2, 11), (2, 3, 5)], maxcardinality=True) == [1, 0, 3, 2]
+    assert max_weight_matching([]) == []
+
+@pytest.mark.parametrize("seed", range(4))
+def test_chinese_postman(seed):
+    g = erdos_renyi(24, 50, seed=seed)
+    if not g._connected_edges():
+        pytest.skip("edges are not connected")
+    postman, duplicated = g.chinese_postman()
+    assert postman is not g
+    assert len(postman.edges) == len(g.edges) + len(duplicated)
+    walk = postman.find_eulerian_cycle()
+    assert walk is not None and len(walk) == len(postman.edges) + 1
+    #Odd nodes paired through the shortest paths, checked against the bitmask programme
+    degree = {node : 0 for node in g.nodes}
+    for edge in g.edges:
+        degree[edge[0]] += 1
+        degree[edge[1]] += 1
+    odd = [node for node in g.nodes if degree[node] % 2]
+    dist = g.shortest_distances_all_pairs()
+    weights = [[dist[u][v] if u != v else math.inf for v in odd] for u in odd]
+    added = sum(edge[2] for edge in duplicated)
+    assert added == pairs_weight(_bitmask_matching(weights), weights)
+    assert g.chinese_postman()[1] == duplicated
@@ -0,0 +1,60 @@
+from graph import Graph
+from benchmarks.generators import erdos_renyi
+import random, pytest
+
+def reference(g, reduce):
+    '''
+    Dense matrix by a loop over the edges, in the order of g.nodes
+    '''
+    index = {node : i for i, node in enumerate(g.nodes)}
+    cells = {}
+    for edge in g.edges:
+        w = edge[2] if g.weighted else 1
+        i, j = index[edge[0]], index[edge[1]]
+        for cell in {(i, j), (j, i)} if not g.directed else {(i, j)}:
+            cells.setdefault(cell, []).append(w)
+    merge = {"sum" : sum, "min" : min, "count" : len}[reduce]
+    n = len(g.nodes)
+    return [[merge(cells[i, j]) if (i, j) in cells else 0 for j in range(n)] for i in range(n)]
+
+def dense(matrix, format):
+    return (matrix if format == "dense" else matrix.toarray()).tolist()
+
+def labelled(seed, directed, weighted):
+    rng = random.Random(seed)
+    nodes = [f"n{i}" for i in range(9)]
+    #Loops and parallel edges included
+    edges = [[rng.choice(nodes), rng.choice(nodes), rng.randint(1, 9)][:3 if weighted else 2] for _ in range(30)]
+    return Graph(nodes, edges, directed, weighted)
+
+@pytest.mark.parametrize("reduce", ["sum", "min", "count"])
+@pytest.mark.parametrize("directed, weighted", [(False, True), (True, True), (True, False)])
+@pytest.mark.parametrize("format", ["dense", "coo", "csr"])
+def test_formats(format, directed, weighted, reduce):
+    g = labelled(1, directed, weighted)
+    matrix, index = g.adjacency_matrix(format, reduce)
+    assert index == {node : i for i, node in enumerate(g.nodes)}
+    assert dense(matrix, format) == reference(g, reduce)
+
+def test_list_format():
+    g = erdos_renyi(20, 40, seed=2)
+    assert g.adjacency_matrix() == g.adjacency_matrix("dense")[0].tolist()
+    with pytest.raises(ValueError):
+        g.adjacency_matrix(reduce="min")
+    with pytest.raises(ValueError):
+        g.adjacency_matrix("lil")
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("format", ["dense", "coo", "csr"])
+def test_roundtrip(format, directed):
+    g = labelled(3, directed, True)
+    matrix, index = g.adjacency_matrix(format, "min")
+    rebuilt = Graph.from_adjacency_matrix(matrix, index, directed=directed)
+    assert rebuilt.nodes == g.nodes
+    #Parallel edges are merged to the lightest, so the distances are the same
+    assert rebuilt.shortest_distances_all_pairs() == g.shortest_distances_all_pairs()
+    assert dense(rebuilt.adjacency_matrix(format, "min")[0], format) == dense(matrix, format)
+
+def test_node_count():
+    with pytest.raises(ValueError):
+        Graph.from_adjacency_matrix([[0, 1], [1, 0]], ["a", "b", "c"])
@@ -0,0 +1,95 @@
+from graph import Graph, UnweightedGraphError
+from graph.mst import DisjointSet
+from benchmarks.generators import erdos_renyi, grid_graph, road_network
+from itertools import combinations
+import random, pytest
+
+METHODS = ("kruskal", "prim", "boruvka")
+
+def spanning_forest(g, method):
+    if method == "boruvka":
+        return g.boruvka(processes=1)
+    return getattr(g, method)()
+
+def forest_weight(g, tree_edges):
+    return sum(edge[2] for edge in tree_edges)
+
+def component_count(nodes, edges):
+    components = DisjointSet(len(nodes))
+    index = {node : i for i, node in enumerate(nodes)}
+    count = len(nodes)
+    for edge in edges:
+        if components.union(index[edge[0]], index[edge[1]]):
+            count -= 1
+    return count
+
+def brute_force(g):
+    '''
+    Lightest set of edges spanning every component, among every set of n - components edges
+    '''
+    size = len(g.nodes) - component_count(g.nodes, g.edges)
+    best = None
+    for edges in combinations(g.edges, size):
+        if component_count(g.nodes, edges) == len(g.nodes) - size:
+            weight = forest_weight(g, edges)
+            best = weight if best is None else min(best, weight)
+    return best
+
+def assert_forest(g, tree):
+    #A forest spanning every component of g, made of edges of g
+    assert tree.nodes == g.nodes
+    assert len(tree.edges) == len(g.nodes) - component_count(g.nodes, g.edges)
+    assert component_count(tree.nodes, tree.edges) == component_count(g.nodes, g.edges)
+    for edge in tree.edges:
+        assert edge in g.edges
+
+GRAPHS = [
+    erdos_renyi(60, 150, seed=1),
+    erdos_renyi(60, 50, seed=2),
+    grid_graph(7, 9, seed=3),
+    road_network(100, seed=4),
+    erdos_renyi(40, 120, directed=True, seed=5),
+]
+
+@pytest.mark.parametrize("backend", ["list", "csr"])
+@pytest.mark.parametrize("g", GRAPHS)
+def test_methods_agree(g, backend):
+    g = Graph(list(g.nodes), g.edges, g.directed, g.weighted, backend)
+    weights = []
+    for method in METHODS:
+        tree = spanning_forest(g, method)
+        assert_forest(g, tree)
+        weights.append(tree.total_graph_weight())
+    assert weights[0] == weights[1] == weights[2]
+
+@pytest.mark.parametrize("seed", range(12))
+def test_brute_force(seed):
+    rng = random.Random(seed)
+    n = rng.randint(2, 7)
+    edges = [[rng.randrange(n), rng.randrange(n), rng.randint(1, 5)] for _ in range(rng.randint(1, 10))]
+    #Loops, parallel edges and ties included
+    g = Graph(list(range(n)), edges, weighted=True)
+    expected = brute_force(g)
+    for method in METHODS:
+        tree = spanning_forest(g, method)
+        assert_forest(g, tree)
+        assert tree.total_graph_weight() == expected
+
+def test_float_weights():
+    rng = random.Random(6)
+    g = Graph(list(range(30)), [[rng.randrange(30), rng.randrange(30), rng.random()] for _ in range(90)], weighted=True)
+    weights = [forest_weight(g, spanning_forest(g, method).edges) for method in METHODS]
+    assert weights[0] == pytest.approx(weights[1]) == pytest.approx(weights[2])
+
+def test_boruvka_chunks():
+    g = erdos_renyi(80, 300, seed=7)
+    expected = g.kruskal().total_graph_weight()
+    #Several edge ranges, searched in process and by a pool
+    assert g.boruvka(processes=1, chunk_size=64).total_graph_weight() == expected
+    assert g.boruvka(processes=2, chunk_size=64).total_graph_weight() == expected
+
+def test_unweighted():
+    g = Graph([0, 1], [[0, 1]])
+    for method in METHODS:
+        with pytest.raises(UnweightedGraphError):
+            spanning_forest(g, method)
@@ -0,0 +1,122 @@
+from graph import Graph
+from benchmarks.generators import erdos_renyi, grid_graph
+import math, pytest
+
+def bellman_ford(g, src):
+    '''
+    Reference distances from src, relaxing every edge n - 1 times
+    '''
+    dist = {node : math.inf for node in g.nodes}
+    dist[src] = 0
+    arcs = []
+    for edge in g.edges:
+        w = edge[2] if g.weighted else 1
+        arcs.append((edge[0], edge[1], w))
+        if not g.directed:
+            arcs.append((edge[1], edge[0], w))
+    for _ in range(len(g.nodes) - 1):
+        for u, v, w in arcs:
+            if dist[u] + w < dist[v]:
+                dist[v] = dist[u] + w
+    return dist
+
+def length(result):
+    '''
+    Length of a shortest_path_between result, math.inf if unreachable
+    '''
+    return math.inf if result["path"] is None else result["length"]
+
+def path_length(g, path):
+    '''
+    Length of a path along the lightest edges between its consecutive nodes
+    '''
+    total = 0
+    for u, v in zip(path, path[1:]):
+        total += min((edge[2] if g.weighted else 1) for edge in g.edges
+                     if (edge[0], edge[1]) == (u, v) or not g.directed and (edge[1], edge[0]) == (u, v))
+    return total
+
+GRAPHS = [
+    erdos_renyi(40, 80, seed=1),
+    erdos_renyi(40, 100, directed=True, seed=2),
+    erdos_renyi(30, 35, weighted=False, seed=3),
+]
+
+@pytest.mark.parametrize("backend", ["list", "csr"])
+@pytest.mark.parametrize("g", GRAPHS)
+def test_dijkstra(g, backend):
+    g = Graph(list(g.nodes), g.edges, g.directed, g.weighted, backend)
+    for src in (0, 13):
+        tree = g.shortestPath(src)
+        expected = bellman_ford(g, src)
+        for node in g.nodes:
+            assert tree.distance(node) == expected[node]
+            if expected[node] == math.inf:
+                assert tree[node] == {"length" : -1, "path" : None}
+            else:
+                path = tree[node]["path"]
+                assert path[0] == src and path[-1] == node
+                assert path_length(g, path) == expected[node]
+
+@pytest.mark.parametrize("g", GRAPHS)
+def test_targets(g):
+    tree = g.shortestPath(0, targets=[5, 9])
+    expected = bellman_ford(g, 0)
+    assert tree.distance(5) == expected[5] and tree.distance(9) == expected[9]
+
+@pytest.mark.parametrize("backend", ["list", "csr"])
+def test_tree_after_add_node(backend):
+    base = erdos_renyi(10, 20, seed=7)
+    g = Graph(list(base.nodes), base.edges, False, True, backend)
+    tree = g.shortestPath(0)
+    g.add_node(10)
+    g.add_edge(0, 10, 1)
+    #The tree answers for the nodes it was computed over
+    assert 10 not in tree
+    with pytest.raises(KeyError):
+        tree.distance(10)
+    assert len(list(tree)) == 10
+    assert g.shortestPath(0).distance(10) == 1
+
+@pytest.mark.parametrize("backend", ["list", "csr"])
+@pytest.mark.parametrize("g", GRAPHS)
+def test_point_to_point(g, backend):
+    g = Graph(list(g.nodes), g.edges, g.directed, g.weighted, backend)
+    pairs = [(0, 20), (5, 29), (12, 3), (7, 7), (12, 3)]
+    results = g.shortest_paths_between(pairs)
+    for (src, dst), result in zip(pairs, results):
+        expected = bellman_ford(g, src)[dst]
+        for found in (g.shortest_path_between(src, dst), result):
+            if expected == math.inf:
+                assert found == {"length" : -1, "path" : None}
+            else:
+                assert found["length"] == expected
+                assert path_length(g, found["path"]) == expected
+
+def test_astar():
+    g = grid_graph(8, 8, seed=5)
+    #Grid neighbours are one apart and weights are at least 1, so the straight line distance is a lower bound
+    coords = {node : (node // 8, node % 8) for node in g.nodes}
+    manhattan = lambda u, v: abs(u // 8 - v // 8) + abs(u % 8 - v % 8)
+    for src, dst in ((0, 63), (9, 50), (60, 4)):
+        expected = bellman_ford(g, src)[dst]
+        assert g.shortest_path_between(src, dst, coords)["length"] == expected
+        assert g.shortest_path_between(src, dst, manhattan)["length"] == expected
+
+@pytest.mark.parametrize("backend", ["list", "csr"])
+@pytest.mark.parametrize("directed", [False, True])
+def test_landmarks(backend, directed):
+    base = erdos_renyi(50, 150, directed=directed, seed=6)
+    g = Graph(list(base.nodes), base.edges, directed, True, backend)
+    g.build_landmarks(count=4)
+    pairs = [(0, 49), (3, 17), (25, 8), (40, 1)]
+    for src, dst in pairs:
+        assert length(g.shortest_path_between(src, dst)) == bellman_ford(g, src)[dst]
+    #The index is kept up to date by the edits
+    g.add_edge(0, 49, 1)
+    g.set_weight(*g.edges[3][:2], 1)
+    g.remove_edge(*g.edges[10][:2])
+    g.add_node(50)
+    g.add_edge(3, 50, 2)
+    for src, dst in pairs + [(3, 50)]:
+        assert length(g.shortest_path_between(src, dst)) == bellman_ford(g, src)[dst]
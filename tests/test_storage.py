@@ -0,0 +1,40 @@
+from graph import Graph
+from benchmarks.generators import erdos_renyi
+import copy, pickle, pytest
+
+def distances(g, src):
+    tree = g.shortestPath(src)
+    return {node : tree.distance(node) for node in g.nodes}
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load(tmp_path, mmap):
+    g = erdos_renyi(30, 60, seed=9)
+    g.save(str(tmp_path / "g.bin"))
+    loaded = Graph.load(str(tmp_path / "g.bin"), mmap=mmap)
+    assert list(loaded.nodes) == g.nodes
+    assert loaded.nodes == g.nodes
+    assert distances(loaded, 0) == distances(g, 0)
+    for copied in (copy.deepcopy(loaded), pickle.loads(pickle.dumps(loaded))):
+        assert type(copied.nodes) is list
+        assert distances(copied, 0) == distances(g, 0)
+    #Copies the loaded graph to add the duplicated edges
+    postman, duplicated = loaded.chinese_postman()
+    expected, expected_duplicated = g.chinese_postman()
+    assert postman.total_graph_weight() == expected.total_graph_weight()
+    assert len(postman.find_eulerian_cycle()) == len(postman.edges) + 1
+
+@pytest.mark.parametrize("directed, weighted", [(False, False), (True, True)])
+def test_edit_loaded(tmp_path, directed, weighted):
+    g = erdos_renyi(20, 40, directed=directed, weighted=weighted, seed=10)
+    g.save(str(tmp_path / "g.bin"))
+    loaded = Graph.load(str(tmp_path / "g.bin"))
+    assert (loaded.directed, loaded.weighted) == (directed, weighted)
+    removed = g.edges[3][:2]
+    #The mapped arrays are copied on the first edit, the file is left as it was
+    for h in (g, loaded):
+        h.add_node("new")
+        h.add_edge(0, "new", *([4] if weighted else []))
+        h.remove_edge(*removed)
+    assert [list(edge) for edge in loaded.edges] == [list(edge) for edge in g.edges]
+    assert distances(loaded, 0) == distances(g, 0)
+    assert len(Graph.load(str(tmp_path / "g.bin")).nodes) == 20